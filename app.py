@@ -1,5 +1,8 @@
 import flet as ft
+from config.migrations import ensure_schema
 from views.login import main
 
 if __name__ == "__main__":
+    # One indexed read when the schema is current; runs pending migrations otherwise
+    ensure_schema()
     ft.app(target=main)
\ No newline at end of file
@@ -1,145 +1,138 @@
-import mysql.connector
-from mysql.connector import Error
-from utils.password import hash_password
+import threading
+import time
+from contextlib import contextmanager
+from mysql.connector import Error, errors, pooling
+from utils.cache import query_cache
+from config.settings import DB_CONFIG, DB_POOL_NAME, DB_POOL_SIZE, DB_POOL_TIMEOUT, TRANSACTION_CODE_BLOCK, ADD_ON_PRICE
+
+_pool = None
+_pool_lock = threading.Lock()
+_stats_lock = threading.Lock()
+
+# Pool counters, read them through get_pool_stats()
+pool_stats = {
+    "checkouts": 0,   # Connections handed out
+    "reconnects": 0,  # Stale connections revived on checkout
+    "exhausted": 0,   # Checkouts that found every connection in use
+    "timeouts": 0,    # Checkouts that gave up after DB_POOL_TIMEOUT
+    "failures": 0,    # Checkouts that failed with a database error
+}
+
+def _record(counter):
+    with _stats_lock:
+        pool_stats[counter] += 1
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=DB_POOL_NAME,
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,
+                    **DB_CONFIG
+                )
+                print(f"Successfully connected to MariaDB (pool of {DB_POOL_SIZE})")
+    return _pool
+
+def get_pool_stats():
+    with _stats_lock:
+        stats = dict(pool_stats)
+    stats["pool_size"] = DB_POOL_SIZE
+    return stats
 
 def get_db_connection():
+    """Borrow a connection from the shared pool.
+
+    Calling close() on the returned connection hands it back to the pool.
+    Returns None when the database is unreachable or the pool stays
+    exhausted for longer than DB_POOL_TIMEOUT seconds.
+    """
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",
-            password="",
-            database="bigbrew_db"
-        )
-        if connection.is_connected():
-            print("Successfully connected to MariaDB")
-            return connection
+        pool = _get_pool()
     except Error as e:
+        _record("failures")
         print(f"Error connecting to MariaDB: {e}")
         return None
-    return None
 
-def init_db():
+    deadline = time.monotonic() + DB_POOL_TIMEOUT
+    waited = False
+    while True:
+        try:
+            connection = pool.get_connection()
+            break
+        except errors.PoolError:
+            if not waited:
+                _record("exhausted")
+                waited = True
+            if time.monotonic() >= deadline:
+                _record("timeouts")
+                print("Error connecting to MariaDB: connection pool exhausted")
+                return None
+            time.sleep(0.05)
+        except Error as e:
+            _record("failures")
+            print(f"Error connecting to MariaDB: {e}")
+            return None
+
+    # Health check: revive connections the server dropped while they sat idle
+    try:
+        if not connection.is_connected():
+            connection.reconnect(attempts=2, delay=0)
+            _record("reconnects")
+    except Error as e:
+        _record("failures")
+        print(f"Error reconnecting to MariaDB: {e}")
+        try:
+            connection.close()
+        except Error:
+            pass
+        return None
+
+    _record("checkouts")
+    return connection
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled connection for the duration of a with-block.
+
+    Yields None if no connection could be obtained.
+    """
     conn = get_db_connection()
-    if conn and conn.is_connected():
+    try:
+        yield conn
+    finally:
+        if conn is not None:
+            conn.close()
+
+@contextmanager
+def db_cursor(commit=False):
+    """Yield a cursor on a pooled connection.
+
+    With commit=True the work is committed when the block exits cleanly and
+    rolled back if it raises. Raises mysql.connector.Error when no connection
+    is available, so callers can handle it like any other query error.
+    """
+    with db_connection() as conn:
+        if conn is None:
+            raise Error("Unable to connect to the database.")
         cursor = conn.cursor()
-        
-        # Create products table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS products (
-                product_id VARCHAR(20) PRIMARY KEY,
-                name VARCHAR(100) NOT NULL,
-                type VARCHAR(50) NOT NULL,
-                price DECIMAL(10,2) NOT NULL,
-                availability ENUM('Available', 'Limited', 'Out of Stock') NOT NULL,  # Use ENUM for valid values
-                image_path VARCHAR(255),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create admin table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS admin (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                full_name VARCHAR(100) NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Create employees table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS employees (
-                id INT AUTO_INCREMENT PRIMARY KEY,
-                employee_id VARCHAR(20) UNIQUE NOT NULL,
-                first_name VARCHAR(100) NOT NULL,
-                last_name VARCHAR(100) NOT NULL,
-                email VARCHAR(100) UNIQUE NOT NULL,
-                password VARCHAR(255) NOT NULL,
-                role VARCHAR(20) NOT NULL,  # Ensure the role column exists
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Alter the table if the role column is missing
-        cursor.execute("""
-            ALTER TABLE employees
-            ADD COLUMN IF NOT EXISTS role VARCHAR(20) NOT NULL
-        """)
-
-        # Create default admin employee account if not exists
-        from utils.auth import hash_password
-        employee_id = "EMP0001"
-        first_name = "Admin"
-        last_name = "Emp"
-        email = "admin.emp@gmail.com"
-        password = hash_password("admin123")
-        role = "admin"
-        cursor.execute("SELECT * FROM employees WHERE employee_id = %s", (employee_id,))
-        if not cursor.fetchone():
-            cursor.execute("""
-                INSERT INTO employees (employee_id, first_name, last_name, email, password, role)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (employee_id, first_name, last_name, email, password, role))
-            conn.commit()
-            print("Default admin employee account created!")
-        else:
-            print("Default admin employee account already exists.")
+        try:
+            yield cursor
+            if commit:
+                conn.commit()
+        except Exception:
+            if commit:
+                conn.rollback()
+            raise
+        finally:
+            cursor.close()
 
-        # Create admin account if not exists
-        cursor.execute("SELECT * FROM admin WHERE username = 'BBADMIN'")
-        if not cursor.fetchone():
-            cursor.execute("""
-                INSERT INTO admin (username, full_name, password)
-                VALUES (%s, %s, %s)
-            """, ('BBADMIN', 'Big Brew Admin', hash_password('admin123')))
-
-        # Create orders table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS orders (
-                order_id INT AUTO_INCREMENT PRIMARY KEY,
-                product_name VARCHAR(100) NOT NULL,
-                size VARCHAR(20) NOT NULL,
-                add_ons VARCHAR(255),
-                quantity INT NOT NULL,
-                price DECIMAL(10,2) NOT NULL,
-                status VARCHAR(20) NOT NULL DEFAULT 'Pending',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Add transaction_id column to orders if not exists
-        cursor.execute('''
-            ALTER TABLE orders
-            ADD COLUMN IF NOT EXISTS transaction_id INT
-        ''')
-
-        # Create transactions table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS transactions (
-                transaction_id INT AUTO_INCREMENT PRIMARY KEY,
-                order_number INT NOT NULL,
-                order_code VARCHAR(20) NOT NULL,
-                payment_method VARCHAR(50) NOT NULL,
-                total_amount DECIMAL(10,2) NOT NULL,
-                status VARCHAR(20) NOT NULL DEFAULT 'Normal',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-
-        # Alter transactions table to add order_number and order_code columns if they don't exist
-        cursor.execute("""
-            ALTER TABLE transactions
-            ADD COLUMN IF NOT EXISTS order_number INT NOT NULL,
-            ADD COLUMN IF NOT EXISTS order_code VARCHAR(20) NOT NULL
-        """)
-
-        conn.commit()
-        cursor.close()
-        conn.close()
-        print("Database initialized successfully!")
-    else:
-        print("Failed to connect to database!")
+def init_db():
+    # Schema setup lives in config/migrations.py; this name is kept for older callers
+    from config.migrations import migrate
+    migrate()
 
 def create_employee_admin():
     from utils.auth import hash_password
@@ -166,116 +159,158 @@ def create_employee_admin():
         cursor.close()
         conn.close()
 
-def create_default_accounts():
-    from utils.auth import hash_password
-    conn = get_db_connection()
-    if conn and conn.is_connected():
-        cursor = conn.cursor()
-        # Create default admin employee account if not exists
-        employee_id = "EMP0001"
-        first_name = "Admin"
-        last_name = "Emp"
-        email = "admin.emp@gmail.com"
-        password = hash_password("admin123")
-        role = "admin"
-        cursor.execute("SELECT * FROM employees WHERE employee_id = %s", (employee_id,))
-        if not cursor.fetchone():
-            cursor.execute("""
-                INSERT INTO employees (employee_id, first_name, last_name, email, password, role)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """, (employee_id, first_name, last_name, email, password, role))
-            conn.commit()
-            print("Default admin employee account created!")
-        else:
-            print("Default admin employee account already exists.")
-        # Create admin account if not exists
-        cursor.execute("SELECT * FROM admin WHERE username = 'BBADMIN'")
-        if not cursor.fetchone():
-            cursor.execute("""
-                INSERT INTO admin (username, full_name, password)
-                VALUES (%s, %s, %s)
-            """, ('BBADMIN', 'Big Brew Admin', hash_password('admin123')))
-            conn.commit()
-            print("Default admin account created!")
-        else:
-            print("Default admin account already exists.")
-        cursor.close()
-        conn.close()
-
 # --- ORDER FUNCTIONS ---
-def insert_order(product_name, size, add_ons, quantity, price):
-    conn = get_db_connection()
-    if conn and conn.is_connected():
-        cursor = conn.cursor()
-        try:
-            # Insert into orders table only
-            cursor.execute(
-                """
-                INSERT INTO orders (product_name, size, add_ons, quantity, price, status)
-                VALUES (%s, %s, %s, %s, %s, 'Pending')
-                """,
-                (product_name, size, add_ons, quantity, price)
-            )
-            conn.commit()
-            return True
-        except Exception as e:
-            print(f"Error inserting order: {str(e)}")
-            return False
-        finally:
-            cursor.close()
-            conn.close()
-    return False
+# Pending orders belong to one register's cart, keyed by session_id (see
+# TERMINAL_ID in config/settings.py), so several tills can share the database.
 
-def fetch_pending_orders():
-    conn = get_db_connection()
-    if conn and conn.is_connected():
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT o.order_id, o.product_name, o.size, o.add_ons, o.quantity, o.price, o.status, o.created_at, p.image_path, p.type 
-            FROM orders o 
-            LEFT JOIN products p ON o.product_name = p.name 
-            WHERE o.status = 'Pending' 
-            ORDER BY o.created_at DESC
-        """)
-        orders = cursor.fetchall()
-        cursor.close()
-        conn.close()
-        return orders
-    return []
+# Counts the ", "-separated add-ons on an order line; each costs ADD_ON_PRICE
+_ADD_ON_COUNT_SQL = "IF(add_ons IS NULL OR add_ons = '', 0, (LENGTH(add_ons) - LENGTH(REPLACE(add_ons, ', ', ''))) DIV 2 + 1)"
 
-def get_next_transaction_code():
-    conn = get_db_connection()
-    cursor = None
-    try:
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM transactions")
-            count = cursor.fetchone()[0]
-            next_id = count + 1
-            return f"BBT{next_id:04d}"
-        return "BBT0001"
-    finally:
-        if cursor:
-            cursor.close()
-        if conn and conn.is_connected():
-            conn.close()
+# Totals of a register's pending lines, locked until the confirm commits
+PENDING_TOTALS_SQL = f"""
+    SELECT COUNT(*), MAX(order_id), COALESCE(SUM(quantity), 0), COALESCE(SUM(price), 0),
+           COALESCE(SUM({_ADD_ON_COUNT_SQL}), 0)
+    FROM orders
+    WHERE session_id = %s AND status = 'Pending'
+    FOR UPDATE
+"""
 
+def _confirm_session_orders(cursor, payment_method, session_id):
+    from config.rollup import apply_transaction  # config.rollup imports this module
 
-def clear_pending_orders():
-    conn = get_db_connection()
-    if conn and conn.is_connected():
-        cursor = conn.cursor()
-        try:
-            cursor.execute("DELETE FROM orders WHERE status = 'Pending'")
-            conn.commit()
-            return True
-        except Exception as e:
-            print(f"Error clearing pending orders: {str(e)}")
-            return False
-        finally:
-            cursor.close()
-            conn.close()
-    return False
+    # Lock the pending lines; a second register blocks here until we commit
+    cursor.execute(PENDING_TOTALS_SQL, (session_id,))
+    line_count, last_order_id, total_items, subtotal, add_on_count = cursor.fetchone()
+    if not line_count:
+        return None
+    grand_total = subtotal + add_on_count * ADD_ON_PRICE
+
+    order_code = allocate_transaction_code(cursor)
+    cursor.execute("""
+        INSERT INTO transactions (order_number, order_code, payment_method, total_amount, status)
+        VALUES (%s, %s, %s, %s, 'Normal')
+    """, (last_order_id, order_code, payment_method, grand_total))
+    transaction_id = cursor.lastrowid
+
+    cursor.execute("""
+        UPDATE orders
+        SET status = 'Confirmed', transaction_id = %s
+        WHERE session_id = %s AND status = 'Pending' AND order_id <= %s
+    """, (transaction_id, session_id, last_order_id))
+    if cursor.rowcount != line_count:
+        # Rolled back by db_cursor
+        raise Error("Pending orders changed while confirming, please try again.")
+
+    # Keep the dashboard/report totals in step with this transaction
+    apply_transaction(cursor, transaction_id)
+
+    return {
+        "transaction_id": transaction_id,
+        "order_code": order_code,
+        "total_items": int(total_items),
+        "subtotal": subtotal,
+        "grand_total": grand_total,
+    }
+
+def confirm_cart(cart, payment_method):
+    """Write an in-memory Cart (utils/cart.py) to orders and confirm it in one transaction.
+
+    The register's pending lines are locked, totalled and confirmed in a single
+    database transaction, so two registers can never confirm the same lines.
+    Returns a dict with transaction_id, order_code, total_items, subtotal and
+    grand_total, or None for an empty cart.
+    """
+    if not len(cart):
+        return None
+    # Top up this register's codes now, before the confirm below takes any locks
+    refill_code_block()
+    with db_cursor(commit=True) as cursor:
+        # Drop pending rows left over from before this cart, so exactly the
+        # lines on screen are confirmed
+        cursor.execute("DELETE FROM orders WHERE session_id = %s AND status = 'Pending'", (cart.session_id,))
+        cursor.executemany(
+            """
+            INSERT INTO orders (product_name, product_id, size, add_ons, quantity, price, status, session_id, created_at)
+            VALUES (%s, (SELECT product_id FROM products WHERE name = %s LIMIT 1), %s, %s, %s, %s, 'Pending', %s, %s)
+            """,
+            [
+                (line.product_name, line.product_name, line.size, line.add_ons, line.quantity, line.price,
+                 cart.session_id, line.created_at)
+                for line in cart.lines.values()
+            ]
+        )
+        return _confirm_session_orders(cursor, payment_method, cart.session_id)
+
+# --- TRANSACTION CODES ---
+# Codes come from the counters table (see migration 5). Each register reserves
+# TRANSACTION_CODE_BLOCK numbers at a time and hands them out locally, so
+# registers never collide and a deleted transaction never frees its code.
+# With a block of 1 the number is taken inside the confirm transaction itself,
+# so a failed confirm leaves no gap and no second connection is held.
+TRANSACTION_CODE_COUNTER = "transaction_code"
+_code_block = []  # Reserved, not yet used numbers for this register
+_code_block_lock = threading.Lock()
+
+def _format_transaction_code(number):
+    return f"BBT{number:04d}"
+
+def reserve_counter_block(cursor, name, count=1):
+    """Take the next `count` values of a counter in the cursor's transaction. Returns them as a list.
+
+    The counter row stays locked until the caller commits or rolls back.
+    """
+    # LAST_INSERT_ID(expr) hands the new value back to this connection only
+    cursor.execute(
+        "UPDATE counters SET value = LAST_INSERT_ID(value + %s) WHERE name = %s",
+        (count, name)
+    )
+    if cursor.rowcount != 1:
+        raise Error(f"Counter '{name}' is missing, run python -m config.migrations.")
+    cursor.execute("SELECT LAST_INSERT_ID()")
+    last = cursor.fetchone()[0]
+    return list(range(last - count + 1, last + 1))
+
+def refill_code_block():
+    """Reserve a new block of codes on its own connection when this register has run out.
+
+    Does nothing when TRANSACTION_CODE_BLOCK is 1; call it outside any other transaction.
+    """
+    if TRANSACTION_CODE_BLOCK <= 1:
+        return
+    with _code_block_lock:
+        if _code_block:
+            return
+        with db_cursor(commit=True) as cursor:
+            block = reserve_counter_block(cursor, TRANSACTION_CODE_COUNTER, TRANSACTION_CODE_BLOCK)
+        _code_block.extend(block)
+
+def allocate_transaction_code(cursor):
+    """Next code for a transaction being written on cursor.
+
+    Uses this register's reserved block if it has one, otherwise takes a
+    single number in the cursor's own transaction.
+    """
+    with _code_block_lock:
+        if _code_block:
+            return _format_transaction_code(_code_block.pop(0))
+    return _format_transaction_code(reserve_counter_block(cursor, TRANSACTION_CODE_COUNTER)[0])
+
+def get_next_transaction_code():
+    """The code the next confirmation on this register will most likely get.
+
+    Display only: nothing is reserved, so another register may take it first.
+    """
+    with _code_block_lock:
+        if _code_block:
+            return _format_transaction_code(_code_block[0])
+    try:
+        with db_cursor() as cursor:
+            cursor.execute("SELECT value FROM counters WHERE name = %s", (TRANSACTION_CODE_COUNTER,))
+            row = cursor.fetchone()
+            return _format_transaction_code((row[0] if row else 0) + 1)
+    except Error as e:
+        print(f"Error reading transaction code counter: {e}")
+        return _format_transaction_code(1)
 
 def get_employee_first_name(user_id):
     conn = get_db_connection()
@@ -289,6 +324,20 @@ def get_employee_first_name(user_id):
             return row[0]
     return user_id
 
+def _load_admin_full_name():
+    with db_cursor() as cursor:
+        cursor.execute("SELECT full_name FROM admin LIMIT 1")
+        row = cursor.fetchone()
+    return row[0] if row and row[0] else "Admin"
+
+def get_admin_full_name():
+    """The first admin's full name, read once and kept in the query cache."""
+    try:
+        return query_cache.get_or_load(("admin_full_name",), _load_admin_full_name, tags=("admin",), ttl=3600)
+    except Exception as e:
+        print(f"Error fetching admin name: {e}")
+        return "Admin"
+
 def get_employee_full_name(user_id):
     conn = get_db_connection()
     if conn and conn.is_connected():
@@ -308,6 +357,3 @@ def get_employee_full_name(user_id):
         if row:
             return row[0]
     return "Big Brew Admin"
-
-init_db()
-create_default_accounts()
\ No newline at end of file
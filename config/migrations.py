@@ -0,0 +1,352 @@
+import sys
+from mysql.connector import Error, errorcode
+from config.database import db_connection
+from utils.password import hash_password
+
+# Named lock so two processes starting at once don't run the same migration twice
+MIGRATION_LOCK = "bigbrew_migrate"
+MIGRATION_LOCK_TIMEOUT = 30
+
+def _baseline_schema(cursor):
+    # Create products table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS products (
+            product_id VARCHAR(20) PRIMARY KEY,
+            name VARCHAR(100) NOT NULL,
+            type VARCHAR(50) NOT NULL,
+            price DECIMAL(10,2) NOT NULL,
+            availability ENUM('Available', 'Limited', 'Out of Stock') NOT NULL,
+            image_path VARCHAR(255),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create admin table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS admin (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            username VARCHAR(50) UNIQUE NOT NULL,
+            full_name VARCHAR(100) NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create employees table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS employees (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            employee_id VARCHAR(20) UNIQUE NOT NULL,
+            first_name VARCHAR(100) NOT NULL,
+            last_name VARCHAR(100) NOT NULL,
+            email VARCHAR(100) UNIQUE NOT NULL,
+            password VARCHAR(255) NOT NULL,
+            role VARCHAR(20) NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create orders table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS orders (
+            order_id INT AUTO_INCREMENT PRIMARY KEY,
+            product_name VARCHAR(100) NOT NULL,
+            size VARCHAR(20) NOT NULL,
+            add_ons VARCHAR(255),
+            quantity INT NOT NULL,
+            price DECIMAL(10,2) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'Pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            transaction_id INT
+        )
+    """)
+
+    # Create transactions table
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transactions (
+            transaction_id INT AUTO_INCREMENT PRIMARY KEY,
+            order_number INT NOT NULL,
+            order_code VARCHAR(20) NOT NULL,
+            payment_method VARCHAR(50) NOT NULL,
+            total_amount DECIMAL(10,2) NOT NULL,
+            status VARCHAR(20) NOT NULL DEFAULT 'Normal',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Databases created before these columns existed still need them
+    cursor.execute("""
+        ALTER TABLE employees
+        ADD COLUMN IF NOT EXISTS role VARCHAR(20) NOT NULL
+    """)
+    cursor.execute("""
+        ALTER TABLE orders
+        ADD COLUMN IF NOT EXISTS transaction_id INT
+    """)
+    cursor.execute("""
+        ALTER TABLE transactions
+        ADD COLUMN IF NOT EXISTS order_number INT NOT NULL,
+        ADD COLUMN IF NOT EXISTS order_code VARCHAR(20) NOT NULL
+    """)
+
+def _default_accounts(cursor):
+    # Create default admin employee account if not exists
+    cursor.execute("SELECT 1 FROM employees WHERE employee_id = %s", ("EMP0001",))
+    if not cursor.fetchone():
+        cursor.execute("""
+            INSERT INTO employees (employee_id, first_name, last_name, email, password, role)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """, ("EMP0001", "Admin", "Emp", "admin.emp@gmail.com", hash_password("admin123"), "admin"))
+        print("Default admin employee account created!")
+
+    # Create admin account if not exists
+    cursor.execute("SELECT 1 FROM admin WHERE username = 'BBADMIN'")
+    if not cursor.fetchone():
+        cursor.execute("""
+            INSERT INTO admin (username, full_name, password)
+            VALUES (%s, %s, %s)
+        """, ('BBADMIN', 'Big Brew Admin', hash_password('admin123')))
+        print("Default admin account created!")
+
+def _order_indexes(cursor):
+    # Link order lines to products by key instead of joining on the name text
+    cursor.execute("""
+        ALTER TABLE orders
+        ADD COLUMN IF NOT EXISTS product_id VARCHAR(20) NULL AFTER product_name
+    """)
+    cursor.execute("""
+        UPDATE orders o
+        JOIN products p ON p.name = o.product_name
+        SET o.product_id = p.product_id
+        WHERE o.product_id IS NULL
+    """)
+    # Product IDs are rewritten when a product changes type, so cascade updates;
+    # deleting a product keeps its order history
+    cursor.execute("""
+        ALTER TABLE orders
+        ADD CONSTRAINT fk_orders_product
+        FOREIGN KEY IF NOT EXISTS (product_id) REFERENCES products (product_id)
+        ON UPDATE CASCADE ON DELETE SET NULL
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_status_created ON orders (status, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_created ON orders (created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_transaction ON orders (transaction_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_order_code ON transactions (order_code)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_products_name ON products (name)")
+
+def _sales_rollup(cursor):
+    # Written out in full rather than calling config/rollup.py, so this
+    # migration keeps doing what it did when it shipped
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS sales_rollup (
+            sale_date DATE NOT NULL,
+            sale_hour TINYINT NOT NULL,
+            product_name VARCHAR(100) NOT NULL,
+            product_type VARCHAR(50) NOT NULL DEFAULT '',
+            payment_method VARCHAR(50) NOT NULL,
+            quantity INT NOT NULL DEFAULT 0,
+            order_lines INT NOT NULL DEFAULT 0,
+            revenue DECIMAL(12,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (sale_date, sale_hour, product_name, product_type, payment_method),
+            INDEX idx_sales_rollup_type (product_type, sale_date)
+        )
+    """)
+    # Backfill from existing confirmed orders
+    cursor.execute("DELETE FROM sales_rollup")
+    cursor.execute("""
+        INSERT INTO sales_rollup
+            (sale_date, sale_hour, product_name, product_type, payment_method, quantity, order_lines, revenue)
+        SELECT DATE(o.created_at), HOUR(o.created_at), o.product_name, COALESCE(p.type, ''), t.payment_method,
+               SUM(o.quantity), COUNT(*), SUM(o.price)
+        FROM orders o
+        JOIN transactions t ON t.transaction_id = o.transaction_id
+        LEFT JOIN products p ON p.product_id = o.product_id
+        WHERE o.status = 'Confirmed'
+        GROUP BY DATE(o.created_at), HOUR(o.created_at), o.product_name, COALESCE(p.type, ''), t.payment_method
+    """)
+
+def _counters(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS counters (
+            name VARCHAR(50) PRIMARY KEY,
+            value BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    # Continue numbering after the highest BBT code already issued
+    cursor.execute("""
+        INSERT IGNORE INTO counters (name, value)
+        SELECT 'transaction_code', COALESCE(MAX(CAST(SUBSTRING(order_code, 4) AS UNSIGNED)), 0)
+        FROM transactions
+        WHERE order_code LIKE 'BBT%'
+    """)
+
+def _order_sessions(cursor):
+    # Pending orders are scoped to the register that rang them up
+    cursor.execute("""
+        ALTER TABLE orders
+        ADD COLUMN IF NOT EXISTS session_id VARCHAR(64) NOT NULL DEFAULT '' AFTER status
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_session_status ON orders (session_id, status, created_at)")
+
+def _image_renditions(cursor):
+    # Sized copies of each product image, see utils/media.py
+    cursor.execute("""
+        ALTER TABLE products
+        ADD COLUMN IF NOT EXISTS image_card_path VARCHAR(255) NULL AFTER image_path,
+        ADD COLUMN IF NOT EXISTS image_preview_path VARCHAR(255) NULL AFTER image_card_path
+    """)
+
+def _media_blobs(cursor):
+    # Reference counts for the content-addressed upload store, see utils/uploads.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS media_blobs (
+            path VARCHAR(255) PRIMARY KEY,
+            refcount INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        INSERT IGNORE INTO media_blobs (path, refcount)
+        SELECT image_path, COUNT(*) FROM products
+        WHERE image_path IS NOT NULL AND image_path != ''
+        GROUP BY image_path
+    """)
+
+def _receipts(cursor):
+    # Structured receipt archive, see utils/receipt_archive.py
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS receipts (
+            order_code VARCHAR(20) PRIMARY KEY,
+            transaction_id INT NULL,
+            created_at DATETIME NOT NULL,
+            body BLOB NOT NULL,
+            INDEX idx_receipts_created (created_at),
+            CONSTRAINT fk_receipts_transaction FOREIGN KEY (transaction_id)
+                REFERENCES transactions (transaction_id) ON DELETE CASCADE
+        )
+    """)
+
+def _transaction_search(cursor):
+    # Filters for the transactions search, see config/transactions.py
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_created ON transactions (created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_payment ON transactions (payment_method, transaction_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_total ON transactions (total_amount)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_orders_product_name ON orders (product_name, transaction_id)")
+    cursor.execute("CREATE FULLTEXT INDEX IF NOT EXISTS ft_orders_product_name ON orders (product_name)")
+
+def _transaction_voids(cursor):
+    # Voiding marks a transaction instead of deleting it; this records who and when
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS transaction_voids (
+            void_id INT AUTO_INCREMENT PRIMARY KEY,
+            transaction_id INT NOT NULL,
+            voided_by VARCHAR(64) NULL,
+            voided_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_transaction_voids_transaction (transaction_id),
+            CONSTRAINT fk_transaction_voids_transaction FOREIGN KEY (transaction_id)
+                REFERENCES transactions (transaction_id)
+        )
+    """)
+
+# Ordered schema history. Append new migrations at the end and never edit one
+# that has already shipped; each runs exactly once per database.
+MIGRATIONS = [
+    (1, "Baseline products/admin/employees/orders/transactions tables", _baseline_schema),
+    (2, "Default admin and employee accounts", _default_accounts),
+    (3, "orders.product_id foreign key and indexes for the hot order/transaction queries", _order_indexes),
+    (4, "sales_rollup summary table, backfilled from confirmed orders", _sales_rollup),
+    (5, "counters table for collision-free transaction codes", _counters),
+    (6, "orders.session_id so each register keeps its own cart", _order_sessions),
+    (7, "products image rendition paths (card, preview)", _image_renditions),
+    (8, "media_blobs reference counts for uploaded images", _media_blobs),
+    (9, "receipts archive keyed by order code", _receipts),
+    (10, "indexes for searching transactions by date, payment, amount and product", _transaction_search),
+    (11, "transaction_voids audit table for voided transactions", _transaction_voids),
+]
+
+HEAD_VERSION = MIGRATIONS[-1][0]
+
+def _current_version(cursor):
+    try:
+        cursor.execute("SELECT MAX(version) FROM schema_version")
+    except Error as e:
+        if e.errno == errorcode.ER_NO_SUCH_TABLE:
+            return 0
+        raise
+    row = cursor.fetchone()
+    return row[0] or 0
+
+def get_schema_version():
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        cursor = conn.cursor()
+        try:
+            return _current_version(cursor)
+        finally:
+            cursor.close()
+
+def is_at_head():
+    """One primary-key read: True when every migration has been applied."""
+    version = get_schema_version()
+    return version is not None and version >= HEAD_VERSION
+
+def migrate():
+    """Apply every pending migration in order. Returns the resulting version."""
+    with db_connection() as conn:
+        if conn is None:
+            print("Failed to connect to database!")
+            return None
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT GET_LOCK(%s, %s)", (MIGRATION_LOCK, MIGRATION_LOCK_TIMEOUT))
+            if cursor.fetchone()[0] != 1:
+                print("Another process is migrating the database, try again shortly.")
+                return None
+            try:
+                cursor.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INT PRIMARY KEY,
+                        description VARCHAR(255) NOT NULL,
+                        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )
+                """)
+                version = _current_version(cursor)
+                for target, description, apply in MIGRATIONS:
+                    if target <= version:
+                        continue
+                    print(f"Applying migration {target}: {description}")
+                    # DDL commits implicitly in MariaDB, so each migration is
+                    # recorded as soon as it finishes rather than all at once
+                    apply(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (%s, %s)",
+                        (target, description)
+                    )
+                    conn.commit()
+                    version = target
+                print(f"Database schema at version {version}.")
+                return version
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(%s)", (MIGRATION_LOCK,))
+                cursor.fetchone()
+        except Error as e:
+            conn.rollback()
+            print(f"Error migrating database: {e}")
+            return None
+        finally:
+            cursor.close()
+
+def ensure_schema():
+    """Startup hook: migrate only when the database is behind HEAD_VERSION."""
+    if is_at_head():
+        return True
+    return migrate() == HEAD_VERSION
+
+if __name__ == "__main__":
+    # python -m config.migrations [migrate|status]
+    command = sys.argv[1] if len(sys.argv) > 1 else "migrate"
+    if command == "status":
+        print(f"Database schema at version {get_schema_version()}, head is {HEAD_VERSION}.")
+    else:
+        migrate()
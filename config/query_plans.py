@@ -0,0 +1,81 @@
+import sys
+import datetime
+from config.database import db_connection, PENDING_TOTALS_SQL
+from config.rollup import (SALES_TOTALS_SQL, TYPE_QUANTITIES_SQL, TYPE_QUANTITIES_RANGE, TOP_PRODUCTS_SQL,
+                           products_ordered_series_query)
+from config.transactions import (transactions_page_query, TRANSACTION_LINES_SQL,
+                                 TRANSACTION_BY_CODE_SQL, TRANSACTION_ORDERS_SQL)
+from config.settings import TERMINAL_ID
+from utils.receipt_archive import RECEIPT_BY_CODE_SQL, RECEIPTS_BETWEEN_SQL
+
+# The queries the POS and admin views run most often, with representative
+# parameters. The SQL is imported from the modules that run it, so a change
+# there is checked here too; add new hot queries the same way.
+def _today_range():
+    start = datetime.datetime.combine(datetime.date.today(), datetime.time(0, 0, 0))
+    return start, start + datetime.timedelta(days=1)
+
+_today_start, _today_end = _today_range()
+
+HOT_QUERIES = {
+    "confirm_pending_totals": (PENDING_TOTALS_SQL, (TERMINAL_ID,)),
+    "fetch_transaction_by_code": (TRANSACTION_BY_CODE_SQL, ("BBT0001",)),
+    "fetch_transaction_orders": (TRANSACTION_ORDERS_SQL, (1,)),
+    "sales_totals_today": (SALES_TOTALS_SQL, _today_range()),
+    "type_quantities": (TYPE_QUANTITIES_SQL.format(where=""), ()),
+    "type_quantities_in_range": (TYPE_QUANTITIES_SQL.format(where=TYPE_QUANTITIES_RANGE), _today_range()),
+    "top_products": (TOP_PRODUCTS_SQL, (4,)),
+    "products_ordered_series": products_ordered_series_query(_today_start, _today_end, "hour"),
+    "transactions_page": transactions_page_query(),
+    "transactions_page_after": transactions_page_query(before_id=1000000),
+    "transaction_lines": (TRANSACTION_LINES_SQL, (1,)),
+    "search_transactions_by_code": transactions_page_query(filters={"code_prefix": "BBT00"}),
+    "search_transactions_by_date": transactions_page_query(filters={"start": _today_start, "end": _today_end}),
+    "search_transactions_by_payment": transactions_page_query(filters={"payment_method": "Cash"}),
+    "search_transactions_by_amount": transactions_page_query(filters={"min_amount": 100, "max_amount": 500}),
+    "search_transactions_by_product": transactions_page_query(filters={"product": "milk tea"}),
+    "receipt_by_code": (RECEIPT_BY_CODE_SQL, ("BBT0001",)),
+    "receipts_in_range": (RECEIPTS_BETWEEN_SQL, _today_range()),
+}
+
+# (query, table) scans that are expected, with the reason. These add up every
+# row of the rollup for all-time totals, so an index could only swap the table
+# scan for an index scan of the same length; the rollup has one row per hour,
+# product and payment method, not one per order line.
+FULL_SCAN_ALLOWED = {
+    ("type_quantities", "sales_rollup"): "all-time quantity per product type",
+    ("top_products", "sales_rollup"): "all-time best sellers",
+}
+
+def check_query_plans():
+    """EXPLAIN every hot query and return (query, table, plan row) for each full table scan.
+
+    Scans listed in FULL_SCAN_ALLOWED are not reported.
+
+    Run against a database with realistic row counts; on near-empty tables the
+    optimizer may prefer a scan even when a usable index exists.
+    """
+    full_scans = []
+    with db_connection() as conn:
+        if conn is None:
+            raise RuntimeError("Unable to connect to the database.")
+        cursor = conn.cursor(dictionary=True)
+        try:
+            for name, (sql, params) in HOT_QUERIES.items():
+                cursor.execute("EXPLAIN " + sql, params)
+                for row in cursor.fetchall():
+                    if row.get("type") == "ALL" and (name, row.get("table")) not in FULL_SCAN_ALLOWED:
+                        full_scans.append((name, row.get("table"), row))
+        finally:
+            cursor.close()
+    return full_scans
+
+if __name__ == "__main__":
+    # python -m config.query_plans  (exits non-zero if any hot query scans a whole table it shouldn't)
+    scans = check_query_plans()
+    for name, table, row in scans:
+        print(f"{name}: full scan of {table} (possible_keys={row.get('possible_keys')}, rows={row.get('rows')})")
+    if scans:
+        sys.exit(1)
+    print(f"All {len(HOT_QUERIES)} hot queries use an index, "
+          f"apart from {len(FULL_SCAN_ALLOWED)} expected scans of the sales rollup.")
@@ -0,0 +1,180 @@
+import sys
+import datetime
+from decimal import Decimal
+from config.database import db_cursor
+from utils.cache import cached
+
+# sales_rollup holds one row per (day, hour, product, type, payment method) so
+# the dashboard and reports read a handful of pre-summed rows instead of
+# scanning every confirmed order. Revenue is orders.price, which is already the
+# line total (quantity and add-ons included). The table is created by migration 4
+# in config/migrations.py.
+
+PROFIT_MARGIN = Decimal("0.4")  # Share of revenue reported as profit
+
+_ROLLUP_COLUMNS = """
+    INSERT INTO sales_rollup
+        (sale_date, sale_hour, product_name, product_type, payment_method, quantity, order_lines, revenue)
+"""
+
+_ROLLUP_SELECT = """
+    SELECT DATE(o.created_at), HOUR(o.created_at), o.product_name, COALESCE(p.type, ''), t.payment_method,
+           {sign} * SUM(o.quantity), {sign} * COUNT(*), {sign} * SUM(o.price)
+    FROM orders o
+    JOIN transactions t ON t.transaction_id = o.transaction_id
+    LEFT JOIN products p ON p.product_id = o.product_id
+    WHERE o.status = 'Confirmed' {where}
+    GROUP BY DATE(o.created_at), HOUR(o.created_at), o.product_name, COALESCE(p.type, ''), t.payment_method
+"""
+
+# Rollup rows one transaction's confirmed lines were counted in
+_TRANSACTION_KEYS = """
+    SELECT DISTINCT DATE(o.created_at) AS sale_date, HOUR(o.created_at) AS sale_hour, o.product_name,
+           COALESCE(p.type, '') AS product_type, t.payment_method
+    FROM orders o
+    JOIN transactions t ON t.transaction_id = o.transaction_id
+    LEFT JOIN products p ON p.product_id = o.product_id
+    WHERE o.status = 'Confirmed' AND o.transaction_id = %s
+"""
+
+def apply_transaction(cursor, transaction_id, sign=1):
+    """Add (sign=1) or remove (sign=-1) one transaction's confirmed lines.
+
+    Runs on the caller's cursor so it commits or rolls back with the caller.
+    """
+    sign = 1 if sign >= 0 else -1
+    cursor.execute(
+        _ROLLUP_COLUMNS
+        + _ROLLUP_SELECT.format(sign=sign, where="AND o.transaction_id = %s")
+        + """
+        ON DUPLICATE KEY UPDATE
+            quantity = quantity + VALUES(quantity),
+            order_lines = order_lines + VALUES(order_lines),
+            revenue = revenue + VALUES(revenue)
+        """,
+        (transaction_id,)
+    )
+    if sign < 0:
+        # Drop the rows this took to zero, looked up by primary key
+        cursor.execute(f"""
+            DELETE r FROM sales_rollup r
+            JOIN ({_TRANSACTION_KEYS}) k
+              ON r.sale_date = k.sale_date AND r.sale_hour = k.sale_hour AND r.product_name = k.product_name
+             AND r.product_type = k.product_type AND r.payment_method = k.payment_method
+            WHERE r.order_lines <= 0
+        """, (transaction_id,))
+
+def rebuild_rollup(cursor):
+    """Recompute the whole rollup from confirmed orders."""
+    cursor.execute("DELETE FROM sales_rollup")
+    cursor.execute(_ROLLUP_COLUMNS + _ROLLUP_SELECT.format(sign=1, where=""))
+    return cursor.rowcount
+
+SALES_TOTALS_SQL = """
+    SELECT COALESCE(SUM(revenue), 0), COALESCE(SUM(order_lines), 0)
+    FROM sales_rollup
+    WHERE sale_date >= %s AND sale_date < %s
+"""
+
+# {where} is empty, or TYPE_QUANTITIES_RANGE for a date range
+TYPE_QUANTITIES_SQL = """
+    SELECT product_type, SUM(quantity) AS total_quantity
+    FROM sales_rollup
+    {where}
+    GROUP BY product_type
+    ORDER BY total_quantity DESC
+"""
+TYPE_QUANTITIES_RANGE = "WHERE sale_date >= %s AND sale_date < %s"
+
+TOP_PRODUCTS_SQL = """
+    SELECT product_name, SUM(order_lines) AS orders_count
+    FROM sales_rollup
+    GROUP BY product_name
+    ORDER BY orders_count DESC
+    LIMIT %s
+"""
+
+# Start of the hour a rollup row covers
+_SALE_HOUR = "DATE_ADD(sale_date, INTERVAL sale_hour HOUR)"
+
+# Quantity ordered per hour/day/week since a start time. The sale_date bounds
+# keep it to a primary-key range; {bucket} is one of SERIES_BUCKETS.
+PRODUCTS_ORDERED_SERIES_SQL = f"""
+    SELECT {{bucket}} AS bucket, COALESCE(SUM(quantity), 0)
+    FROM sales_rollup
+    WHERE sale_date >= %s AND sale_date <= %s
+      AND {_SALE_HOUR} >= %s AND {_SALE_HOUR} < %s
+    GROUP BY bucket
+"""
+
+# Bucket sizes for get_products_ordered_series
+SERIES_STEPS = {
+    "hour": datetime.timedelta(hours=1),
+    "day": datetime.timedelta(days=1),
+    "week": datetime.timedelta(days=7),
+}
+
+SERIES_BUCKETS = {
+    "hour": f"TIMESTAMPDIFF(HOUR, %s, {_SALE_HOUR})",
+    "day": f"TIMESTAMPDIFF(DAY, %s, {_SALE_HOUR})",
+    "week": f"FLOOR(TIMESTAMPDIFF(DAY, %s, {_SALE_HOUR}) / 7)",
+}
+
+def products_ordered_series_query(start, end, granularity):
+    """(sql, params) for get_products_ordered_series."""
+    sql = PRODUCTS_ORDERED_SERIES_SQL.format(bucket=SERIES_BUCKETS[granularity])
+    return sql, (start, start.date(), end.date(), start, end)
+
+@cached("sales_totals", tags=("sales",))
+def fetch_sales_totals(start_date, end_date):
+    """(revenue, order_lines) for sale dates in [start_date, end_date)."""
+    with db_cursor() as cursor:
+        cursor.execute(SALES_TOTALS_SQL, (start_date, end_date))
+        revenue, order_lines = cursor.fetchone()
+        return revenue, int(order_lines)
+
+@cached("type_quantities", tags=("sales",))
+def fetch_type_quantities(start_date=None, end_date=None):
+    """[(type, quantity)] sorted by quantity, optionally limited to [start_date, end_date)."""
+    where = ""
+    params = ()
+    if start_date is not None:
+        where = TYPE_QUANTITIES_RANGE
+        params = (start_date, end_date)
+    with db_cursor() as cursor:
+        cursor.execute(TYPE_QUANTITIES_SQL.format(where=where), params)
+        return cursor.fetchall()
+
+@cached("top_products", tags=("sales",))
+def fetch_top_products(limit=4):
+    """[(product_name, order_lines)] for the best sellers of all time."""
+    with db_cursor() as cursor:
+        cursor.execute(TOP_PRODUCTS_SQL, (limit,))
+        return cursor.fetchall()
+
+@cached("products_ordered_series", tags=("sales",))
+def get_products_ordered_series(start, end, granularity):
+    """Quantity ordered per hour/day/week bucket in [start, end), zero-filled, in one query.
+
+    start and end should fall on the hour, the rollup's finest grain.
+    """
+    step = SERIES_STEPS[granularity]
+    bucket_count = -(-(end - start) // step)  # Round up so a partial last bucket is kept
+    results = [0] * bucket_count
+    with db_cursor() as cursor:
+        cursor.execute(*products_ordered_series_query(start, end, granularity))
+        for bucket, count in cursor.fetchall():
+            if 0 <= bucket < bucket_count:
+                results[int(bucket)] = int(count)
+    return results
+
+if __name__ == "__main__":
+    # python -m config.rollup rebuild
+    command = sys.argv[1] if len(sys.argv) > 1 else "rebuild"
+    if command == "rebuild":
+        with db_cursor(commit=True) as cursor:
+            rows = rebuild_rollup(cursor)
+        print(f"Rebuilt sales_rollup: {rows} rows.")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(2)
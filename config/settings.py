@@ -0,0 +1,51 @@
+import os
+import socket
+
+# Database connection settings, shared by every pooled connection
+DB_CONFIG = {
+    "host": os.environ.get("BIGBREW_DB_HOST", "localhost"),
+    "user": os.environ.get("BIGBREW_DB_USER", "root"),
+    "password": os.environ.get("BIGBREW_DB_PASSWORD", ""),
+    "database": os.environ.get("BIGBREW_DB_NAME", "bigbrew_db"),
+}
+
+# Connection pool sizing
+DB_POOL_NAME = "bigbrew_pool"
+DB_POOL_SIZE = int(os.environ.get("BIGBREW_DB_POOL_SIZE", "5"))  # mysql.connector allows at most 32
+DB_POOL_TIMEOUT = float(os.environ.get("BIGBREW_DB_POOL_TIMEOUT", "5"))  # Seconds to wait for a free connection
+
+# Query-result cache for the dashboard and reports (see utils/cache.py)
+QUERY_CACHE_TTL = float(os.environ.get("BIGBREW_QUERY_CACHE_TTL", "60"))  # Seconds before a result is re-read
+QUERY_CACHE_SIZE = int(os.environ.get("BIGBREW_QUERY_CACHE_SIZE", "256"))  # Entries kept before LRU eviction
+
+# Admin views kept alive between tab changes (see views/components/navigation.py)
+VIEW_CACHE_SIZE = int(os.environ.get("BIGBREW_VIEW_CACHE_SIZE", "4"))  # Least recently shown go first; 0 rebuilds on every change
+VIEW_REFRESH_AFTER = float(os.environ.get("BIGBREW_VIEW_REFRESH_AFTER", "60"))  # Seconds before a kept view re-reads its data
+
+# Transaction codes each register reserves per round-trip; unused ones are skipped on exit
+TRANSACTION_CODE_BLOCK = int(os.environ.get("BIGBREW_TXN_CODE_BLOCK", "1"))
+
+# Identifies this register; its pending orders (the cart) are kept under this key.
+# Give every till sharing one database its own value.
+TERMINAL_ID = os.environ.get("BIGBREW_TERMINAL_ID") or socket.gethostname()
+
+# Price of each add-on, charged on top of the order line price
+ADD_ON_PRICE = 9
+
+# Where each register journals its open cart so a crash doesn't lose it (see utils/cart.py)
+CART_JOURNAL_DIR = os.environ.get("BIGBREW_CART_JOURNAL_DIR", "carts")
+
+# Product image store (see utils/uploads.py)
+UPLOAD_DIR = os.environ.get("BIGBREW_UPLOAD_DIR", "uploads")
+UPLOAD_GC_GRACE = int(os.environ.get("BIGBREW_UPLOAD_GC_GRACE", "3600"))  # Seconds a new, unsaved upload is safe from gc
+UPLOAD_MAX_BYTES = int(os.environ.get("BIGBREW_UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))  # Largest image accepted
+
+# Saved receipt images and the background worker that writes them (see utils/receipt_worker.py)
+RECEIPT_DIR = os.environ.get("BIGBREW_RECEIPT_DIR", "receipts")
+RECEIPT_RETRIES = int(os.environ.get("BIGBREW_RECEIPT_RETRIES", "3"))  # Attempts per receipt before giving up
+RECEIPT_FONT = os.environ.get("BIGBREW_RECEIPT_FONT", "")  # TrueType file to print with; searched for when empty
+RECEIPT_BACKEND = os.environ.get("BIGBREW_RECEIPT_BACKEND", "png")  # png, mono (1-bit image), text or escpos
+RECEIPT_PRINTER = os.environ.get("BIGBREW_RECEIPT_PRINTER", "")  # e.g. /dev/usb/lp0; every receipt is also sent here as ESC/POS
+
+# Transactions loaded per page in the admin transactions view (see config/transactions.py)
+TRANSACTIONS_PAGE_SIZE = int(os.environ.get("BIGBREW_TRANSACTIONS_PAGE_SIZE", "24"))
@@ -0,0 +1,145 @@
+import re
+from config.database import db_cursor
+from config.rollup import apply_transaction
+from config.settings import TRANSACTIONS_PAGE_SIZE
+from utils.cache import invalidate
+
+# Reads behind the admin transactions view. Pages are keyset-paginated on the
+# primary key, so each page costs the same however many transactions exist, and
+# order lines are only read when a card is expanded. config/query_plans.py
+# EXPLAINs the statements defined here, so keep the SQL in these constants.
+
+# transactions.status / orders.status of a voided sale; live transactions are 'Normal'
+VOIDED = "Voided"
+
+# InnoDB's default innodb_ft_min_token_size; shorter words never reach the FULLTEXT index
+FULLTEXT_MIN_TOKEN = 3
+
+# Row: (transaction_id, order_code, total_amount, payment_method, created_at, items, status)
+_PAGE_SELECT = """
+    SELECT t.transaction_id, t.order_code, t.total_amount, t.payment_method, t.created_at,
+           (SELECT COALESCE(SUM(o.quantity), 0) FROM orders o WHERE o.transaction_id = t.transaction_id) AS items,
+           t.status
+    FROM transactions t
+"""
+
+def _like_prefix(text):
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+def _filter_clauses(filters):
+    """WHERE clauses and parameters for a search; every filter is optional.
+
+    filters keys: code_prefix, start (inclusive), end (exclusive), payment_method,
+    min_amount, max_amount and product (words matched against order lines).
+    """
+    clauses, params = [], []
+    if filters.get("code_prefix"):
+        clauses.append("t.order_code LIKE %s")  # idx_transactions_order_code
+        params.append(_like_prefix(filters["code_prefix"]))
+    if filters.get("start") is not None:
+        clauses.append("t.created_at >= %s")  # idx_transactions_created
+        params.append(filters["start"])
+    if filters.get("end") is not None:
+        clauses.append("t.created_at < %s")
+        params.append(filters["end"])
+    if filters.get("payment_method"):
+        clauses.append("t.payment_method = %s")  # idx_transactions_payment
+        params.append(filters["payment_method"])
+    if filters.get("min_amount") is not None:
+        clauses.append("t.total_amount >= %s")  # idx_transactions_total
+        params.append(filters["min_amount"])
+    if filters.get("max_amount") is not None:
+        clauses.append("t.total_amount <= %s")
+        params.append(filters["max_amount"])
+    if filters.get("product"):
+        words = [w for w in re.findall(r"\w+", filters["product"]) if len(w) >= FULLTEXT_MIN_TOKEN]
+        if words:
+            # Every word must start a word of the product name: "milk tea" -> +milk* +tea*
+            clauses.append("""t.transaction_id IN (
+                SELECT o.transaction_id FROM orders o
+                WHERE MATCH(o.product_name) AGAINST (%s IN BOOLEAN MODE))""")
+            params.append(" ".join(f"+{w}*" for w in words))
+        else:
+            # Too short for the FULLTEXT index; match the start of the name instead
+            clauses.append("t.transaction_id IN (SELECT o.transaction_id FROM orders o WHERE o.product_name LIKE %s)")
+            params.append(_like_prefix(filters["product"].strip()))
+    return clauses, params
+
+def transactions_page_query(before_id=None, limit=TRANSACTIONS_PAGE_SIZE, filters=None):
+    """(sql, params) for one page; limit + 1 rows are asked for to detect a next page."""
+    clauses, params = _filter_clauses(filters or {})
+    if before_id is not None:
+        clauses.append("t.transaction_id < %s")
+        params.append(before_id)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    return _PAGE_SELECT + where + " ORDER BY t.transaction_id DESC LIMIT %s", tuple(params) + (limit + 1,)
+
+def fetch_transactions_page(before_id=None, limit=TRANSACTIONS_PAGE_SIZE, filters=None):
+    """One page of transactions matching filters (see _filter_clauses), newest first.
+
+    Pass the next_cursor from the previous page as before_id to continue.
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    with db_cursor() as cursor:
+        cursor.execute(*transactions_page_query(before_id, limit, filters))
+        rows = cursor.fetchall()
+    # One extra row tells us whether there is another page without a COUNT(*)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1][0]
+    return rows, None
+
+TRANSACTION_LINES_SQL = """
+    SELECT product_name, size, add_ons, quantity, price
+    FROM orders
+    WHERE transaction_id = %s
+    ORDER BY order_id
+"""
+
+def fetch_transaction_lines(transaction_id):
+    """(product_name, size, add_ons, quantity, price) for each order in a transaction."""
+    with db_cursor() as cursor:
+        cursor.execute(TRANSACTION_LINES_SQL, (transaction_id,))
+        return cursor.fetchall()
+
+TRANSACTION_BY_CODE_SQL = "SELECT transaction_id, payment_method, total_amount FROM transactions WHERE order_code = %s"
+
+TRANSACTION_ORDERS_SQL = """
+    SELECT o.order_id, o.product_name, o.size, o.add_ons, o.quantity, o.price, o.status, o.created_at, p.image_path, p.type
+    FROM orders o
+    LEFT JOIN products p ON p.product_id = o.product_id
+    WHERE o.transaction_id = %s AND o.status = 'Confirmed'
+"""
+
+def fetch_transaction_and_orders(order_code):
+    """(transaction_id, payment_method, total_amount, confirmed order rows) for an order code."""
+    with db_cursor() as cursor:
+        cursor.execute(TRANSACTION_BY_CODE_SQL, (order_code,))
+        transaction = cursor.fetchone()
+        if not transaction:
+            return None, None, None, []
+        transaction_id, payment_method, total_amount = transaction
+        cursor.execute(TRANSACTION_ORDERS_SQL, (transaction_id,))
+        return transaction_id, payment_method, total_amount, cursor.fetchall()
+
+def void_transaction(transaction_id, voided_by=None):
+    """Void a transaction in place: it keeps its row, order code and lines.
+
+    The lines come out of sales_rollup, the transaction and its lines are
+    marked Voided and an audit row records who did it, all in one database
+    transaction. Returns False if it was already voided or doesn't exist.
+    """
+    with db_cursor(commit=True) as cursor:
+        cursor.execute("SELECT status FROM transactions WHERE transaction_id = %s FOR UPDATE", (transaction_id,))
+        row = cursor.fetchone()
+        if row is None or row[0] == VOIDED:
+            return False
+        # Subtract while the lines are still 'Confirmed', which is what the rollup counts
+        apply_transaction(cursor, transaction_id, sign=-1)
+        cursor.execute("UPDATE orders SET status = %s WHERE transaction_id = %s AND status = 'Confirmed'",
+                       (VOIDED, transaction_id))
+        cursor.execute("UPDATE transactions SET status = %s WHERE transaction_id = %s", (VOIDED, transaction_id))
+        cursor.execute("INSERT INTO transaction_voids (transaction_id, voided_by) VALUES (%s, %s)",
+                       (transaction_id, None if voided_by is None else str(voided_by)))
+    invalidate("sales")
+    return True
@@ -0,0 +1,119 @@
+import time
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from functools import wraps
+from config import settings
+
+class QueryCache:
+    """Size-bounded LRU cache of query results with a per-entry TTL.
+
+    Entries carry tags ("sales", "products", ...) so writers can drop every
+    result that depends on what they changed with invalidate(tag).
+    """
+
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value, tags)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._tag_versions = {}  # tag -> times it has been invalidated
+        self._clears = 0  # invalidate() with no tags
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader, tags=(), ttl=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            generation = self._generation
+
+        # Load outside the lock so a slow query doesn't block other readers
+        value = loader()
+
+        with self._lock:
+            # Skip storing if an invalidation ran while we were loading
+            if generation == self._generation:
+                expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+                self._entries[key] = (expires_at, value, frozenset(tags))
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def invalidate(self, *tags):
+        """Drop entries with any of the given tags, or everything if none are given."""
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+            if not tags:
+                self._clears += 1
+                self._entries.clear()
+                return
+            wanted = set(tags)
+            for tag in wanted:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+            for key in [k for k, entry in self._entries.items() if entry[2] & wanted]:
+                del self._entries[key]
+
+    def tag_version(self, *tags):
+        """Changes whenever any of tags is invalidated, so callers can tell their copy is stale."""
+        with self._lock:
+            return (self._clears,) + tuple(self._tag_versions.get(tag, 0) for tag in tags)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+# Shared by the dashboard and reports; writers invalidate it by tag
+query_cache = QueryCache(maxsize=settings.QUERY_CACHE_SIZE, ttl=settings.QUERY_CACHE_TTL)
+
+def cached(name, tags=(), ttl=None):
+    """Cache a query function's result in query_cache, keyed by name and arguments."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args):
+            return query_cache.get_or_load((name,) + args, lambda: func(*args), tags=tags, ttl=ttl)
+        return wrapper
+    return decorator
+
+def invalidate(*tags):
+    query_cache.invalidate(*tags)
+
+def tag_version(*tags):
+    return query_cache.tag_version(*tags)
+
+def get_cache_stats():
+    return query_cache.stats()
+
+def log_cache_stats():
+    """Log how well the shared cache served this process (INFO on the utils.cache logger)."""
+    stats = get_cache_stats()
+    logging.getLogger(__name__).info(
+        "Query cache: %d hits, %d misses (%.0f%%), %d entries, %d evicted, %d invalidated",
+        stats["hits"], stats["misses"], stats["hit_rate"] * 100, stats["size"],
+        stats["evictions"], stats["invalidations"]
+    )
+
+# Once per run, when the app closes, whichever view the session ended on
+atexit.register(log_cache_stats)
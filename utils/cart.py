@@ -0,0 +1,152 @@
+import os
+import json
+import datetime
+from decimal import Decimal
+from config.settings import ADD_ON_PRICE, CART_JOURNAL_DIR
+
+class CartLine:
+    __slots__ = ("line_id", "product_name", "size", "add_ons", "quantity", "price",
+                 "image_path", "product_type", "created_at")
+
+    def __init__(self, line_id, product_name, size, add_ons, quantity, price,
+                 image_path=None, product_type=None, created_at=None):
+        self.line_id = line_id
+        self.product_name = product_name
+        self.size = size
+        self.add_ons = add_ons or ""  # ", "-separated, as stored in orders.add_ons
+        self.quantity = int(quantity)
+        self.price = Decimal(str(price))  # Line total, as stored in orders.price
+        self.image_path = image_path
+        self.product_type = product_type
+        self.created_at = created_at or datetime.datetime.now()
+
+    @property
+    def add_on_count(self):
+        return len(self.add_ons.split(", ")) if self.add_ons else 0
+
+    def as_row(self):
+        """Same shape as a pending orders row joined to its product (order_id ... image_path, type)."""
+        return (self.line_id, self.product_name, self.size, self.add_ons, self.quantity, self.price,
+                "Pending", self.created_at, self.image_path, self.product_type)
+
+    def to_json(self):
+        return {
+            "line_id": self.line_id,
+            "product_name": self.product_name,
+            "size": self.size,
+            "add_ons": self.add_ons,
+            "quantity": self.quantity,
+            "price": str(self.price),
+            "image_path": self.image_path,
+            "product_type": self.product_type,
+            "created_at": self.created_at.isoformat(),
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        data = dict(data)
+        data["created_at"] = datetime.datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+class Cart:
+    """A register's open order, kept in memory with running totals.
+
+    Nothing touches the database until the order is confirmed. Every change is
+    written to a small JSON journal so a crash or restart doesn't lose the cart.
+    """
+
+    def __init__(self, session_id, journal_dir=CART_JOURNAL_DIR):
+        self.session_id = session_id
+        self.journal_path = os.path.join(journal_dir, f"cart_{session_id}.json") if journal_dir else None
+        self.lines = {}  # line_id -> CartLine, in insertion order
+        self.total_items = 0
+        self.subtotal = Decimal("0")
+        self.add_on_count = 0
+        self._next_id = 1
+        self._load_journal()
+
+    # --- Totals ---
+    def _count(self, line, sign):
+        self.total_items += sign * line.quantity
+        self.subtotal += sign * line.price
+        self.add_on_count += sign * line.add_on_count
+
+    @property
+    def grand_total(self):
+        return self.subtotal + self.add_on_count * ADD_ON_PRICE
+
+    def __len__(self):
+        return len(self.lines)
+
+    def rows(self):
+        """Lines newest first, as as_row() tuples."""
+        return [line.as_row() for line in reversed(list(self.lines.values()))]
+
+    # --- Changes ---
+    def add(self, product_name, size, add_ons, quantity, price, image_path=None, product_type=None):
+        line = CartLine(self._next_id, product_name, size, add_ons, quantity, price, image_path, product_type)
+        self._next_id += 1
+        self.lines[line.line_id] = line
+        self._count(line, 1)
+        self._write_journal()
+        return line
+
+    def update(self, line_id, size, add_ons, quantity, price):
+        line = self.lines[line_id]
+        self._count(line, -1)
+        line.size = size
+        line.add_ons = add_ons or ""
+        line.quantity = int(quantity)
+        line.price = Decimal(str(price))
+        self._count(line, 1)
+        self._write_journal()
+        return line
+
+    def remove(self, line_id):
+        line = self.lines.pop(line_id, None)
+        if line is not None:
+            self._count(line, -1)
+            self._write_journal()
+
+    def clear(self):
+        self.lines.clear()
+        self.total_items = 0
+        self.subtotal = Decimal("0")
+        self.add_on_count = 0
+        self._next_id = 1
+        if self.journal_path and os.path.exists(self.journal_path):
+            try:
+                os.remove(self.journal_path)
+            except OSError as e:
+                print(f"Error removing cart journal: {e}")
+
+    # --- Journal ---
+    def _write_journal(self):
+        if not self.journal_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.journal_path), exist_ok=True)
+            tmp_path = self.journal_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"next_id": self._next_id, "lines": [line.to_json() for line in self.lines.values()]}, f)
+            os.replace(tmp_path, self.journal_path)  # Atomic, so a crash leaves the old or new cart
+        except OSError as e:
+            print(f"Error writing cart journal: {e}")
+
+    def _load_journal(self):
+        if not self.journal_path or not os.path.exists(self.journal_path):
+            return
+        try:
+            with open(self.journal_path, encoding="utf-8") as f:
+                data = json.load(f)
+            for item in data.get("lines", []):
+                line = CartLine.from_json(item)
+                self.lines[line.line_id] = line
+                self._count(line, 1)
+            self._next_id = data.get("next_id", len(self.lines) + 1)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error reading cart journal, starting with an empty cart: {e}")
+            self.lines.clear()
+            self.total_items = 0
+            self.subtotal = Decimal("0")
+            self.add_on_count = 0
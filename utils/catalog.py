@@ -0,0 +1,147 @@
+import bisect
+import threading
+from config.database import db_cursor
+
+def _type_key(product_type):
+    return (product_type or "").strip().lower()
+
+class ProductCatalog:
+    """Process-wide copy of the products table, indexed by id, name and type.
+
+    Loaded from the database on first use. views/products.py patches it after
+    every add, edit and delete, and listeners hear about each change so open
+    views can update without re-querying. Edits made by another process are
+    picked up after invalidate().
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._by_id = {}    # product_id -> product dict
+        self._by_name = {}  # name -> product_id
+        self._by_type = {}  # lower-cased type -> sorted product_ids
+        self._listeners = []
+
+    # --- Loading ---
+    def load(self):
+        with db_cursor() as cursor:
+            cursor.execute("""
+                SELECT product_id, name, type, price, availability, image_path, image_card_path
+                FROM products
+                ORDER BY product_id
+            """)
+            rows = cursor.fetchall()
+        with self._lock:
+            self._by_id.clear()
+            self._by_name.clear()
+            self._by_type.clear()
+            for row in rows:
+                self._index(self._row_to_product(row))
+            self._loaded = True
+        self._notify("reload", None)
+
+    def _ensure_loaded(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load()
+
+    def invalidate(self):
+        """Forget everything; the next read reloads from the database."""
+        with self._lock:
+            self._loaded = False
+
+    @staticmethod
+    def _row_to_product(row):
+        product_id, name, product_type, price, availability, image_path, image_card_path = row
+        return {
+            "product_id": product_id,
+            "name": name,
+            "type": product_type,
+            "price": price,
+            "availability": availability,
+            "image_path": image_path,
+            "image_card_path": image_card_path,  # Small rendition for product cards
+        }
+
+    def _index(self, product):
+        self._by_id[product["product_id"]] = product
+        self._by_name[product["name"]] = product["product_id"]
+        bisect.insort(self._by_type.setdefault(_type_key(product["type"]), []), product["product_id"])
+
+    def _unindex(self, product_id):
+        product = self._by_id.pop(product_id, None)
+        if product is None:
+            return None
+        if self._by_name.get(product["name"]) == product_id:
+            del self._by_name[product["name"]]
+        ids = self._by_type.get(_type_key(product["type"]), [])
+        if product_id in ids:
+            ids.remove(product_id)
+        return product
+
+    # --- Reads ---
+    def by_type(self, product_type):
+        """Products of one type, ordered by product_id."""
+        self._ensure_loaded()
+        with self._lock:
+            return [self._by_id[pid] for pid in self._by_type.get(_type_key(product_type), [])]
+
+    def all_products(self):
+        """Every product, ordered by product_id."""
+        self._ensure_loaded()
+        with self._lock:
+            return [self._by_id[pid] for pid in sorted(self._by_id)]
+
+    def by_name(self, name):
+        self._ensure_loaded()
+        with self._lock:
+            product_id = self._by_name.get(name)
+            return self._by_id.get(product_id) if product_id else None
+
+    def type_counts(self):
+        """{type: number of products}, using the type spelling stored on the products."""
+        self._ensure_loaded()
+        with self._lock:
+            counts = {}
+            for product in self._by_id.values():
+                counts[product["type"]] = counts.get(product["type"], 0) + 1
+            return counts
+
+    # --- Patches from views/products.py ---
+    def upsert(self, product_id, name, product_type, price, availability, image_path,
+               image_card_path=None, old_product_id=None):
+        """Add or replace one product. Pass old_product_id when the id itself changed."""
+        self._ensure_loaded()
+        product = self._row_to_product((product_id, name, product_type, price, availability, image_path, image_card_path))
+        with self._lock:
+            self._unindex(old_product_id or product_id)
+            self._index(product)
+        self._notify("upsert", product, old_product_id)
+
+    def remove(self, product_id):
+        self._ensure_loaded()
+        with self._lock:
+            product = self._unindex(product_id)
+        if product is not None:
+            self._notify("remove", product)
+
+    # --- Change notifications ---
+    def add_listener(self, listener):
+        """listener(action, product, old_product_id=None); action is "upsert", "remove" or "reload"."""
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, action, product, old_product_id=None):
+        for listener in list(self._listeners):
+            try:
+                listener(action, product, old_product_id)
+            except Exception as e:
+                print(f"Error notifying catalog listener: {e}")
+
+# Shared by every view in this process
+catalog = ProductCatalog()
@@ -0,0 +1,92 @@
+import os
+import sys
+
+# Sized copies of every product image. Sizes are twice the on-screen box so
+# they stay sharp on high-DPI displays.
+#   name: (max width, max height, format, extension)
+RENDITIONS = {
+    "card": (180, 240, "WEBP", "webp"),     # 90x120 product cards in the order grid
+    "preview": (200, 200, "WEBP", "webp"),  # 100x100 previews in the product dialogs
+}
+
+# products column that records each rendition's path
+RENDITION_COLUMNS = {
+    "card": "image_card_path",
+    "preview": "image_preview_path",
+}
+
+def rendition_path(original_path, name):
+    """Where a rendition of original_path is stored: next to it, e.g. uploads/x.card.webp."""
+    stem = os.path.splitext(original_path)[0]
+    return f"{stem}.{name}.{RENDITIONS[name][3]}"
+
+def make_renditions(original_path, force=False):
+    """Decode original_path once and write every missing rendition next to it.
+
+    Returns {name: path}. Existing renditions are reused unless force is set.
+    """
+    paths = {name: rendition_path(original_path, name) for name in RENDITIONS}
+    missing = [name for name, path in paths.items() if force or not os.path.exists(path)]
+    if not missing:
+        return paths
+
+    from PIL import Image  # Only needed when there is something to decode
+
+    with Image.open(original_path) as source:
+        source.load()
+        image = source.convert("RGBA")
+    for name in missing:
+        width, height, fmt, _ = RENDITIONS[name]
+        rendition = image.copy()
+        rendition.thumbnail((width, height), Image.LANCZOS)
+        tmp_path = paths[name] + ".tmp"
+        if fmt == "WEBP":
+            rendition.save(tmp_path, fmt, quality=80, method=6)
+        else:
+            rendition.save(tmp_path, fmt, optimize=True)
+        os.replace(tmp_path, paths[name])
+    return paths
+
+def rendition_columns(renditions):
+    """A make_renditions() result as paths in RENDITION_COLUMNS order."""
+    return tuple(renditions[name] for name in RENDITION_COLUMNS)
+
+def rendition_values(original_path):
+    """Rendition paths in RENDITION_COLUMNS order, or Nones if the image can't be read."""
+    try:
+        paths = make_renditions(original_path)
+    except (OSError, ValueError) as e:
+        print(f"Error creating image renditions for {original_path}: {e}")
+        return tuple(None for _ in RENDITION_COLUMNS)
+    return rendition_columns(paths)
+
+def backfill_renditions():
+    """Create and record renditions for products that don't have them yet."""
+    from config.database import db_cursor
+
+    with db_cursor() as cursor:
+        cursor.execute("SELECT product_id, image_path FROM products WHERE image_path IS NOT NULL AND image_card_path IS NULL")
+        pending = cursor.fetchall()
+    done = 0
+    for product_id, image_path in pending:
+        if not os.path.exists(image_path):
+            print(f"Skipping {product_id}: {image_path} not found")
+            continue
+        values = rendition_values(image_path)
+        if values[0] is None:
+            continue
+        assignments = ", ".join(f"{column} = %s" for column in RENDITION_COLUMNS.values())
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(f"UPDATE products SET {assignments} WHERE product_id = %s", values + (product_id,))
+        done += 1
+    return done, len(pending)
+
+if __name__ == "__main__":
+    # python -m utils.media renditions
+    command = sys.argv[1] if len(sys.argv) > 1 else "renditions"
+    if command == "renditions":
+        done, total = backfill_renditions()
+        print(f"Created renditions for {done} of {total} products.")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(2)
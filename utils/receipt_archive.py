@@ -0,0 +1,80 @@
+import sys
+import json
+import zlib
+import datetime
+from config.database import db_cursor
+from utils.receipts import Receipt, save_receipt
+
+# Every confirmed order's receipt is kept as zlib-compressed JSON in the
+# receipts table, keyed by order_code and indexed by date. Images and printer
+# output are drawn from it when needed (see utils/receipts.py), so a re-print is
+# one primary-key read and a receipt takes a few hundred bytes instead of a PNG.
+
+def pack(receipt):
+    return zlib.compress(json.dumps(receipt.to_json(), separators=(",", ":")).encode("utf-8"), 9)
+
+def unpack(body):
+    return Receipt.from_json(json.loads(zlib.decompress(body).decode("utf-8")))
+
+def archive_receipt(receipt):
+    """Store or replace the receipt for receipt.order_code."""
+    with db_cursor(commit=True) as cursor:
+        cursor.execute("""
+            INSERT INTO receipts (order_code, transaction_id, created_at, body)
+            VALUES (%s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE transaction_id = VALUES(transaction_id),
+                                    created_at = VALUES(created_at),
+                                    body = VALUES(body)
+        """, (receipt.order_code, receipt.transaction_id, receipt.created_at, pack(receipt)))
+
+RECEIPT_BY_CODE_SQL = "SELECT body FROM receipts WHERE order_code = %s"
+
+RECEIPTS_BETWEEN_SQL = """
+    SELECT body FROM receipts
+    WHERE created_at >= %s AND created_at < %s
+    ORDER BY created_at
+"""
+
+def load_receipt(order_code):
+    """The archived Receipt for order_code, or None."""
+    with db_cursor() as cursor:
+        cursor.execute(RECEIPT_BY_CODE_SQL, (order_code,))
+        row = cursor.fetchone()
+    return unpack(row[0]) if row else None
+
+def receipts_between(start, end):
+    """Archived receipts created in [start, end), oldest first."""
+    with db_cursor() as cursor:
+        cursor.execute(RECEIPTS_BETWEEN_SQL, (start, end))
+        return [unpack(row[0]) for row in cursor.fetchall()]
+
+def archive_stats():
+    """(receipts, bytes stored)"""
+    with db_cursor() as cursor:
+        cursor.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM receipts")
+        count, size = cursor.fetchone()
+    return count, int(size)
+
+if __name__ == "__main__":
+    # python -m utils.receipt_archive [stats|show <order_code>|export <YYYY-MM-DD> [backend]]
+    from config.settings import RECEIPT_BACKEND
+    from utils.receipts import render_text
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    if command == "stats":
+        count, size = archive_stats()
+        average = size / count if count else 0
+        print(f"{count} receipts, {size / 1024:.1f} KB ({average:.0f} bytes each).")
+    elif command == "show" and len(sys.argv) > 2:
+        receipt = load_receipt(sys.argv[2])
+        print(render_text(receipt) if receipt else f"No receipt for {sys.argv[2]}.")
+    elif command == "export" and len(sys.argv) > 2:
+        day = datetime.date.fromisoformat(sys.argv[2])
+        receipts = receipts_between(day, day + datetime.timedelta(days=1))
+        backend = sys.argv[3] if len(sys.argv) > 3 else RECEIPT_BACKEND
+        for receipt in receipts:
+            save_receipt(receipt, backend, printer=None)
+        print(f"Exported {len(receipts)} receipts from {day}.")
+    else:
+        print(f"Unknown command: {' '.join(sys.argv[1:])}")
+        sys.exit(2)
@@ -0,0 +1,113 @@
+import time
+import queue
+import atexit
+import threading
+from config.settings import RECEIPT_RETRIES
+
+class ReceiptJob:
+    """One receipt to save, captured when the order is confirmed.
+
+    The worker never goes back to the database or the order window's globals, so
+    the cashier can start the next order while this one is still rendering.
+    """
+    __slots__ = ("receipt", "archive", "save", "on_done", "on_error", "attempts")
+
+    def __init__(self, receipt, archive=True, save=False, on_done=None, on_error=None):
+        self.receipt = receipt      # utils.receipts.Receipt
+        self.archive = archive      # Store it in the receipts table
+        self.save = save            # Write a file with the configured backend (and print it)
+        self.on_done = on_done      # on_done(job, filename or None)
+        self.on_error = on_error    # on_error(job, exception), after the last attempt
+        self.attempts = 0
+
+    @property
+    def order_code(self):
+        return self.receipt.order_code
+
+def process_job(job):
+    from utils.receipt_archive import archive_receipt
+    from utils.receipts import save_receipt
+
+    if job.archive:
+        archive_receipt(job.receipt)  # Replaces the row, so a retry is harmless
+    if job.save:
+        filename = save_receipt(job.receipt)
+        print(f"Receipt saved successfully as: {filename}")
+        return filename
+    return None
+
+class ReceiptWorker:
+    """Archives, renders and saves queued receipts one at a time on a background thread.
+
+    A failed job is retried up to RECEIPT_RETRIES times with a growing pause,
+    then handed to its on_error callback. Callbacks run on the worker thread.
+    """
+
+    def __init__(self, handle=process_job, retries=RECEIPT_RETRIES, backoff=1.0):
+        self.handle = handle
+        self.retries = max(1, retries)
+        self.backoff = backoff
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+
+    def submit(self, job):
+        self._ensure_started()
+        self._queue.put(job)
+        return job
+
+    def pending(self):
+        return self._queue.unfinished_tasks
+
+    def drain(self, timeout=None):
+        """Wait until every queued receipt is written (or has failed). Returns True if none are left."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: self._queue.unfinished_tasks == 0, timeout)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="receipt-worker", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                self._process(job)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job):
+        while True:
+            job.attempts += 1
+            try:
+                filename = self.handle(job)
+            except Exception as e:
+                print(f"Error saving receipt {job.order_code} (attempt {job.attempts} of {self.retries}): {e}")
+                if job.attempts < self.retries:
+                    time.sleep(self.backoff * job.attempts)
+                    continue
+                self.failed += 1
+                self._callback(job.on_error, job, e)
+                return
+            self.completed += 1
+            self._callback(job.on_done, job, filename)
+            return
+
+    @staticmethod
+    def _callback(callback, job, value):
+        if callback is None:
+            return
+        try:
+            callback(job, value)
+        except Exception as e:
+            print(f"Error reporting receipt {job.order_code}: {e}")
+
+# Shared by every order window in this process
+receipt_worker = ReceiptWorker()
+
+# Give receipts still in the queue a chance to reach disk when the app closes
+atexit.register(receipt_worker.drain, 10)
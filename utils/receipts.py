@@ -0,0 +1,416 @@
+import io
+import os
+import sys
+import time
+import datetime
+import threading
+from config.settings import ADD_ON_PRICE, RECEIPT_BACKEND, RECEIPT_DIR, RECEIPT_FONT, RECEIPT_PRINTER
+
+STORE_NAME = "BIGBREW"
+STORE_DETAILS = ["San Jose, Jaro, Iloilo City", "5000 Iloilo, Iloilo City", "0919 718 9473"]
+
+class Receipt:
+    """What a receipt says, independent of how it's drawn or printed.
+
+    Every backend below renders from this, so the PNG, the 1-bit image and the
+    printer stream always agree.
+    """
+    __slots__ = ("order_code", "transaction_id", "created_at", "items", "paid_amount", "change_amount",
+                 "grand_total", "payment_method", "cashier_name")
+
+    def __init__(self, order_code, transaction_id, created_at, items, paid_amount, change_amount,
+                 grand_total, payment_method, cashier_name):
+        self.order_code = order_code
+        self.transaction_id = transaction_id
+        self.created_at = created_at
+        self.items = items  # [(product_name, size, quantity, line_total, [add-on names])]
+        self.paid_amount = float(paid_amount)
+        self.change_amount = float(change_amount)
+        self.grand_total = float(grand_total)
+        self.payment_method = payment_method or "Cash"
+        self.cashier_name = cashier_name
+
+    @classmethod
+    def from_orders(cls, orders, order_code, transaction_id, paid_amount, change_amount, grand_total,
+                    payment_method, cashier_name, created_at=None):
+        """Build from confirmed order rows (fetch_transaction_and_orders row format)."""
+        items = [(order[1], order[2], int(order[4]), float(order[5]), order[3].split(", ") if order[3] else [])
+                 for order in orders]
+        return cls(order_code, transaction_id, created_at or datetime.datetime.now(), items,
+                   paid_amount, change_amount, grand_total, payment_method, cashier_name)
+
+    def to_json(self):
+        return {
+            "order_code": self.order_code,
+            "transaction_id": self.transaction_id,
+            "created_at": self.created_at.isoformat(timespec="seconds"),
+            "items": [list(item) for item in self.items],
+            "paid_amount": self.paid_amount,
+            "change_amount": self.change_amount,
+            "grand_total": self.grand_total,
+            "payment_method": self.payment_method,
+            "cashier_name": self.cashier_name,
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        data = dict(data)
+        data["created_at"] = datetime.datetime.fromisoformat(data["created_at"])
+        data["items"] = [tuple(item) for item in data["items"]]
+        return cls(**data)
+
+    @property
+    def date_str(self):
+        return self.created_at.strftime('%d-%m-%Y')
+
+    @property
+    def time_str(self):
+        return self.created_at.strftime('%I:%M %p')
+
+    @property
+    def subtotal(self):
+        return sum(price + len(add_ons) * ADD_ON_PRICE for _, _, _, price, add_ons in self.items)
+
+RECEIPT_WIDTH = 400
+MARGIN = 20
+LINE_HEIGHT = 20
+SECTION_SPACING = 10
+LOGO_PATH = "assets/logos/bigbrew_logo_black.png"
+LOGO_WIDTH = 70
+LOGO_HEIGHT = 50
+
+# Tried in order; the first one that loads is used for every size.
+# arial.ttf is found on Windows, the others on most Linux installs.
+FONT_CANDIDATES = ["arial.ttf", "DejaVuSans.ttf", "LiberationSans-Regular.ttf",
+                   "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"]
+FONT_SIZES = {"title": 20, "header": 16, "normal": 12}
+
+class ReceiptRenderer:
+    """Draws receipt images, loading the logo and fonts once and keeping them.
+
+    Opening and resizing the logo and looking up fonts used to happen on every
+    receipt. Now the first render loads them and later renders reuse them. When
+    no TrueType font is found, Pillow's bundled scalable font is used, and the
+    fixed-size bitmap font on Pillow versions that don't include one.
+    """
+
+    def __init__(self, logo_path=LOGO_PATH, font_paths=None):
+        self.logo_path = logo_path
+        self.font_paths = font_paths if font_paths is not None else ([RECEIPT_FONT] if RECEIPT_FONT else []) + FONT_CANDIDATES
+        self.font_path = None  # Font file in use, or None for Pillow's bundled font
+        self._fonts = None
+        self._logo = None
+        self._logo_mask = None
+        self._lock = threading.Lock()
+
+    # --- Assets, loaded on first use ---
+    def _load(self):
+        # Pillow is imported here, on the first render, so importing this module stays cheap
+        with self._lock:
+            if self._fonts is not None:
+                return
+            self._logo, self._logo_mask = self._load_logo()
+            self.font_path = self._find_font()
+            self._fonts = {name: self._load_font(size) for name, size in FONT_SIZES.items()}
+
+    def _load_logo(self):
+        from PIL import Image
+
+        try:
+            with Image.open(self.logo_path) as source:
+                logo = source.convert("RGBA").resize((LOGO_WIDTH, LOGO_HEIGHT), Image.LANCZOS)
+        except OSError as e:
+            print(f"Logo error: {e}")
+            return None, None
+        # Pre-split so each paste is a plain blit onto the RGB receipt
+        return logo.convert("RGB"), logo.getchannel("A")
+
+    def _find_font(self):
+        from PIL import ImageFont
+
+        for path in self.font_paths:
+            try:
+                ImageFont.truetype(path, FONT_SIZES["normal"])
+            except OSError:
+                continue
+            return path
+        return None
+
+    def _load_font(self, size):
+        from PIL import ImageFont
+
+        if self.font_path:
+            return ImageFont.truetype(self.font_path, size)
+        try:
+            return ImageFont.load_default(size=size)  # Pillow 10.1+ bundles a scalable font
+        except TypeError:
+            return ImageFont.load_default()
+
+    def fonts(self):
+        self._load()
+        return self._fonts["title"], self._fonts["header"], self._fonts["normal"]
+
+    # --- Drawing ---
+    def render(self, receipt):
+        from PIL import Image, ImageDraw
+
+        title_font, header_font, normal_font = self.fonts()
+        # Calculate total height needed dynamically
+        header_height = 150
+        order_info_height = 40
+        items_height = len(receipt.items) * LINE_HEIGHT
+        add_ons_height = sum(len(item[4]) for item in receipt.items) * LINE_HEIGHT
+        summary_height = 150
+        footer_lines = 4
+        footer_height = footer_lines * LINE_HEIGHT
+        section_count = 6
+        total_height = header_height + order_info_height + items_height + add_ons_height + summary_height + footer_height + (SECTION_SPACING * section_count)
+        img = Image.new('RGB', (RECEIPT_WIDTH, total_height), 'white')
+        draw = ImageDraw.Draw(img)
+        y = MARGIN
+        if self._logo is not None:
+            img.paste(self._logo, ((RECEIPT_WIDTH - LOGO_WIDTH) // 2, y), self._logo_mask)
+            y += LOGO_HEIGHT + 10
+        draw.text((RECEIPT_WIDTH//2, y), STORE_NAME, font=title_font, fill='black', anchor="mm")
+        y += 30
+        for detail in STORE_DETAILS:
+            draw.text((RECEIPT_WIDTH//2, y), detail, font=normal_font, fill='black', anchor="mm")
+            y += 20
+        y += 10
+        draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
+        y += SECTION_SPACING
+        draw.text((MARGIN, y), f"{receipt.date_str}\nTime: {receipt.time_str}", font=normal_font, fill='black')
+        draw.text((RECEIPT_WIDTH - MARGIN, y), f"Order Number: {receipt.transaction_id}\nOrder Code: {receipt.order_code}", font=normal_font, fill='black', anchor="ra")
+        y += 40
+        draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
+        y += SECTION_SPACING
+        draw.text((MARGIN, y), "Name", font=header_font, fill='black')
+        draw.text((RECEIPT_WIDTH - MARGIN, y), "Price", font=header_font, fill='black', anchor="ra")
+        y += LINE_HEIGHT
+        for name, size, quantity, price, add_ons in receipt.items:
+            draw.text((MARGIN, y), f"{name} ({size}) x{quantity}", font=normal_font, fill='black')
+            draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{price:.2f}", font=normal_font, fill='black', anchor="ra")
+            y += LINE_HEIGHT
+            for add_on in add_ons:
+                draw.text((MARGIN + 10, y), f"+ {add_on}", font=normal_font, fill='black')
+                draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{ADD_ON_PRICE:.2f}", font=normal_font, fill='black', anchor="ra")
+                y += LINE_HEIGHT
+        draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
+        y += SECTION_SPACING
+        for label, amount in [("Subtotal:", receipt.subtotal), ("Payment Amount:", receipt.paid_amount), ("Change:", receipt.change_amount)]:
+            draw.text((MARGIN, y), label, font=normal_font, fill='black')
+            draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{amount:.2f}", font=normal_font, fill='black', anchor="ra")
+            y += LINE_HEIGHT
+        draw.text((MARGIN, y), "Total:", font=header_font, fill='black')
+        draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{receipt.grand_total:.2f}", font=header_font, fill='black', anchor="ra")
+        y += LINE_HEIGHT
+        draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
+        y += SECTION_SPACING
+        draw.text((MARGIN, y), "Payment Method:", font=header_font, fill='black')
+        draw.text((RECEIPT_WIDTH - MARGIN, y), receipt.payment_method, font=normal_font, fill='black', anchor="ra")
+        y += LINE_HEIGHT
+        draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
+        y += SECTION_SPACING
+        draw.text((RECEIPT_WIDTH//2, y), "Thank You!", font=header_font, fill='black', anchor="mm")
+        y += LINE_HEIGHT
+        for line in [receipt.cashier_name, "Cashier", "Please come again!"]:
+            draw.text((RECEIPT_WIDTH//2, y), line, font=normal_font, fill='black', anchor="mm")
+            y += LINE_HEIGHT
+        return img
+
+# Shared by the receipt worker for the life of the process
+renderer = ReceiptRenderer()
+
+# --- Text layout, shared by the plain-text and ESC/POS backends ---
+TEXT_WIDTH = 42  # Characters per line in Font A on an 80 mm printer
+
+def text_layout(receipt, currency="₱"):
+    """Receipt as (style, left, right) lines; style is "title", "center", "row", "bold" or "rule"."""
+    def money(amount):
+        return f"{currency}{amount:.2f}"
+
+    lines = [("title", STORE_NAME, "")]
+    lines += [("center", detail, "") for detail in STORE_DETAILS]
+    lines += [
+        ("rule", "", ""),
+        ("row", receipt.date_str, f"Order Number: {receipt.transaction_id}"),
+        ("row", f"Time: {receipt.time_str}", f"Order Code: {receipt.order_code}"),
+        ("rule", "", ""),
+        ("bold", "Name", "Price"),
+    ]
+    for name, size, quantity, price, add_ons in receipt.items:
+        lines.append(("row", f"{name} ({size}) x{quantity}", money(price)))
+        lines += [("row", f"  + {add_on}", money(ADD_ON_PRICE)) for add_on in add_ons]
+    lines += [
+        ("rule", "", ""),
+        ("row", "Subtotal:", money(receipt.subtotal)),
+        ("row", "Payment Amount:", money(receipt.paid_amount)),
+        ("row", "Change:", money(receipt.change_amount)),
+        ("bold", "Total:", money(receipt.grand_total)),
+        ("rule", "", ""),
+        ("row", "Payment Method:", receipt.payment_method),
+        ("rule", "", ""),
+        ("center", "Thank You!", ""),
+        ("center", receipt.cashier_name, ""),
+        ("center", "Cashier", ""),
+        ("center", "Please come again!", ""),
+    ]
+    return lines
+
+def _text_row(left, right, width=TEXT_WIDTH):
+    if not right:
+        return left[:width]
+    room = width - len(right) - 1
+    return left[:room].ljust(room) + " " + right
+
+def render_text(receipt, width=TEXT_WIDTH):
+    out = []
+    for style, left, right in text_layout(receipt):
+        if style == "rule":
+            out.append("-" * width)
+        elif style in ("title", "center"):
+            out.append(left.center(width).rstrip())
+        else:
+            out.append(_text_row(left, right, width))
+    return "\n".join(out) + "\n"
+
+# ESC/POS commands common to Epson-compatible thermal printers
+ESC_INIT = b"\x1b@"
+ESC_ALIGN_LEFT = b"\x1ba\x00"
+ESC_ALIGN_CENTER = b"\x1ba\x01"
+ESC_BOLD_ON = b"\x1bE\x01"
+ESC_BOLD_OFF = b"\x1bE\x00"
+ESC_DOUBLE_SIZE = b"\x1d!\x11"
+ESC_NORMAL_SIZE = b"\x1d!\x00"
+ESC_FEED_AND_CUT = b"\x1bd\x04\x1dVB\x00"
+
+def render_escpos(receipt, width=TEXT_WIDTH):
+    """Receipt as an ESC/POS byte stream. Printer code pages have no peso sign, so amounts use "P"."""
+    def encode(text):
+        return text.encode("cp437", errors="replace") + b"\n"
+
+    out = [ESC_INIT]
+    for style, left, right in text_layout(receipt, currency="P"):
+        if style == "title":
+            out += [ESC_ALIGN_CENTER, ESC_DOUBLE_SIZE, encode(left), ESC_NORMAL_SIZE, ESC_ALIGN_LEFT]
+        elif style == "center":
+            out += [ESC_ALIGN_CENTER, encode(left), ESC_ALIGN_LEFT]
+        elif style == "rule":
+            out.append(encode("-" * width))
+        elif style == "bold":
+            out += [ESC_BOLD_ON, encode(_text_row(left, right, width)), ESC_BOLD_OFF]
+        else:
+            out.append(encode(_text_row(left, right, width)))
+    out.append(ESC_FEED_AND_CUT)
+    return b"".join(out)
+
+# --- Backends: receipt -> file contents ---
+def _png_bytes(image, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", **options)
+    return buffer.getvalue()
+
+def _encode_png(receipt):
+    return _png_bytes(renderer.render(receipt))
+
+def _encode_mono(receipt):
+    # Thresholded rather than dithered so text edges stay crisp on thermal paper
+    image = renderer.render(receipt).convert("L").point(lambda value: 255 if value >= 128 else 0, mode="1")
+    return _png_bytes(image, optimize=True)
+
+def _encode_text(receipt):
+    return render_text(receipt).encode("utf-8")
+
+#   name: (file extension, encoder)
+BACKENDS = {
+    "png": ("png", _encode_png),       # Full-colour image, as before
+    "mono": ("png", _encode_mono),     # 1-bit image, a fraction of the size
+    "text": ("txt", _encode_text),     # Plain text
+    "escpos": ("bin", render_escpos),  # Raw printer stream
+}
+
+def receipt_filename(order_code, timestamp, extension="png"):
+    """receipts/receipt_<code>_<timestamp>.<ext>; views/transactions.py shows the newest match."""
+    return os.path.join(RECEIPT_DIR, f"receipt_{order_code}_{timestamp.strftime('%d%m%Y_%I%M%p')}.{extension}")
+
+def write_atomic(filename, data):
+    """Write via a temporary file so the transactions view never opens a half-written receipt."""
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    tmp_path = filename + ".part"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, filename)
+    return filename
+
+def send_to_printer(data, printer=RECEIPT_PRINTER):
+    """Append an ESC/POS stream to the printer device, or to a file or named pipe standing in for it."""
+    with open(printer, "ab") as device:
+        device.write(data)
+        device.flush()
+
+def save_receipt(receipt, backend=RECEIPT_BACKEND, printer=RECEIPT_PRINTER):
+    """Render with the chosen backend and save it; with a printer configured, also print it."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown receipt backend: {backend}")
+    extension, encode = BACKENDS[backend]
+    filename = write_atomic(receipt_filename(receipt.order_code, receipt.created_at, extension), encode(receipt))
+    if printer:
+        send_to_printer(render_escpos(receipt), printer)
+    return filename
+
+# --- Benchmark ---
+def sample_receipt(lines=6):
+    now = datetime.datetime.now()
+    orders = [(i, f"Sample Drink {i}", "Grande", "Pearl, Nata" if i % 2 else "", 2, 78.0, "Confirmed", now, None, "Milk Tea")
+              for i in range(1, lines + 1)]
+    receipt = Receipt.from_orders(orders, "BBT0001", 1, 0.0, 0.0, 0.0, "Cash", "Sample Cashier", created_at=now)
+    receipt.grand_total = receipt.subtotal
+    receipt.paid_amount = float(-(-receipt.grand_total // 100) * 100)  # Next hundred up
+    receipt.change_amount = receipt.paid_amount - receipt.grand_total
+    return receipt
+
+def benchmark(receipts=50, lines=6):
+    """Milliseconds per receipt: (loading assets per receipt like before, shared renderer)."""
+    receipt = sample_receipt(lines)
+
+    def timed(make_renderer):
+        start = time.perf_counter()
+        for _ in range(receipts):
+            make_renderer().render(receipt)
+        return (time.perf_counter() - start) * 1000 / receipts
+
+    shared = ReceiptRenderer()
+    shared.render(receipt)  # Warm up, as the worker does on its first receipt
+    return timed(ReceiptRenderer), timed(lambda: shared)
+
+def compare_backends(receipts=20, lines=6):
+    """{backend: (ms per receipt, bytes per receipt)}"""
+    receipt = sample_receipt(lines)
+    results = {}
+    for name, (_, encode) in BACKENDS.items():
+        encode(receipt)  # Warm up
+        start = time.perf_counter()
+        for _ in range(receipts):
+            data = encode(receipt)
+        results[name] = ((time.perf_counter() - start) * 1000 / receipts, len(data))
+    return results
+
+if __name__ == "__main__":
+    # python -m utils.receipts [bench [receipts]|backends|sample [backend]]
+    command = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    if command == "bench":
+        receipts = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+        cold, warm = benchmark(receipts)
+        renderer.fonts()
+        print(f"Font: {renderer.font_path or 'Pillow default'}")
+        print(f"Loading assets per receipt: {cold:.2f} ms/receipt")
+        print(f"Shared renderer:            {warm:.2f} ms/receipt ({cold / warm:.1f}x faster)")
+    elif command == "backends":
+        for name, (ms, size) in compare_backends().items():
+            print(f"{name:<7} {ms:8.2f} ms/receipt {size:8} bytes")
+    elif command == "sample":
+        # Point BIGBREW_RECEIPT_PRINTER at a file or named pipe to capture the printer stream
+        print(f"Saved {save_receipt(sample_receipt(), sys.argv[2] if len(sys.argv) > 2 else RECEIPT_BACKEND)}")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(2)
@@ -0,0 +1,92 @@
+import os
+import re
+import sys
+import subprocess
+
+# Import-time report for the app's entry points, from a fresh interpreter run
+# with -X importtime. The login screen should only need flet, the database
+# layer and the login view; everything else is imported when it is first used.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What each screen imports before it can draw
+TARGETS = {
+    "login": "app",
+    "admin": "views.main_layout",
+    "cashier": "views.order_window",
+}
+
+# Must not be imported before the login screen shows
+DEFERRED_MODULES = [
+    "PIL",
+    "utils.receipts",
+    "utils.media",
+    "views.order_window",
+    "views.main_layout",
+    "views.dashboard",
+    "views.products",
+    "views.transactions",
+    "views.reports",
+]
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+def import_times(module):
+    """[(name, self_us, cumulative_us, depth)] for `import module` in a new interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed: {result.stderr.strip().splitlines()[-1]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+def total_ms(rows):
+    return sum(cumulative for _, _, cumulative, depth in rows if depth == 0) / 1000
+
+def by_package(rows):
+    """Self time per top-level package in ms, largest first."""
+    totals = {}
+    for name, self_us, _, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(((package, us / 1000) for package, us in totals.items()), key=lambda item: -item[1])
+
+def deferred_imports(rows):
+    """DEFERRED_MODULES (or their submodules) that were imported."""
+    names = {name for name, _, _, _ in rows}
+    return [module for module in DEFERRED_MODULES
+            if any(name == module or name.startswith(module + ".") for name in names)]
+
+def report(target, top=10):
+    rows = import_times(TARGETS.get(target, target))
+    print(f"{target}: {total_ms(rows):.1f} ms, {len(rows)} modules")
+    for package, ms in by_package(rows)[:top]:
+        print(f"  {package:<24} {ms:8.1f} ms")
+    return rows
+
+if __name__ == "__main__":
+    # python -m utils.startup_profile [report [login|admin|cashier|<module>]|check [budget_ms]]
+    command = sys.argv[1] if len(sys.argv) > 1 else "report"
+    if command == "report":
+        for target in sys.argv[2:] or list(TARGETS):
+            report(target)
+    elif command == "check":
+        # Exits non-zero if the login screen pulls in a deferred module or runs over budget
+        budget = float(sys.argv[2]) if len(sys.argv) > 2 else None
+        rows = report("login")
+        failures = [f"{module} is imported before login" for module in deferred_imports(rows)]
+        if budget is not None and total_ms(rows) > budget:
+            failures.append(f"startup imports took {total_ms(rows):.1f} ms, over the {budget:.0f} ms budget")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1 if failures else 0)
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(2)
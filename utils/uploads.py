@@ -0,0 +1,258 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+from config.settings import UPLOAD_DIR, UPLOAD_GC_GRACE, UPLOAD_MAX_BYTES
+from utils.media import RENDITIONS, rendition_path, make_renditions
+
+# Uploaded images are stored once per distinct content, under their SHA-256:
+#   uploads/57/2c/572c1272...ca52.png
+# media_blobs counts how many products use each stored file, so deleting a
+# product only removes the file when nothing else points at it.
+
+CHUNK_SIZE = 256 * 1024
+
+# Accepted image types by their leading bytes; the stored extension comes from
+# here, not from the uploaded file's name
+IMAGE_SIGNATURES = [
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"\xff\xd8\xff", ".jpg"),
+]
+
+class UploadError(ValueError):
+    """The upload is too large or isn't a supported image."""
+
+def sniff_image_type(header):
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return ".webp"
+    return None
+
+def blob_path(digest, extension):
+    return os.path.join(UPLOAD_DIR, digest[:2], digest[2:4], f"{digest}{extension.lower()}")
+
+def _file_digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+def store_file(source_path, progress=None):
+    """Stream source_path into the store unless identical content is already there.
+
+    The file is copied in CHUNK_SIZE pieces to a temporary file while it is
+    hashed, checked against UPLOAD_MAX_BYTES and sniffed for a supported image
+    type, then moved into place atomically. progress(copied_bytes, total_bytes)
+    is called after every chunk. Returns the stored file's relative path; the
+    blob is unreferenced until a product row takes it with acquire().
+    Raises UploadError for files that are too large or not images.
+    """
+    total = os.path.getsize(source_path)
+    if total > UPLOAD_MAX_BYTES:
+        raise UploadError(f"Image is larger than {UPLOAD_MAX_BYTES // (1024 * 1024)} MB.")
+
+    tmp_dir = os.path.join(UPLOAD_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, f"{os.getpid()}_{threading.get_ident()}_{time.time_ns()}.part")
+    sha = hashlib.sha256()
+    copied = 0
+    extension = None
+    try:
+        with open(source_path, "rb") as source, open(tmp_path, "wb") as target:
+            for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+                if extension is None:
+                    extension = sniff_image_type(chunk[:16])
+                    if extension is None:
+                        raise UploadError("Only PNG, JPEG and WebP images can be uploaded.")
+                copied += len(chunk)
+                if copied > UPLOAD_MAX_BYTES:  # The file grew while we were reading it
+                    raise UploadError(f"Image is larger than {UPLOAD_MAX_BYTES // (1024 * 1024)} MB.")
+                sha.update(chunk)
+                target.write(chunk)
+                if progress:
+                    progress(copied, total)
+        if extension is None:
+            raise UploadError("The selected file is empty.")
+
+        path = blob_path(sha.hexdigest(), extension)
+        if os.path.exists(path):
+            os.utime(path)  # Fresh mtime so gc leaves it alone while the dialog is open
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+        return path
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def start_upload(source_path, on_progress=None, on_done=None, on_error=None):
+    """Store an upload and build its renditions on a background thread.
+
+    on_progress(fraction) fires as each whole percent is copied, on_done(path,
+    renditions) once everything is in place, on_error(exception) on failure.
+    The callbacks run on the worker thread.
+    """
+    def report(copied, total):
+        nonlocal last_percent
+        percent = copied * 100 // total if total else 100
+        if on_progress and percent != last_percent:
+            last_percent = percent
+            on_progress(percent / 100)
+
+    def work():
+        try:
+            path = store_file(source_path, progress=report)
+            renditions = make_renditions(path)  # Decode once, write the sized copies
+        except Exception as e:
+            print(f"Error uploading image: {e}")
+            if on_error:
+                on_error(e)
+            return
+        if on_done:
+            on_done(path, renditions)
+
+    last_percent = -1
+    worker = threading.Thread(target=work, name="image-upload", daemon=True)
+    worker.start()
+    return worker
+
+# --- Reference counts, run on the caller's cursor inside its transaction ---
+def acquire(cursor, path):
+    if not path:
+        return
+    cursor.execute("""
+        INSERT INTO media_blobs (path, refcount) VALUES (%s, 1)
+        ON DUPLICATE KEY UPDATE refcount = refcount + 1
+    """, (path,))
+
+def release(cursor, path):
+    if not path:
+        return
+    cursor.execute("UPDATE media_blobs SET refcount = GREATEST(refcount - 1, 0) WHERE path = %s", (path,))
+
+def _remove_files(path):
+    for candidate in [path] + [rendition_path(path, name) for name in RENDITIONS]:
+        try:
+            os.remove(candidate)
+        except FileNotFoundError:
+            pass
+
+def remove_if_orphaned(path):
+    """Delete a stored file and its renditions once no product references it."""
+    from config.database import db_cursor
+
+    if not path:
+        return False
+    with db_cursor(commit=True) as cursor:
+        cursor.execute("SELECT refcount FROM media_blobs WHERE path = %s FOR UPDATE", (path,))
+        row = cursor.fetchone()
+        if row is None or row[0] > 0:
+            return False
+        cursor.execute("DELETE FROM media_blobs WHERE path = %s", (path,))
+    _remove_files(path)
+    return True
+
+# --- Maintenance ---
+def rebuild_refcounts(cursor):
+    """Recount references from products.image_path."""
+    cursor.execute("DELETE FROM media_blobs")
+    cursor.execute("""
+        INSERT INTO media_blobs (path, refcount)
+        SELECT image_path, COUNT(*) FROM products
+        WHERE image_path IS NOT NULL AND image_path != ''
+        GROUP BY image_path
+    """)
+
+def adopt_existing():
+    """Move products still pointing at old timestamp-named uploads into the store.
+
+    Identical images collapse onto one blob. Returns how many products moved.
+    """
+    from config.database import db_cursor
+    from utils.media import rendition_values
+
+    with db_cursor() as cursor:
+        cursor.execute("SELECT product_id, image_path FROM products WHERE image_path IS NOT NULL AND image_path != ''")
+        products = cursor.fetchall()
+    moved = 0
+    for product_id, image_path in products:
+        if not os.path.exists(image_path):
+            continue
+        try:
+            new_path = store_file(image_path)
+        except UploadError as e:
+            print(f"Skipping {product_id}: {e}")
+            continue
+        if os.path.normpath(new_path) == os.path.normpath(image_path):
+            continue  # Already in the store
+        card_path, preview_path = rendition_values(new_path)
+        with db_cursor(commit=True) as cursor:
+            cursor.execute("""
+                UPDATE products
+                SET image_path = %s, image_card_path = %s, image_preview_path = %s
+                WHERE product_id = %s
+            """, (new_path, card_path, preview_path, product_id))
+            release(cursor, image_path)
+            acquire(cursor, new_path)
+        moved += 1
+    return moved
+
+def collect_garbage(dry_run=False):
+    """Delete files under UPLOAD_DIR that no product references.
+
+    Files modified in the last UPLOAD_GC_GRACE seconds are kept, since they may
+    belong to a product dialog that hasn't been saved yet. Returns (files, bytes).
+    """
+    from config.database import db_cursor
+
+    with db_cursor(commit=not dry_run) as cursor:
+        cursor.execute("SELECT path FROM media_blobs WHERE refcount > 0")
+        live = {os.path.normpath(row[0]) for row in cursor.fetchall()}
+        cursor.execute("SELECT image_path FROM products WHERE image_path IS NOT NULL AND image_path != ''")
+        live.update(os.path.normpath(row[0]) for row in cursor.fetchall())
+        if not dry_run:
+            cursor.execute("DELETE FROM media_blobs WHERE refcount <= 0")
+
+    # A rendition lives as long as its original
+    keep = set(live)
+    for path in live:
+        keep.update(os.path.normpath(rendition_path(path, name)) for name in RENDITIONS)
+
+    cutoff = time.time() - UPLOAD_GC_GRACE
+    removed = 0
+    reclaimed = 0
+    for root, _, files in os.walk(UPLOAD_DIR):
+        for filename in files:
+            path = os.path.normpath(os.path.join(root, filename))
+            if path in keep or os.path.getmtime(path) > cutoff:
+                continue
+            size = os.path.getsize(path)
+            if not dry_run:
+                os.remove(path)
+            removed += 1
+            reclaimed += size
+    return removed, reclaimed
+
+if __name__ == "__main__":
+    # python -m utils.uploads [gc|gc --dry-run|adopt|recount]
+    from config.database import db_cursor
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "gc"
+    if command == "gc":
+        dry_run = "--dry-run" in sys.argv
+        files, size = collect_garbage(dry_run=dry_run)
+        verb = "Would remove" if dry_run else "Removed"
+        print(f"{verb} {files} unreferenced files ({size / 1024 / 1024:.1f} MB).")
+    elif command == "adopt":
+        print(f"Moved {adopt_existing()} product images into the content-addressed store.")
+    elif command == "recount":
+        with db_cursor(commit=True) as cursor:
+            rebuild_refcounts(cursor)
+        print("Rebuilt media_blobs reference counts.")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(2)
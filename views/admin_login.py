@@ -1,6 +1,6 @@
 import flet as ft
 from flet import Page, Row, Column, Container, Text, TextField, ElevatedButton, TextButton, alignment, padding
-from config.database import get_db_connection
+from config.database import db_connection
 from utils.auth import hash_password
 
 def admin_login(page: Page):
@@ -71,23 +71,24 @@ def admin_login(page: Page):
             return
 
         try:
-            connection = get_db_connection()
-            if connection is None:
-                error_text.value = "Error connecting to database. Please check if XAMPP is running."
-                error_text.visible = True
-                page.update()
-                return
+            with db_connection() as connection:
+                if connection is None:
+                    error_text.value = "Error connecting to database. Please check if XAMPP is running."
+                    error_text.visible = True
+                    page.update()
+                    return
 
-            cursor = connection.cursor()
+                cursor = connection.cursor()
 
-            # Get admin with matching username
-            cursor.execute("""
-                SELECT id, full_name, password 
-                FROM admin 
-                WHERE username = %s
-            """, (username,))
-            
-            result = cursor.fetchone()
+                # Get admin with matching username
+                cursor.execute("""
+                    SELECT id, full_name, password 
+                    FROM admin 
+                    WHERE username = %s
+                """, (username,))
+                
+                result = cursor.fetchone()
+                cursor.close()
             
             if not result:
                 error_text.value = "Invalid username"
@@ -122,10 +123,6 @@ def admin_login(page: Page):
             error_text.value = f"Error during login: {str(e)}"
             error_text.visible = True
             page.update()
-        finally:
-            if connection and connection.is_connected():
-                cursor.close()
-                connection.close()
 
     def handle_back(e):
         page.clean()
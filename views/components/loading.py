@@ -0,0 +1,46 @@
+import flet as ft
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import DB_POOL_SIZE
+
+# Admin views return their layout straight away with skeletons where the data
+# goes, and each section's queries run here. No more loads run at once than
+# there are pooled connections, so a tab change never waits on the pool.
+_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="view-load")
+
+SKELETON_COLOR = "#EDE3D6"
+
+def skeleton(width=None, height=16, radius=8, expand=False):
+    """Placeholder block shown until a section's data arrives."""
+    return ft.Container(width=width, height=height, bgcolor=SKELETON_COLOR, border_radius=radius, expand=expand)
+
+def skeleton_lines(count, width=None, height=16, spacing=10):
+    return ft.Column([skeleton(width=width, height=height) for _ in range(count)], spacing=spacing)
+
+def load_in_background(page, loader, apply=None, on_error=None):
+    """Run loader() on a worker thread, pass its result to apply() and update the page.
+
+    apply should only change controls' properties; the page update sends them.
+    If loader raises, the error is printed and on_error(exception) is called
+    instead. Returns the Future.
+    """
+    def run():
+        try:
+            result = loader()
+        except Exception as e:
+            print(f"Error loading view data: {e}")
+            if on_error is None:
+                return
+            on_error(e)
+        else:
+            if apply is not None:
+                apply(result)
+        page.update()
+
+    def report(future):
+        # Errors from apply, on_error or the update would otherwise vanish with the Future
+        if future.exception() is not None:
+            print(f"Error updating view: {future.exception()}")
+
+    future = _executor.submit(run)
+    future.add_done_callback(report)
+    return future
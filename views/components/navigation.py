@@ -1,21 +1,46 @@
+import time
+import importlib
 import flet as ft
-from views.dashboard import dashboard_view
-from views.products import products_view
-from views.transactions import transactions_view
-from views.reports import reports_view
+from collections import OrderedDict
+from config.settings import VIEW_CACHE_SIZE, VIEW_REFRESH_AFTER
+from utils.cache import tag_version
+
+def lazy_view(module_name, function_name):
+    """A view factory that imports its module the first time the view is built."""
+    def build(page):
+        return getattr(importlib.import_module(module_name), function_name)(page)
+    return build
+
+# Query-cache tags each view's data depends on (see utils/cache.invalidate)
+VIEW_TAGS = {
+    "dashboard": ("sales",),
+    "products": ("products",),
+    "transactions": ("sales",),
+    "reports": ("sales",),
+}
 
 class Navigation:
+    """Sidebar plus the admin views it switches between.
+
+    Built views are kept, up to VIEW_CACHE_SIZE of them, so switching back to
+    a tab shows it as it was left. A kept view whose tags were invalidated, or
+    that is older than VIEW_REFRESH_AFTER, is refreshed in place through the
+    refresh callable in its data; views without one are rebuilt.
+    """
+
     def __init__(self, page: ft.Page, content_container=None):
         self.page = page
         self.content_container = content_container
         self.current_view = "dashboard"
         self.views = {
-            "dashboard": dashboard_view,
-            "products": products_view,
-            "transactions": transactions_view,
-            "reports": reports_view
+            # Each module is imported when its tab is first opened
+            "dashboard": lazy_view("views.dashboard", "dashboard_view"),
+            "products": lazy_view("views.products", "products_view"),
+            "transactions": lazy_view("views.transactions", "transactions_view"),
+            "reports": lazy_view("views.reports", "reports_view"),
         }
         self.on_tab_change = None
+        self._built = OrderedDict()  # view name -> (view, loaded_at, tag version), least recently shown first
 
     def sidebar(self):
         return ft.Container(
@@ -75,9 +100,28 @@ class Navigation:
         else:
             self.current_view = view_name
             if self.content_container:
-                self.content_container.content = self.views[self.current_view](self.page)
+                self.content_container.content = self.get_current_view()
                 self.content_container.update()
                 self.page.update()
 
     def get_current_view(self):
-        return self.views[self.current_view](self.page)
\ No newline at end of file
+        name = self.current_view
+        version = tag_version(*VIEW_TAGS.get(name, ()))
+        now = time.monotonic()
+        entry = self._built.get(name)
+        if entry is None:
+            view, loaded_at = self.views[name](self.page), now
+        else:
+            view, loaded_at, built_version = entry
+            if built_version != version or now - loaded_at > VIEW_REFRESH_AFTER:
+                refresh = view.data.get("refresh") if isinstance(view.data, dict) else None
+                if refresh is not None:
+                    refresh()
+                else:
+                    view = self.views[name](self.page)
+                loaded_at = now
+        self._built[name] = (view, loaded_at, version)
+        self._built.move_to_end(name)
+        while len(self._built) > VIEW_CACHE_SIZE:
+            self._built.popitem(last=False)
+        return view
@@ -1,6 +1,8 @@
 import flet as ft
 import datetime
 from config.database import get_db_connection, get_employee_full_name
+from config.rollup import fetch_sales_totals, fetch_top_products, PROFIT_MARGIN
+from views.components.loading import skeleton, load_in_background
 
 def SummaryStatBox(icon, icon_color, title, value, change, change_color, change_text, subtext):
     return ft.Container(
@@ -55,68 +57,26 @@ def dashboard_view(page: ft.Page):
     # Fetch dynamic data
     def fetch_dashboard_data():
         try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-
-                # Fetch revenue, profit, and total orders for today
-                cursor.execute("""
-                    SELECT 
-                        SUM(price) AS revenue, 
-                        SUM(price * 0.4) AS profit, 
-                        COUNT(*) AS total_orders 
-                    FROM orders 
-                    WHERE DATE(created_at) = CURDATE() AND status = 'Confirmed'
-                """)
-                today_data = cursor.fetchone()
-                revenue_today = today_data[0] or 0
-                profit_today = today_data[1] or 0
-                total_orders_today = today_data[2] or 0
-
-                # Fetch revenue, profit, and total orders for yesterday
-                cursor.execute("""
-                    SELECT 
-                        SUM(price) AS revenue, 
-                        SUM(price * 0.4) AS profit, 
-                        COUNT(*) AS total_orders 
-                    FROM orders 
-                    WHERE DATE(created_at) = CURDATE() - INTERVAL 1 DAY AND status = 'Confirmed'
-                """)
-                yesterday_data = cursor.fetchone()
-                revenue_yesterday = yesterday_data[0] or 0
-                profit_yesterday = yesterday_data[1] or 0
-                total_orders_yesterday = yesterday_data[2] or 0
+            # Revenue, profit, and total orders for today and yesterday from the rollup
+            today_date = datetime.date.today()
+            revenue_today, total_orders_today = fetch_sales_totals(today_date, today_date + datetime.timedelta(days=1))
+            revenue_yesterday, total_orders_yesterday = fetch_sales_totals(today_date - datetime.timedelta(days=1), today_date)
+            profit_today = revenue_today * PROFIT_MARGIN
+            profit_yesterday = revenue_yesterday * PROFIT_MARGIN
 
-                # Calculate percentage changes
-                revenue_change = ((revenue_today - revenue_yesterday) / revenue_yesterday * 100) if revenue_yesterday else 0
-                profit_change = ((profit_today - profit_yesterday) / profit_yesterday * 100) if profit_yesterday else 0
-                total_orders_change = ((total_orders_today - total_orders_yesterday) / total_orders_yesterday * 100) if total_orders_yesterday else 0
+            # Calculate percentage changes
+            revenue_change = ((revenue_today - revenue_yesterday) / revenue_yesterday * 100) if revenue_yesterday else 0
+            profit_change = ((profit_today - profit_yesterday) / profit_yesterday * 100) if profit_yesterday else 0
+            total_orders_change = ((total_orders_today - total_orders_yesterday) / total_orders_yesterday * 100) if total_orders_yesterday else 0
 
-                # Fetch product with the highest orders
-                cursor.execute("""
-                    SELECT 
-                        product_name, 
-                        COUNT(*) AS orders_count 
-                    FROM orders 
-                    WHERE status = 'Confirmed' 
-                    GROUP BY product_name 
-                    ORDER BY orders_count DESC 
-                    LIMIT 4
-                """)
-                top_products = cursor.fetchall()
-
-                cursor.close()
-                conn.close()
-
-                return {
-                    "revenue_today": revenue_today,
-                    "profit_today": profit_today,
-                    "total_orders_today": total_orders_today,
-                    "revenue_change": revenue_change,
-                    "profit_change": profit_change,
-                    "total_orders_change": total_orders_change,
-                    "top_products": top_products
-                }
+            return {
+                "revenue_today": revenue_today,
+                "profit_today": profit_today,
+                "total_orders_today": total_orders_today,
+                "revenue_change": revenue_change,
+                "profit_change": profit_change,
+                "total_orders_change": total_orders_change,
+            }
         except Exception as e:
             print(f"Error fetching dashboard data: {e}")
             return {
@@ -126,10 +86,14 @@ def dashboard_view(page: ft.Page):
                 "revenue_change": 0,
                 "profit_change": 0,
                 "total_orders_change": 0,
-                "top_products": []
             }
 
-    dashboard_data = fetch_dashboard_data()
+    def fetch_dashboard_top_products():
+        try:
+            return fetch_top_products(4)
+        except Exception as e:
+            print(f"Error fetching top products: {e}")
+            return []
 
     def product_table(products):
         rows = [
@@ -153,24 +117,7 @@ def dashboard_view(page: ft.Page):
             )
         return rows
 
-    # Fetch logged-in user's name
-    def get_logged_in_user():
-        try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-                cursor.execute("SELECT first_name, last_name FROM employees WHERE id = %s", (page.session.get("user_id"),))
-                user = cursor.fetchone()
-                cursor.close()
-                conn.close()
-                return f"{user[0]} {user[1]}" if user else "User"
-        except Exception as e:
-            print(f"Error fetching user: {e}")
-            return "User"
-
-    user_name = get_logged_in_user()
-
-    def user_profile_card():
+    def get_profile_name():
         user_id = page.session.get("user_id")
         full_name = get_employee_full_name(user_id)
         if not full_name or full_name.lower() == 'none':
@@ -188,6 +135,14 @@ def dashboard_view(page: ft.Page):
                         full_name = "Admin"
             except Exception:
                 full_name = "Admin"
+        return full_name
+
+    profile_name = ft.Column([skeleton(width=120, height=18)], spacing=0)
+
+    def show_profile_name(full_name):
+        profile_name.controls = [ft.Text(full_name, weight="bold", size=16, font_family="Poppins")]
+
+    def user_profile_card():
         return ft.Container(
             content=ft.Row([
                 ft.CircleAvatar(
@@ -195,9 +150,7 @@ def dashboard_view(page: ft.Page):
                     bgcolor="#BB6F19",
                     radius=18
                 ),
-                ft.Column([
-                    ft.Text(full_name, weight="bold", size=16, font_family="Poppins"),
-                ], spacing=0),
+                profile_name,
                 ft.IconButton(
                     icon=ft.Icons.LOGOUT,
                     icon_color="black",
@@ -284,75 +237,6 @@ def dashboard_view(page: ft.Page):
         logout_modal.visible = True
         page.update()
 
-    def get_top_beverages():
-        try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-                # Get top 4 products by stock (as a simple example)
-                cursor.execute("""
-                    SELECT product_id, name, type, price, availability, image_path 
-                    FROM products 
-                    ORDER BY availability DESC 
-                    LIMIT 4
-                """)
-                products = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return products
-            return []
-        except Exception as e:
-            print(f"Error fetching top beverages: {e}")
-            return []
-
-    def beverage_table(products):
-        header = ft.Row([
-            ft.Container(width=48),  # For image
-            ft.Container(width=110, content=ft.Text("", size=14)),  # For name
-            ft.Container(width=60, content=ft.Text("Price", size=14, weight="bold", text_align="center")),
-            ft.Container(width=60, content=ft.Text("Availability", size=14, weight="bold", text_align="center")),
-        ], spacing=0, alignment="end")
-        rows = [header]
-        
-        for product in products:
-            # Use a default image if the product image is not available
-            image_path = product[5] if product[5] else "icons/default_product.png"
-            rows.append(
-                ft.Row([
-                    ft.Container(
-                        content=ft.Image(
-                            src=image_path,
-                            width=40,
-                            height=40,
-                            fit=ft.ImageFit.CONTAIN,
-                            error_content=ft.Icon(ft.Icons.ERROR, color=ft.Colors.GREY)
-                        ),
-                        width=48,
-                        alignment=ft.alignment.center_left
-                    ),
-                    ft.Container(
-                        content=ft.Text(product[1], weight="bold", size=15, font_family="Poppins"),
-                        width=110,
-                        alignment=ft.alignment.center_left
-                    ),
-                    ft.VerticalDivider(width=1, thickness=1, color=ft.Colors.GREY_300),
-                    ft.Container(
-                        content=ft.Text(f"₱{product[3]:.2f}", size=15, font_family="Poppins", text_align="center"),
-                        width=60,
-                        alignment=ft.alignment.center
-                    ),
-                    ft.Container(
-                        content=ft.Text(str(product[4]), size=15, font_family="Poppins", text_align="center"),
-                        width=60,
-                        alignment=ft.alignment.center
-                    ),
-                ], spacing=0, alignment="end")
-            )
-        return rows
-
-    # Get top beverages from database
-    top_beverages = get_top_beverages()
-
     # Fetch logged-in user's first name
     def get_logged_in_user_first_name():
         try:
@@ -368,7 +252,71 @@ def dashboard_view(page: ft.Page):
             print(f"Error fetching user first name: {e}")
             return "User"
 
-    first_name = get_logged_in_user_first_name()
+    greeting = ft.Text("Hi,", weight="bold", size=18, font_family="Poppins")
+
+    def show_greeting(first_name):
+        greeting.value = f"Hi, {first_name or 'User'}"
+
+    def summary_boxes(dashboard_data):
+        return [
+            SummaryStatBox(
+                icon=ft.Icons.PAID,
+                icon_color=ft.Colors.GREEN_700,
+                title="Total Revenue",
+                value=f"₱{dashboard_data['revenue_today']:.2f}",
+                change=f"▲ {dashboard_data['revenue_change']:.2f}%",
+                change_color=ft.Colors.GREEN_700 if dashboard_data['revenue_change'] >= 0 else ft.Colors.RED_700,
+                change_text="vs yesterday",
+                subtext=""
+            ),
+            SummaryStatBox(
+                icon=ft.Icons.ATTACH_MONEY,
+                icon_color=ft.Colors.BLUE_700,
+                title="Total Profit",
+                value=f"₱{dashboard_data['profit_today']:.2f}",
+                change=f"▲ {dashboard_data['profit_change']:.2f}%",
+                change_color=ft.Colors.GREEN_700 if dashboard_data['profit_change'] >= 0 else ft.Colors.RED_700,
+                change_text="vs yesterday",
+                subtext=""
+            ),
+            SummaryStatBox(
+                icon=ft.Icons.SHOPPING_BAG,
+                icon_color=ft.Colors.ORANGE_700,
+                title="Total Orders",
+                value=str(dashboard_data['total_orders_today']),
+                change=f"▲ {dashboard_data['total_orders_change']:.2f}%",
+                change_color=ft.Colors.GREEN_700 if dashboard_data['total_orders_change'] >= 0 else ft.Colors.RED_700,
+                change_text="vs yesterday",
+                subtext=""
+            ),
+        ]
+
+    # Sections start as skeletons and fill in as their queries return
+    summary_row = ft.Row(
+        controls=[skeleton(width=300, height=230, radius=16, expand=True) for _ in range(3)],
+        spacing=20,
+        alignment="center"
+    )
+    top_products_column = ft.Column(
+        controls=product_table([]) + [skeleton(width=230, height=20) for _ in range(4)],
+        spacing=8
+    )
+
+    def show_summary(dashboard_data):
+        summary_row.controls = summary_boxes(dashboard_data)
+
+    def show_top_products(products):
+        top_products_column.controls = product_table(products)
+
+    load_in_background(page, fetch_dashboard_data, show_summary)
+    load_in_background(page, fetch_dashboard_top_products, show_top_products)
+    load_in_background(page, get_logged_in_user_first_name, show_greeting)
+    load_in_background(page, get_profile_name, show_profile_name, on_error=lambda e: show_profile_name("Admin"))
+
+    def refresh_view():
+        # Sales figures only; the names don't change while the view is open
+        load_in_background(page, fetch_dashboard_data, show_summary)
+        load_in_background(page, fetch_dashboard_top_products, show_top_products)
 
     # Main layout
     return ft.Container(
@@ -399,42 +347,7 @@ def dashboard_view(page: ft.Page):
                     content=ft.Column(
                         controls=[
                             ft.Text("Summary", weight="bold", size=16, font_family="Poppins"),
-                            ft.Row(
-                                controls=[
-                                    SummaryStatBox(
-                                        icon=ft.Icons.PAID,
-                                        icon_color=ft.Colors.GREEN_700,
-                                        title="Total Revenue",
-                                        value=f"₱{dashboard_data['revenue_today']:.2f}",
-                                        change=f"▲ {dashboard_data['revenue_change']:.2f}%",
-                                        change_color=ft.Colors.GREEN_700 if dashboard_data['revenue_change'] >= 0 else ft.Colors.RED_700,
-                                        change_text="vs yesterday",
-                                        subtext=""
-                                    ),
-                                    SummaryStatBox(
-                                        icon=ft.Icons.ATTACH_MONEY,
-                                        icon_color=ft.Colors.BLUE_700,
-                                        title="Total Profit",
-                                        value=f"₱{dashboard_data['profit_today']:.2f}",
-                                        change=f"▲ {dashboard_data['profit_change']:.2f}%",
-                                        change_color=ft.Colors.GREEN_700 if dashboard_data['profit_change'] >= 0 else ft.Colors.RED_700,
-                                        change_text="vs yesterday",
-                                        subtext=""
-                                    ),
-                                    SummaryStatBox(
-                                        icon=ft.Icons.SHOPPING_BAG,
-                                        icon_color=ft.Colors.ORANGE_700,
-                                        title="Total Orders",
-                                        value=str(dashboard_data['total_orders_today']),
-                                        change=f"▲ {dashboard_data['total_orders_change']:.2f}%",
-                                        change_color=ft.Colors.GREEN_700 if dashboard_data['total_orders_change'] >= 0 else ft.Colors.RED_700,
-                                        change_text="vs yesterday",
-                                        subtext=""
-                                    ),
-                                ],
-                                spacing=20,
-                                alignment="center"
-                            ),
+                            summary_row,
                         ],
                         spacing=20
                     ),
@@ -453,7 +366,7 @@ def dashboard_view(page: ft.Page):
                                             controls=[
                                                 ft.Column(
                                                     controls=[
-                                                        ft.Text(f"Hi, {first_name}", weight="bold", size=18, font_family="Poppins"),
+                                                        greeting,
                                                         ft.Text(
                                                             "Ready to kick off your day of serving\ngreat coffee?",
                                                             size=12,
@@ -528,10 +441,7 @@ def dashboard_view(page: ft.Page):
                                     ft.Text("Top Products", weight="bold", size=18, font_family="Poppins"),
                                     ft.Text("Most ordered items", size=12, color=ft.Colors.GREY_700),
                                     ft.Container(
-                                        content=ft.Column(
-                                            controls=product_table(dashboard_data['top_products']),
-                                            spacing=8
-                                        ),
+                                        content=top_products_column,
                                         bgcolor=ft.Colors.GREY_100,
                                         border_radius=8,
                                         padding=10,
@@ -548,7 +458,8 @@ def dashboard_view(page: ft.Page):
             spacing=20
         ),
         padding=20,
-        expand=True
+        expand=True,
+        data={"refresh": refresh_view},  # Used by Navigation when the view's data goes stale
     )
 
     # Add the content to the page
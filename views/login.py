@@ -1,6 +1,6 @@
 import flet as ft
 from flet import Page, Row, Column, Container, Text, TextField, ElevatedButton, IconButton, alignment, border_radius, padding, TextButton
-from config.database import get_db_connection
+from config.database import db_cursor
 from utils.auth import hash_password
 
 # This is the login screen function
@@ -104,24 +104,22 @@ def main(page: Page):
                 return
 
         try:
-            connection = get_db_connection()
-            cursor = connection.cursor()
-
             # Get employee with matching ID or email
-            if is_email:
-                cursor.execute("""
-                    SELECT id, first_name, last_name, password 
-                    FROM employees 
-                    WHERE email = %s
-                """, (emp_id_or_email,))
-            else:
-                cursor.execute("""
-                    SELECT id, first_name, last_name, password 
-                    FROM employees 
-                    WHERE employee_id = %s
-                """, (emp_id_check,))
-            
-            result = cursor.fetchone()
+            with db_cursor() as cursor:
+                if is_email:
+                    cursor.execute("""
+                        SELECT id, first_name, last_name, password 
+                        FROM employees 
+                        WHERE email = %s
+                    """, (emp_id_or_email,))
+                else:
+                    cursor.execute("""
+                        SELECT id, first_name, last_name, password 
+                        FROM employees 
+                        WHERE employee_id = %s
+                    """, (emp_id_check,))
+                
+                result = cursor.fetchone()
             
             if not result:
                 error_text.value = "Invalid Employee ID or Email"
@@ -161,10 +159,6 @@ def main(page: Page):
             error_text.value = f"Error during login: {str(e)}"
             error_text.visible = True
             page.update()
-        finally:
-            if connection.is_connected():
-                cursor.close()
-                connection.close()
 
     def handle_forgot_password(e):
         print("Forgot Password clicked")
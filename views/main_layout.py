@@ -1,9 +1,5 @@
 import flet as ft
 from views.components.navigation import Navigation
-from views.dashboard import dashboard_view
-from views.products import products_view
-from views.transactions import transactions_view
-from views.reports import reports_view
 
 def main(page: ft.Page):
     # Page settings
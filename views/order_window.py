@@ -2,11 +2,14 @@ import flet as ft
 from flet import (
     Page, Row, Column, Container, Text, TextField, IconButton, Icons, Icon, alignment, padding, Colors, Stack, CircleAvatar, BoxShadow
 )
-from config.database import get_db_connection, insert_order, fetch_pending_orders, get_next_transaction_code, clear_pending_orders, get_employee_first_name, get_employee_full_name
+from config.database import get_db_connection, db_cursor, confirm_cart, get_next_transaction_code, get_employee_first_name
+from config.settings import TERMINAL_ID
+from utils.cache import invalidate
+from utils.cart import Cart
+from utils.catalog import catalog
 from utils.password import hash_password
-import datetime
-from PIL import Image, ImageDraw, ImageFont
-import os
+from utils.receipt_worker import ReceiptJob, receipt_worker
+from utils.receipts import Receipt
 
 selected_index = 0
 selected_payment_method = None  # No default selection
@@ -25,6 +28,11 @@ void_modal_height = 180  # You can adjust this value as needed
 # Define page globally at the top of the file
 page = None  # Placeholder for the Page object, will be set in main()
 
+# Cart key for this register's pending orders
+session_id = TERMINAL_ID
+cart = None  # This register's open order (utils/cart.py), set in main()
+catalog_listener = None  # Product grid's catalog listener, replaced each time main() runs
+
 # Add these at the top of the file
 categories = []
 white_container_ref = None
@@ -52,7 +60,10 @@ def main(page_obj: Page):
     global categories, white_container_ref, build_review_order_container
     global category_row_ref, build_category_row
     global transaction_code_text_ref
+    global cart, catalog_listener
     selected_index = 0
+    if cart is None:
+        cart = Cart(session_id)  # Restores an unfinished order from the journal
     page.title = "ORDER WINDOW"
     page.bgcolor = "#EDEDED"
     page.window_width = 1200
@@ -68,45 +79,13 @@ def main(page_obj: Page):
     # Hardcoded categories and their images
     def fetch_category_counts():
         try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT type, COUNT(*) 
-                    FROM products 
-                    GROUP BY type
-                """)
-                counts = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return {row[0]: row[1] for row in counts}
-            else:
-                print("Error: Unable to connect to the database.")
-                return {}
+            return catalog.type_counts()
         except Exception as e:
             print(f"Error fetching category counts: {str(e)}")
             return {}
 
     def fetch_review_order_count():
-        try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT COUNT(*) 
-                    FROM orders 
-                    WHERE status = 'Pending'
-                """)
-                count = cursor.fetchone()[0]
-                cursor.close()
-                conn.close()
-                return count
-            else:
-                print("Error: Unable to connect to the database.")
-                return 0
-        except Exception as e:
-            print(f"Error fetching review order count: {str(e)}")
-            return 0
+        return len(cart)
 
     category_counts = fetch_category_counts()
 
@@ -135,9 +114,9 @@ def main(page_obj: Page):
         if selected_index == len(categories) - 1:  # "Review Order" category
             white_container_ref.current.content = build_review_order_container()
         else:
-            product_grid.controls.clear()
-            product_grid.controls.extend(build_grid_items())
-            white_container_ref.current.content = product_grid
+            show_category_cards()
+            if white_container_ref.current.content is not product_grid:
+                white_container_ref.current.content = product_grid
         white_container_ref.current.update()
         page.update()
 
@@ -212,14 +191,10 @@ def main(page_obj: Page):
     # Fetch logged-in user's name
     def get_logged_in_user():
         try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
+            with db_cursor() as cursor:
                 cursor.execute("SELECT first_name, last_name FROM employees WHERE id = %s", (page.session.get("user_id"),))
                 user = cursor.fetchone()
-                cursor.close()
-                conn.close()
-                return f"{user[0]} {user[1]}" if user else "User"
+            return f"{user[0]} {user[1]}" if user else "User"
         except Exception as e:
             print(f"Error fetching user: {e}")
             return "User"
@@ -287,20 +262,10 @@ def main(page_obj: Page):
     # Category bar
     category_row = Row(ref=category_row_ref, controls=build_category_row(), alignment="start", vertical_alignment="center", expand=True)
 
-    # Fetch products from the database
-    def fetch_products():
+    # Products from the shared catalog (no database round-trip)
+    def fetch_all_products():
         try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-                cursor.execute("SELECT name, image_path, type, price FROM products ORDER BY product_id")  # Include price column
-                products = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return products
-            else:
-                print("Error: Unable to connect to the database.")
-                return []
+            return catalog.all_products()
         except Exception as e:
             print(f"Error fetching products: {str(e)}")
             return []
@@ -349,41 +314,71 @@ def main(page_obj: Page):
             ),
         )
 
-    # Function to build grid items based on selected category
-    def build_grid_items():
-        selected_category = categories[selected_index][0] if selected_index < len(categories) else None
-        db_products = fetch_products()
-        filtered_products = []
-        for p in db_products:
-            if selected_category and p[2] and p[2].strip().lower() == selected_category.strip().lower():
-                filtered_products.append(p)
-        if filtered_products:
-            return [
-                product_card(
-                    p[1] if p[1] else 'assets/images/placeholder.png',  # Image path
-                    p[0],  # Product name
-                    p[3]   # Product price
-                )
-                for p in filtered_products
-            ]
-        else:
-            return [
-                ft.Container(
-                    content=ft.Column([
-                        ft.Icon(ft.Icons.INFO, color="#BB6F19", size=48),
-                        ft.Text("No product available", size=20, weight="bold", color="black", font_family="Poppins")
-                    ], alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.CENTER),
-                    alignment=ft.alignment.center,
-                    bgcolor="#FAD7A0",
-                    border_radius=20,
-                    width=380,
-                    height=220,
-                    expand=True
-                )
-            ]
+    # Keyed product-card registry: one card per product_id, built once and
+    # reused. Switching categories only flips each card's visibility, so Flet
+    # sends a small property diff instead of re-serializing every card.
+    product_cards = {}
+
+    no_products_card = ft.Container(
+        content=ft.Column([
+            ft.Icon(ft.Icons.INFO, color="#BB6F19", size=48),
+            ft.Text("No product available", size=20, weight="bold", color="black", font_family="Poppins")
+        ], alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.CENTER),
+        alignment=ft.alignment.center,
+        bgcolor="#FAD7A0",
+        border_radius=20,
+        width=380,
+        height=220,
+        expand=True,
+        visible=False,
+    )
+
+    def make_product_card(product):
+        card = product_card(
+            product["image_card_path"] or product["image_path"] or 'assets/images/placeholder.png',  # Small card rendition when there is one
+            product["name"],  # Product name
+            product["price"]  # Product price
+        )
+        card.data = (product["type"] or "").strip().lower()  # Category this card belongs to
+        return card
+
+    def build_product_cards():
+        product_cards.clear()
+        for product in fetch_all_products():
+            product_cards[product["product_id"]] = make_product_card(product)
+
+    def ordered_grid_controls():
+        return [product_cards[pid] for pid in sorted(product_cards)] + [no_products_card]
+
+    def show_category_cards():
+        selected_category = categories[selected_index][0] if selected_index < len(categories) - 1 else None
+        category_key = selected_category.strip().lower() if selected_category else None
+        any_visible = False
+        for card in product_cards.values():
+            visible = card.data == category_key
+            if card.visible != visible:
+                card.visible = visible
+            any_visible = any_visible or visible
+        no_products_card.visible = not any_visible
+
+    def on_catalog_change(action, product, old_product_id=None):
+        # Patch only the cards that changed
+        if action == "reload":
+            build_product_cards()
+        elif action == "remove":
+            product_cards.pop(product["product_id"], None)
+        elif action == "upsert":
+            product_cards.pop(old_product_id or product["product_id"], None)
+            product_cards[product["product_id"]] = make_product_card(product)
+        product_grid.controls = ordered_grid_controls()
+        show_category_cards()
+        if product_grid.page:
+            product_grid.update()
 
     # Initial grid items
-    grid_items = build_grid_items()
+    build_product_cards()
+    grid_items = ordered_grid_controls()
+    show_category_cards()
 
     # Scrollable grid with 4 columns
     product_grid = ft.GridView(
@@ -396,6 +391,12 @@ def main(page_obj: Page):
         height=420,
     )
 
+    # Keep the cards in step with product changes made in this process
+    if catalog_listener:
+        catalog.remove_listener(catalog_listener)
+    catalog_listener = on_catalog_change
+    catalog.add_listener(catalog_listener)
+
     # White container below category boxes (contains only the product grid)
     white_container = Container(
         ref=white_container_ref,
@@ -410,11 +411,11 @@ def main(page_obj: Page):
 
     # Function to build the review order container
     def build_review_order_container():
-        orders = fetch_pending_orders()
-        total_items = sum(order[4] for order in orders)  # quantity
-        subtotal = sum(order[5] for order in orders)  # price
-        add_ons_total = sum(len(order[3].split(", ")) * 9 if order[3] else 0 for order in orders)
-        grand_total = subtotal + add_ons_total
+        orders = cart.rows()
+        total_items = cart.total_items
+        subtotal = cart.subtotal
+        grand_total = cart.grand_total
+        add_ons_total = grand_total - subtotal
 
         def show_delete_confirmation(order_id):
             confirm_modal = ft.Container(
@@ -451,13 +452,7 @@ def main(page_obj: Page):
 
         def delete_order(order_id):
             try:
-                conn = get_db_connection()
-                if conn and conn.is_connected():
-                    cursor = conn.cursor()
-                    cursor.execute("DELETE FROM orders WHERE order_id = %s", (order_id,))
-                    conn.commit()
-                    cursor.close()
-                    conn.close()
+                cart.remove(order_id)
                 # Refresh the review order container
                 if white_container_ref and build_review_order_container:
                     white_container_ref.current.content = build_review_order_container()
@@ -577,18 +572,8 @@ def main(page_obj: Page):
                 subtotal_price = (base_price * quantity) + add_ons_price  # Calculate subtotal separately
                 add_ons_str = ", ".join(selected_add_ons)
                 try:
-                    conn = get_db_connection()
-                    if conn and conn.is_connected():
-                        cursor = conn.cursor()
-                        # Update size, add-ons, and quantity, but keep the base price unchanged
-                        cursor.execute("""
-                            UPDATE orders 
-                            SET size=%s, add_ons=%s, quantity=%s, price=%s 
-                            WHERE order_id=%s
-                        """, (selected_size, add_ons_str, quantity, base_price * quantity, order_id))  # Use base price * quantity for the price field
-                        conn.commit()
-                        cursor.close()
-                        conn.close()
+                    # Update size, add-ons, and quantity, but keep the base price unchanged
+                    cart.update(order_id, selected_size, add_ons_str, quantity, base_price * quantity)  # Use base price * quantity for the price field
                     # Refresh the review order container
                     if white_container_ref and build_review_order_container:
                         white_container_ref.current.content = build_review_order_container()
@@ -1153,8 +1138,9 @@ def main(page_obj: Page):
             total_price = (base_price + add_ons_price) * quantity
             add_ons_str = ", ".join(selected_add_ons)
             
-            # Insert the order into the database
-            if insert_order(product_name, selected_size, add_ons_str, quantity, total_price):
+            # Add the line to this register's cart; it is written to the database on confirm
+            product_type = categories[selected_index][0] if selected_index < len(categories) - 1 else None
+            if cart.add(product_name, selected_size, add_ons_str, quantity, total_price, product_image, product_type):
                 close_add_to_order_dialog()
                 update_review_order_count()  # Update the Review Order count
                 # Update the review order display if we're on that tab
@@ -1164,7 +1150,7 @@ def main(page_obj: Page):
                     page.update()
             else:
                 # Show error message if order insertion failed
-                print("Failed to add order to database")
+                print("Failed to add order to cart")
 
         # Create the dialog container
         add_to_order_dialog = ft.Container(
@@ -1500,9 +1486,7 @@ def show_payment_prompt():
     def validate_amount(e):
         try:
             amount = float(e.control.value) if e.control.value else 0
-            orders = fetch_pending_orders()
-            # Convert all values to float for calculation
-            total = sum(float(order[5]) for order in orders) + sum(float(len(order[3].split(", ")) * 9) if order[3] else 0 for order in orders)
+            total = float(cart.grand_total)
             
             # Update global variables
             global paid_amount, change_amount
@@ -1528,8 +1512,7 @@ def show_payment_prompt():
             error_text.update()
 
     # Calculate total amount
-    orders = fetch_pending_orders()
-    total = sum(float(order[5]) for order in orders) + sum(float(len(order[3].split(", ")) * 9) if order[3] else 0 for order in orders)
+    total = float(cart.grand_total)
 
     if selected_payment_method == "GCash":
         # For GCash, set payment amount equal to total
@@ -1605,9 +1588,7 @@ def handle_payment_amount(amount):
     try:
         global paid_amount, change_amount
         paid_amount = float(amount)
-        orders = fetch_pending_orders()
-        # Convert all values to float for calculation
-        total = sum(float(order[5]) for order in orders) + sum(float(len(order[3].split(", ")) * 9) if order[3] else 0 for order in orders)
+        total = float(cart.grand_total)
         change_amount = float(paid_amount - total)
         if change_amount < 0:
             return  # Don't close modal if amount is insufficient
@@ -1617,8 +1598,7 @@ def handle_payment_amount(amount):
 
 def handle_gcash_payment():
     global paid_amount, change_amount
-    orders = fetch_pending_orders()
-    total = sum(float(order[5]) for order in orders) + sum(float(len(order[3].split(", ")) * 9) if order[3] else 0 for order in orders)
+    total = float(cart.grand_total)
     paid_amount = float(total)
     change_amount = 0.0
     close_payment_modal()
@@ -1631,262 +1611,240 @@ def close_payment_modal():
     page.update()
 
 def confirm_order():
-    orders = fetch_pending_orders()
-    if not orders:
-        page.snack_bar = ft.SnackBar(
-            content=ft.Text("No orders to confirm. Please add items before confirming."),
-            bgcolor="#F44336"
-        )
-        page.snack_bar.open = True
-        page.update()
-        return  # Do not create a transaction if there are no orders
-
-    total_items = sum(order[4] for order in orders)  # quantity
-    subtotal = sum(order[5] for order in orders)  # price
-    add_ons_total = sum(len(order[3].split(", ")) * 9 if order[3] else 0 for order in orders)
-    grand_total = subtotal + add_ons_total
-    
-    order_code = get_next_transaction_code()  # ✅ Call only once
-
     try:
-        conn = get_db_connection()
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
-
-            cursor.execute("""
-                INSERT INTO transactions (order_number, order_code, payment_method, total_amount, status)
-                VALUES (%s, %s, %s, %s, %s)
-            """, (
-                orders[0][0],
-                order_code,
-                selected_payment_method or "Cash",
-                grand_total,
-                "Normal"
-            ))
-            transaction_id = cursor.lastrowid
-
-            # Update orders to mark them as confirmed and set their transaction_id
-            for order in orders:
-                cursor.execute("""
-                    UPDATE orders
-                    SET status = 'Confirmed', transaction_id = %s
-                    WHERE order_id = %s
-                """, (transaction_id, order[0]))
-            conn.commit()
-            cursor.close()
-            conn.close()
+        payment_method = selected_payment_method or "Cash"
+        confirmed = confirm_cart(cart, payment_method)
+        if confirmed is None:
             page.snack_bar = ft.SnackBar(
-                content=ft.Text(f"Order confirmed successfully! Order Code: {order_code}"),
-                bgcolor="#4CAF50"
+                content=ft.Text("No orders to confirm. Please add items before confirming."),
+                bgcolor="#F44336"
             )
             page.snack_bar.open = True
             page.update()
-            # Restore receipt container and modal
-            from datetime import datetime
-            now = datetime.now()
-            date_str = now.strftime('%d-%m-%Y')
-            time_str = now.strftime('%I:%M %p')
-            # Fetch the transaction and all its confirmed orders
-            _, payment_method, total_amount, confirmed_orders = fetch_transaction_and_orders(order_code)
-            user_id = page.session.get("user_id") if hasattr(page, 'session') else None
-            cashier_name = get_employee_full_name(user_id) if user_id else "User"
-            receipt_container = ft.Container(
-                alignment=ft.alignment.center,
-                content=ft.Column(
-                    controls=[
-                        ft.Container(
-                            content=ft.Column(
-                                controls=[
-                                    ft.Image(src="assets/logos/bigbrew_logo_black.png", width=50, height=50),
-                                    ft.Text("BIGBREW", size=20, weight="bold", text_align="center"),
-                                    ft.Text("San Jose, Jaro, Iloilo City\n5000 Iloilo, Iloilo City\n0919 718 9473",
-                                            size=12, text_align="center", color="black"),
-                                ],
-                                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                                spacing=5,
-                            ),
-                            padding=ft.padding.only(bottom=10),
-                            alignment=ft.alignment.center,
-                        ),
-                        ft.Divider(height=1, thickness=1, color="black"),
-                        ft.Row(
+            return  # Do not create a transaction if there are no orders
+        confirmed_orders = cart.rows()[::-1]  # Oldest first, as they were rung up
+        cart.clear()
+        invalidate("sales")
+
+        transaction_id = confirmed["transaction_id"]
+        order_code = confirmed["order_code"]
+        subtotal = confirmed["subtotal"]
+        grand_total = confirmed["grand_total"]
+        page.snack_bar = ft.SnackBar(
+            content=ft.Text(f"Order confirmed successfully! Order Code: {order_code}"),
+            bgcolor="#4CAF50"
+        )
+        page.snack_bar.open = True
+        page.update()
+        # Restore receipt container and modal
+        from datetime import datetime
+        now = datetime.now()
+        date_str = now.strftime('%d-%m-%Y')
+        time_str = now.strftime('%I:%M %p')
+        # The modal, the archived receipt and any saved file all come from the cart just confirmed
+        cashier_name = user_name
+        # Snapshot for the receipt worker; paid/change are reset by the next transaction.
+        # Every receipt is archived so it can be re-printed from the transactions view.
+        receipt = Receipt.from_orders(confirmed_orders, order_code, transaction_id, paid_amount, change_amount,
+                                      grand_total, payment_method, cashier_name, created_at=now)
+        receipt_worker.submit(ReceiptJob(receipt, on_error=on_receipt_failed))
+        receipt_container = ft.Container(
+            alignment=ft.alignment.center,
+            content=ft.Column(
+                controls=[
+                    ft.Container(
+                        content=ft.Column(
                             controls=[
-                                ft.Text(f"{date_str}\nTime: {time_str}", size=12, color="black"),
-                                ft.Text(f"Order Number: {transaction_id}\nOrder Code: {order_code}", size=12, color="black"),
+                                ft.Image(src="assets/logos/bigbrew_logo_black.png", width=50, height=50),
+                                ft.Text("BIGBREW", size=20, weight="bold", text_align="center"),
+                                ft.Text("San Jose, Jaro, Iloilo City\n5000 Iloilo, Iloilo City\n0919 718 9473",
+                                        size=12, text_align="center", color="black"),
                             ],
-                            alignment="spaceBetween",
+                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                            spacing=5,
                         ),
-                        ft.Divider(height=1, thickness=1, color="black"),
-                        ft.Container(
-                            content=ft.ListView(
-                                controls=[
-                                    ft.Row(
-                                        controls=[
-                                            ft.Text("Name", size=12, weight="bold", text_align="center"),
-                                            ft.Text("Size", size=12, weight="bold", text_align="center"),
-                                            ft.Text("Qty", size=12, weight="bold", text_align="center"),
-                                            ft.Text("Price", size=12, weight="bold", text_align="center"),
-                                        ],
-                                        alignment="spaceBetween",
-                                    ),
-                                    *[
-                                        ft.Row(
-                                            controls=[
-                                                ft.Text(order[1], size=12),
-                                                ft.Text(order[2], size=12),
-                                                ft.Text(str(order[4]), size=12),
-                                                ft.Text(f"₱{float(order[5]):.2f}", size=12),
-                                            ],
-                                            alignment="spaceBetween",
-                                        )
-                                        for order in confirmed_orders
+                        padding=ft.padding.only(bottom=10),
+                        alignment=ft.alignment.center,
+                    ),
+                    ft.Divider(height=1, thickness=1, color="black"),
+                    ft.Row(
+                        controls=[
+                            ft.Text(f"{date_str}\nTime: {time_str}", size=12, color="black"),
+                            ft.Text(f"Order Number: {transaction_id}\nOrder Code: {order_code}", size=12, color="black"),
+                        ],
+                        alignment="spaceBetween",
+                    ),
+                    ft.Divider(height=1, thickness=1, color="black"),
+                    ft.Container(
+                        content=ft.ListView(
+                            controls=[
+                                ft.Row(
+                                    controls=[
+                                        ft.Text("Name", size=12, weight="bold", text_align="center"),
+                                        ft.Text("Size", size=12, weight="bold", text_align="center"),
+                                        ft.Text("Qty", size=12, weight="bold", text_align="center"),
+                                        ft.Text("Price", size=12, weight="bold", text_align="center"),
                                     ],
-                                    ft.Divider(height=1, thickness=1, color="black"),
+                                    alignment="spaceBetween",
+                                ),
+                                *[
                                     ft.Row(
                                         controls=[
-                                            ft.Text("Add-ons", size=12, weight="bold", text_align="center"),
-                                            ft.Text("Price", size=12, weight="bold", text_align="center"),
+                                            ft.Text(order[1], size=12),
+                                            ft.Text(order[2], size=12),
+                                            ft.Text(str(order[4]), size=12),
+                                            ft.Text(f"₱{float(order[5]):.2f}", size=12),
                                         ],
                                         alignment="spaceBetween",
-                                    ),
-                                    *[
-                                        ft.Row(
-                                            controls=[
-                                                ft.Text(add_on, size=12),
-                                                ft.Text("₱9.00", size=12),
-                                            ],
-                                            alignment="spaceBetween",
-                                        )
-                                        for order in confirmed_orders if order[3]
-                                        for add_on in order[3].split(", ")
-                                    ],
+                                    )
+                                    for order in confirmed_orders
                                 ],
-                                spacing=5,
-                                height=200,
-                            ),
-                            padding=ft.padding.symmetric(vertical=10),
-                        ),
-                        ft.Container(
-                            content=ft.Column(
-                                controls=[
-                                    ft.Row(
-                                        controls=[
-                                            ft.Text("Subtotal:", size=12),
-                                            ft.Text(f"₱{float(subtotal):.2f}", size=12),
-                                        ],
-                                        alignment="spaceBetween",
-                                    ),
-                                    ft.Row(
-                                        controls=[
-                                            ft.Text("Payment Amount:", size=12),
-                                            ft.Text(f"₱{float(paid_amount):.2f}", size=12),
-                                        ],
-                                        alignment="spaceBetween",
-                                    ),
-                                    ft.Row(
-                                        controls=[
-                                            ft.Text("Change:", size=12),
-                                            ft.Text(f"₱{float(change_amount):.2f}", size=12),
-                                        ],
-                                        alignment="spaceBetween",
-                                    ),
-                                    ft.Row(
-                                        controls=[
-                                            ft.Text("Total:", size=14, weight="bold"),
-                                            ft.Text(f"₱{float(grand_total):.2f}", size=14, weight="bold"),
-                                        ],
-                                        alignment="spaceBetween",
-                                    ),
-                                    ft.Divider(height=1, thickness=1, color="black"),
+                                ft.Divider(height=1, thickness=1, color="black"),
+                                ft.Row(
+                                    controls=[
+                                        ft.Text("Add-ons", size=12, weight="bold", text_align="center"),
+                                        ft.Text("Price", size=12, weight="bold", text_align="center"),
+                                    ],
+                                    alignment="spaceBetween",
+                                ),
+                                *[
                                     ft.Row(
                                         controls=[
-                                            ft.Text("Payment Method:", size=12),
-                                            ft.Text(selected_payment_method or "Cash", size=12),
+                                            ft.Text(add_on, size=12),
+                                            ft.Text("₱9.00", size=12),
                                         ],
                                         alignment="spaceBetween",
-                                    ),
+                                    )
+                                    for order in confirmed_orders if order[3]
+                                    for add_on in order[3].split(", ")
                                 ],
-                                spacing=5,
-                            ),
-                            padding=ft.padding.symmetric(vertical=10),
+                            ],
+                            spacing=5,
+                            height=200,
                         ),
-                        ft.Container(
-                            content=ft.Column(
-                                controls=[
-                                    ft.Text(cashier_name, size=12, text_align="center"),
-                                    ft.Text("Cashier", size=12, text_align="center"),
-                                    ft.Text("Please come again!", size=12, text_align="center"),
-                                ],
-                                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                                spacing=5,
-                            ),
-                            padding=ft.padding.only(top=10),
+                        padding=ft.padding.symmetric(vertical=10),
+                    ),
+                    ft.Container(
+                        content=ft.Column(
+                            controls=[
+                                ft.Row(
+                                    controls=[
+                                        ft.Text("Subtotal:", size=12),
+                                        ft.Text(f"₱{float(subtotal):.2f}", size=12),
+                                    ],
+                                    alignment="spaceBetween",
+                                ),
+                                ft.Row(
+                                    controls=[
+                                        ft.Text("Payment Amount:", size=12),
+                                        ft.Text(f"₱{float(paid_amount):.2f}", size=12),
+                                    ],
+                                    alignment="spaceBetween",
+                                ),
+                                ft.Row(
+                                    controls=[
+                                        ft.Text("Change:", size=12),
+                                        ft.Text(f"₱{float(change_amount):.2f}", size=12),
+                                    ],
+                                    alignment="spaceBetween",
+                                ),
+                                ft.Row(
+                                    controls=[
+                                        ft.Text("Total:", size=14, weight="bold"),
+                                        ft.Text(f"₱{float(grand_total):.2f}", size=14, weight="bold"),
+                                    ],
+                                    alignment="spaceBetween",
+                                ),
+                                ft.Divider(height=1, thickness=1, color="black"),
+                                ft.Row(
+                                    controls=[
+                                        ft.Text("Payment Method:", size=12),
+                                        ft.Text(selected_payment_method or "Cash", size=12),
+                                    ],
+                                    alignment="spaceBetween",
+                                ),
+                            ],
+                            spacing=5,
                         ),
-                    ],
-                    spacing=10,
-                ),
-                width=350,
-                height=700,
-                bgcolor="white",
-                border_radius=10,
-                padding=ft.padding.all(20),
-                shadow=ft.BoxShadow(
-                    spread_radius=1,
-                    blur_radius=15,
-                    color=ft.Colors.with_opacity(0.2, ft.Colors.BLACK),
-                    offset=ft.Offset(0, 3),
-                ),
-            )
-            receipt_modal = ft.Container(
-                visible=True,
-                alignment=ft.alignment.center,
-                bgcolor=ft.Colors.with_opacity(0.5, ft.Colors.BLACK),
-                expand=True,
-                content=ft.Column(
-                    controls=[
-                        ft.Row([
-                            ft.Container(
-                                content=receipt_container,
-                                alignment=ft.alignment.center,
-                                expand=True
-                            )
-                        ], alignment="center", expand=True),
-                        ft.ElevatedButton(
-                            "Save Receipt",
-                            style=ft.ButtonStyle(
-                                bgcolor="#BB6F19",
-                                color="white",
-                                padding=ft.padding.symmetric(horizontal=20, vertical=10),
-                                shape=ft.RoundedRectangleBorder(radius=8),
-                            ),
-                            on_click=lambda e: save_receipt_as_image(receipt_container, order_code, date_str, time_str),
+                        padding=ft.padding.symmetric(vertical=10),
+                    ),
+                    ft.Container(
+                        content=ft.Column(
+                            controls=[
+                                ft.Text(cashier_name, size=12, text_align="center"),
+                                ft.Text("Cashier", size=12, text_align="center"),
+                                ft.Text("Please come again!", size=12, text_align="center"),
+                            ],
+                            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                            spacing=5,
                         ),
-                        ft.ElevatedButton(
-                            "Close",
-                            style=ft.ButtonStyle(
-                                bgcolor="#BB6F19",
-                                color="white",
-                                padding=ft.padding.symmetric(horizontal=20, vertical=10),
-                                shape=ft.RoundedRectangleBorder(radius=8),
-                            ),
-                            on_click=lambda e: close_receipt_modal(page),
+                        padding=ft.padding.only(top=10),
+                    ),
+                ],
+                spacing=10,
+            ),
+            width=350,
+            height=700,
+            bgcolor="white",
+            border_radius=10,
+            padding=ft.padding.all(20),
+            shadow=ft.BoxShadow(
+                spread_radius=1,
+                blur_radius=15,
+                color=ft.Colors.with_opacity(0.2, ft.Colors.BLACK),
+                offset=ft.Offset(0, 3),
+            ),
+        )
+        receipt_modal = ft.Container(
+            visible=True,
+            alignment=ft.alignment.center,
+            bgcolor=ft.Colors.with_opacity(0.5, ft.Colors.BLACK),
+            expand=True,
+            content=ft.Column(
+                controls=[
+                    ft.Row([
+                        ft.Container(
+                            content=receipt_container,
+                            alignment=ft.alignment.center,
+                            expand=True
+                        )
+                    ], alignment="center", expand=True),
+                    ft.ElevatedButton(
+                        "Save Receipt",
+                        style=ft.ButtonStyle(
+                            bgcolor="#BB6F19",
+                            color="white",
+                            padding=ft.padding.symmetric(horizontal=20, vertical=10),
+                            shape=ft.RoundedRectangleBorder(radius=8),
                         ),
-                    ],
-                    horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-                    spacing=10,
-                ),
-            )
-            page.overlay.append(receipt_modal)
-            # Add ESC key handler to close the modal
-            def on_key(e):
-                if e.key == "Escape":
-                    if receipt_modal in page.overlay:
-                        page.overlay.remove(receipt_modal)
-                        page.update()
-                        page.on_keyboard_event = None
-                        show_receipt_success_and_next()
-            page.on_keyboard_event = on_key
-            page.update()
+                        on_click=lambda e: save_receipt_as_image(receipt_modal, receipt),
+                    ),
+                    ft.ElevatedButton(
+                        "Close",
+                        style=ft.ButtonStyle(
+                            bgcolor="#BB6F19",
+                            color="white",
+                            padding=ft.padding.symmetric(horizontal=20, vertical=10),
+                            shape=ft.RoundedRectangleBorder(radius=8),
+                        ),
+                        on_click=lambda e: close_receipt_modal(page),
+                    ),
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                spacing=10,
+            ),
+        )
+        page.overlay.append(receipt_modal)
+        # Add ESC key handler to close the modal
+        def on_key(e):
+            if e.key == "Escape":
+                if receipt_modal in page.overlay:
+                    page.overlay.remove(receipt_modal)
+                    page.update()
+                    page.on_keyboard_event = None
+                    show_next_transaction_prompt()
+        page.on_keyboard_event = on_key
+        page.update()
     except Exception as e:
         print(f"Error confirming order: {str(e)}")
         page.snack_bar = ft.SnackBar(
@@ -1951,7 +1909,7 @@ def show_start_transaction_modal():
 
 def start_new_transaction(modal, prompt_text, transaction_code):
     # Clear any pending orders first
-    clear_pending_orders()
+    cart.clear()
     
     prompt_text.value = f"Starting Transaction {transaction_code}"
     prompt_text.visible = True
@@ -1963,71 +1921,13 @@ def start_new_transaction(modal, prompt_text, transaction_code):
             page.update()
     threading.Timer(2.0, close_modal).start()
 
-# Add this helper function near the top or with other DB helpers:
-def fetch_transaction_and_orders(order_code):
-    conn = get_db_connection()
-    if conn and conn.is_connected():
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT t.transaction_id, t.payment_method, t.total_amount
-            FROM transactions t
-            WHERE t.order_code = %s
-        """, (order_code,))
-        transaction = cursor.fetchone()
-        if transaction:
-            transaction_id, payment_method, total_amount = transaction
-            cursor.execute("""
-                SELECT o.order_id, o.product_name, o.size, o.add_ons, o.quantity, o.price, o.status, o.created_at, p.image_path, p.type
-                FROM orders o
-                LEFT JOIN products p ON o.product_name = p.name
-                WHERE o.transaction_id = %s AND o.status = 'Confirmed'
-            """, (transaction_id,))
-            orders = cursor.fetchall()
-            cursor.close()
-            conn.close()
-            return transaction_id, payment_method, total_amount, orders
-        cursor.close()
-        conn.close()
-    return None, None, None, []
-
-def show_receipt_success_and_next():
-    # Show a simple success message with an icon, then after a short delay, show the next transaction prompt
-    success_row = ft.Row([
-        ft.Icon(ft.Icons.CHECK_CIRCLE, color="#4CAF50", size=32),
-        ft.Text("Receipt saved successfully!", size=18, weight="bold", color="#4CAF50"),
-    ], alignment="center", spacing=10)
-    modal = ft.Container(
-        visible=True,
-        alignment=ft.alignment.center,
-        bgcolor=ft.Colors.with_opacity(0.5, ft.Colors.BLACK),
-        expand=True,
-        content=ft.Container(
-            width=400,
-            height=120,
-            bgcolor="white",
-            border_radius=15,
-            padding=ft.padding.all(20),
-            content=ft.Column([
-                ft.Container(content=success_row, alignment=ft.alignment.center),
-            ], alignment=ft.MainAxisAlignment.CENTER, horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True),
-        ),
-    )
-    page.overlay.append(modal)
-    page.update()
-    import threading
-    def after_success():
-        if modal in page.overlay:
-            page.overlay.remove(modal)
-        show_next_transaction_prompt()
-    threading.Timer(1.5, after_success).start()
-
 def show_next_transaction_prompt():
     prompt_text = ft.Text("Start next transaction?", size=20, weight="bold", text_align="center", color="#BB6F19")
     info_text = ft.Text("Would you like to begin a new order?", size=15, color="#7B6B63", text_align="center")
     def do_start_next_transaction(e):
         global selected_index, paid_amount, change_amount
         page.overlay.clear()
-        clear_pending_orders()
+        cart.clear()
         selected_index = 0  # Go back to Milk Tea tab
         paid_amount = 0
         change_amount = 0
@@ -2099,192 +1999,43 @@ def show_next_transaction_prompt():
     page.overlay.append(modal)
     page.update()
 
-def save_receipt_as_image(receipt_container, order_code, date_str, time_str):
-    try:
-        # Create receipts directory if it doesn't exist
-        receipts_dir = os.path.join(os.getcwd(), "receipts")
-        if not os.path.exists(receipts_dir):
-            os.makedirs(receipts_dir)
-
-        # Fetch the transaction and all its confirmed orders
-        transaction_id, payment_method, total_amount, orders = fetch_transaction_and_orders(order_code)
-        if not orders:
-            page.snack_bar = ft.SnackBar(
-                content=ft.Text("Error: No confirmed orders found for this transaction"),
-                bgcolor="#F44336"
-            )
-            page.snack_bar.open = True
-            page.update()
-            return
-
-        # Use global paid_amount and change_amount for the receipt
-        paid_amount_float = float(paid_amount)
-        change_amount_float = float(change_amount)
-        total_amount_float = float(total_amount)
-
-        # Fetch the cashier's first name from the session user_id
-        user_id = page.session.get("user_id") if hasattr(page, 'session') else None
-        cashier_name = get_employee_full_name(user_id) if user_id else "User"
-
-        # Generate receipt image
-        receipt_img = generate_receipt_image(
-            orders=orders,
-            order_code=order_code,
-            date_str=date_str,
-            time_str=time_str,
-            transaction_id=transaction_id,
-            paid_amount=paid_amount_float,
-            change_amount=change_amount_float,
-            grand_total=total_amount_float,
-            selected_payment_method=payment_method,
-            cashier_name=cashier_name
-        )
+def save_receipt_as_image(receipt_modal, receipt):
+    """Queue the receipt file for the background worker and move straight on to the next order."""
+    if receipt_modal not in page.overlay:
+        return  # Already queued
+    receipt_worker.submit(ReceiptJob(receipt, archive=False, save=True,
+                                     on_done=on_receipt_saved, on_error=on_receipt_failed))
+    page.overlay.remove(receipt_modal)
+    page.on_keyboard_event = None
+    page.update()
+    show_next_transaction_prompt()
 
-        # Save the image with timestamp
-        timestamp = datetime.datetime.now().strftime("%d%m%Y_%I%M%p")
-        filename = os.path.join(receipts_dir, f"receipt_{order_code}_{timestamp}.png")
-        receipt_img.save(filename)
-        print(f"Receipt saved successfully as: {filename}")
+def on_receipt_saved(receipt_job, filename):
+    # Runs on the receipt worker's thread
+    page.snack_bar = ft.SnackBar(
+        content=ft.Text(f"Receipt {receipt_job.order_code} saved as: {filename}"),
+        bgcolor="#4CAF50"
+    )
+    page.snack_bar.open = True
+    page.update()
 
-        # Show success message to user
-        page.snack_bar = ft.SnackBar(
-            content=ft.Text(f"Receipt saved successfully as: {filename}"),
-            bgcolor="#4CAF50"
-        )
-        page.snack_bar.open = True
-        page.update()
-        show_receipt_success_and_next()
-    except Exception as e:
-        print(f"Error saving receipt: {str(e)}")
-        page.snack_bar = ft.SnackBar(
-            content=ft.Text(f"Error saving receipt: {str(e)}"),
-            bgcolor="#F44336"
-        )
-        page.snack_bar.open = True
-        page.update()
-        show_receipt_success_and_next()
+def on_receipt_failed(receipt_job, error):
+    page.snack_bar = ft.SnackBar(
+        content=ft.Text(f"Error saving receipt {receipt_job.order_code}: {error}"),
+        bgcolor="#F44336"
+    )
+    page.snack_bar.open = True
+    page.update()
 
 def close_receipt_modal(page):
     page.overlay.clear()  # Clear all elements from the overlay
     page.update()  # Update the page to reflect changes
     page.on_keyboard_event = None  # Remove ESC handler
-    show_receipt_success_and_next()
-
-def generate_receipt_image(orders, order_code, date_str, time_str, transaction_id, paid_amount, change_amount, grand_total, selected_payment_method, cashier_name="Cashier"):
-    RECEIPT_WIDTH = 400
-    MARGIN = 20
-    LINE_HEIGHT = 20
-    SECTION_SPACING = 10
-    LOGO_WIDTH = 70
-    LOGO_HEIGHT = 50
-    # Calculate total height needed dynamically
-    header_height = 150
-    order_info_height = 40
-    items_height = len(orders) * LINE_HEIGHT
-    add_ons_height = sum(len(order[3].split(", ")) if order[3] else 0 for order in orders) * LINE_HEIGHT
-    summary_height = 150
-    footer_lines = 4
-    footer_height = footer_lines * LINE_HEIGHT
-    section_count = 6
-    total_height = header_height + order_info_height + items_height + add_ons_height + summary_height + footer_height + (SECTION_SPACING * section_count)
-    img = Image.new('RGB', (RECEIPT_WIDTH, total_height), 'white')
-    draw = ImageDraw.Draw(img)
-    try:
-        title_font = ImageFont.truetype("arial.ttf", 20)
-        header_font = ImageFont.truetype("arial.ttf", 16)
-        normal_font = ImageFont.truetype("arial.ttf", 12)
-    except:
-        title_font = ImageFont.load_default()
-        header_font = ImageFont.load_default()
-        normal_font = ImageFont.load_default()
-    y = MARGIN
-    try:
-        logo = Image.open("assets/logos/bigbrew_logo_black.png")
-        logo = logo.resize((LOGO_WIDTH, LOGO_HEIGHT))
-        logo_x = (RECEIPT_WIDTH - LOGO_WIDTH) // 2
-        if logo.mode in ("RGBA", "LA"):
-            img.paste(logo, (logo_x, y), logo)
-        else:
-            img.paste(logo, (logo_x, y))
-        y += LOGO_HEIGHT + 10
-    except Exception as e:
-        print(f"Logo error: {e}")
-        pass
-    draw.text((RECEIPT_WIDTH//2, y), "BIGBREW", font=title_font, fill='black', anchor="mm")
-    y += 30
-    draw.text((RECEIPT_WIDTH//2, y), "San Jose, Jaro, Iloilo City", font=normal_font, fill='black', anchor="mm")
-    y += 20
-    draw.text((RECEIPT_WIDTH//2, y), "5000 Iloilo, Iloilo City", font=normal_font, fill='black', anchor="mm")
-    y += 20
-    draw.text((RECEIPT_WIDTH//2, y), "0919 718 9473", font=normal_font, fill='black', anchor="mm")
-    y += 30
-    draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
-    y += SECTION_SPACING
-    draw.text((MARGIN, y), f"{date_str}\nTime: {time_str}", font=normal_font, fill='black')
-    draw.text((RECEIPT_WIDTH - MARGIN, y), f"Order Number: {transaction_id}\nOrder Code: {order_code}", font=normal_font, fill='black', anchor="ra")
-    y += 40
-    draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
-    y += SECTION_SPACING
-    draw.text((MARGIN, y), "Name", font=header_font, fill='black')
-    draw.text((RECEIPT_WIDTH - MARGIN, y), "Price", font=header_font, fill='black', anchor="ra")
-    y += LINE_HEIGHT
-    subtotal = 0.0
-    for order in orders:
-        draw.text((MARGIN, y), f"{order[1]} ({order[2]}) x{order[4]}", font=normal_font, fill='black')
-        item_total = float(order[5])
-        draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{item_total:.2f}", font=normal_font, fill='black', anchor="ra")
-        subtotal += item_total
-        y += LINE_HEIGHT
-        if order[3]:
-            for add_on in order[3].split(", "):
-                draw.text((MARGIN + 10, y), f"+ {add_on}", font=normal_font, fill='black')
-                add_on_price = 9.00
-                draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{add_on_price:.2f}", font=normal_font, fill='black', anchor="ra")
-                subtotal += add_on_price
-                y += LINE_HEIGHT
-    draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
-    y += SECTION_SPACING
-    draw.text((MARGIN, y), "Subtotal:", font=normal_font, fill='black')
-    draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{subtotal:.2f}", font=normal_font, fill='black', anchor="ra")
-    y += LINE_HEIGHT
-    draw.text((MARGIN, y), "Payment Amount:", font=normal_font, fill='black')
-    draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{float(paid_amount):.2f}", font=normal_font, fill='black', anchor="ra")
-    y += LINE_HEIGHT
-    draw.text((MARGIN, y), "Change:", font=normal_font, fill='black')
-    draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{float(change_amount):.2f}", font=normal_font, fill='black', anchor="ra")
-    y += LINE_HEIGHT
-    draw.text((MARGIN, y), "Total:", font=header_font, fill='black')
-    draw.text((RECEIPT_WIDTH - MARGIN, y), f"₱{float(grand_total):.2f}", font=header_font, fill='black', anchor="ra")
-    y += LINE_HEIGHT
-    draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
-    y += SECTION_SPACING
-    draw.text((MARGIN, y), "Payment Method:", font=header_font, fill='black')
-    draw.text((RECEIPT_WIDTH - MARGIN, y), selected_payment_method or "Cash", font=normal_font, fill='black', anchor="ra")
-    y += LINE_HEIGHT
-    draw.line([(MARGIN, y), (RECEIPT_WIDTH - MARGIN, y)], fill='black', width=1)
-    y += SECTION_SPACING
-    draw.text((RECEIPT_WIDTH//2, y), "Thank You!", font=header_font, fill='black', anchor="mm")
-    y += LINE_HEIGHT
-    draw.text((RECEIPT_WIDTH//2, y), cashier_name, font=normal_font, fill='black', anchor="mm")
-    y += LINE_HEIGHT
-    draw.text((RECEIPT_WIDTH//2, y), "Cashier", font=normal_font, fill='black', anchor="mm")
-    y += LINE_HEIGHT
-    draw.text((RECEIPT_WIDTH//2, y), "Please come again!", font=normal_font, fill='black', anchor="mm")
-    return img
+    show_next_transaction_prompt()  # Nothing was saved; on_receipt_saved reports a saved file
 
 def update_review_order_count():
     global categories
-    count = 0
-    try:
-        conn = get_db_connection()
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM orders WHERE status = 'Pending'")
-            count = cursor.fetchone()[0]
-            cursor.close()
-            conn.close()
-    except Exception as e:
-        print(f"Error fetching review order count: {str(e)}")
+    count = len(cart)
     # Update the Review Order category count
     for i, cat in enumerate(categories):
         if cat[0] == "Review Order":
@@ -1,27 +1,16 @@
 import flet as ft
-from config.database import get_db_connection
+from config.database import get_db_connection, db_cursor, get_admin_full_name
+from utils.cache import invalidate
+from utils.catalog import catalog
+from utils.media import rendition_columns
+from utils.uploads import start_upload, UploadError, acquire, release, remove_if_orphaned
+from views.components.loading import skeleton, load_in_background
 import os
 from datetime import datetime
 import threading  # Import threading for Timer
 
 CATEGORIES = ["All", "Milk Tea", "Iced Coffee", "Fruit Tea", "Hot Brew"]
 
-def get_admin_full_name():
-    try:
-        conn = get_db_connection()
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
-            cursor.execute("SELECT full_name FROM admin LIMIT 1")
-            admin = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            return admin[0] if admin else "Admin"
-    except Exception as e:
-        print(f"Error fetching admin name: {e}")
-        return "Admin"
-
-admin_full_name = get_admin_full_name()
-
 # Define page globally at the top of the file
 page = None  # Placeholder for the Page object, will be set in products_view()
 
@@ -172,10 +161,13 @@ def products_view(page_obj: ft.Page):
         # Reset photo preview and upload status
         add_photo_preview.content = None
         add_photo_preview.visible = True
-        nonlocal add_uploaded_photo_path
+        nonlocal add_uploaded_photo_path, add_uploaded_renditions
         add_uploaded_photo_path = None
+        add_uploaded_renditions = None
         add_photo_upload_status.value = ""
         add_photo_upload_status.visible = True
+        upload_tokens["add"] += 1  # Drop any upload still running for the old form
+        add_photo_progress.visible = False
 
     def show_add_product_form(e):
         # Always start with empty form
@@ -233,11 +225,15 @@ def products_view(page_obj: ft.Page):
                 relative_path = os.path.relpath(add_uploaded_photo_path)
                 print(f"Saving image path to database: {relative_path}")  # Debug print
 
+                # Made by the upload worker, so saving never decodes the image here
+                card_path, preview_path = (os.path.relpath(path) for path in add_uploaded_renditions)
+
                 # Save to database with the image path
                 cursor.execute(
                     """
-                    INSERT INTO products (product_id, name, type, price, availability, image_path)
-                    VALUES (%s, %s, %s, %s, %s, %s)
+                    INSERT INTO products (product_id, name, type, price, availability, image_path,
+                                          image_card_path, image_preview_path)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
                     """,
                     (
                         product_id,
@@ -245,12 +241,25 @@ def products_view(page_obj: ft.Page):
                         add_type_dropdown.value,
                         float(add_price_field.value),
                         add_availability_dropdown.value,
-                        relative_path  # Store the relative path
+                        relative_path,  # Store the relative path
+                        card_path,
+                        preview_path
                     )
                 )
+                acquire(cursor, relative_path)
                 conn.commit()
                 cursor.close()
                 conn.close()
+                invalidate("products")
+                catalog.upsert(
+                    product_id,
+                    add_name_field.value,
+                    add_type_dropdown.value,
+                    float(add_price_field.value),
+                    add_availability_dropdown.value,
+                    relative_path,
+                    image_card_path=card_path
+                )
 
                 # Clear form fields BEFORE showing success modal
                 clear_add_form_fields()
@@ -351,6 +360,7 @@ def products_view(page_obj: ft.Page):
 
     # Separate photo preview and status for add and edit modals
     add_uploaded_photo_path = None
+    add_uploaded_renditions = None  # Rendition paths in RENDITION_COLUMNS order
     add_photo_preview = ft.Container(
         content=None,
         border_radius=8,
@@ -370,6 +380,7 @@ def products_view(page_obj: ft.Page):
     )
 
     edit_uploaded_photo_path = None
+    edit_uploaded_renditions = None
     edit_photo_preview = ft.Container(
         content=None,
         border_radius=8,
@@ -388,40 +399,65 @@ def products_view(page_obj: ft.Page):
         visible=True
     )
 
+    add_photo_progress = ft.ProgressBar(width=110, value=0, color="#BB6F19", bgcolor=ft.Colors.GREY_300, visible=False)
+    edit_photo_progress = ft.ProgressBar(width=110, value=0, color="#BB6F19", bgcolor=ft.Colors.GREY_300, visible=False)
+    upload_tokens = {"add": 0, "edit": 0}  # Latest upload per dialog; older ones finishing late are ignored
+
+    def run_photo_upload(dialog, file, preview, status, progress_bar, set_path):
+        # Copy, hash and resize on a background thread so the dialog stays responsive
+        upload_tokens[dialog] += 1
+        token = upload_tokens[dialog]
+        status.value = f"Uploading {file.name}..."
+        status.color = ft.Colors.GREY
+        status.visible = True
+        progress_bar.value = 0
+        progress_bar.visible = True
+        page.update()
+
+        def on_progress(fraction):
+            if token == upload_tokens[dialog]:
+                progress_bar.value = fraction
+                progress_bar.update()
+
+        def on_done(path, renditions):
+            if token != upload_tokens[dialog]:
+                return
+            set_path(path, renditions)
+            progress_bar.visible = False
+            status.value = f"Uploaded: {file.name}"
+            status.color = ft.Colors.GREY
+            preview.content = ft.Image(
+                src=os.path.abspath(renditions["preview"]),
+                width=100,
+                height=100,
+                fit=ft.ImageFit.COVER,
+                border_radius=8,
+                repeat=ft.ImageRepeat.NO_REPEAT,
+                gapless_playback=True
+            )
+            preview.visible = True
+            page.update()
+
+        def on_error(error):
+            if token != upload_tokens[dialog]:
+                return
+            progress_bar.visible = False
+            preview.content = None
+            status.value = str(error) if isinstance(error, UploadError) else "Error uploading image"
+            status.color = ft.Colors.RED
+            page.update()
+
+        start_upload(file.path, on_progress=on_progress, on_done=on_done, on_error=on_error)
+
     # Add modal upload handler
     def handle_add_photo_upload(file):
-        nonlocal add_uploaded_photo_path
+        def set_path(path, renditions):
+            nonlocal add_uploaded_photo_path, add_uploaded_renditions
+            add_uploaded_photo_path = path
+            add_uploaded_renditions = rendition_columns(renditions)
+
         if file:
-            try:
-                os.makedirs("uploads", exist_ok=True)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                file_extension = os.path.splitext(file.name)[1]
-                new_filename = f"{timestamp}{file_extension}"
-                add_uploaded_photo_path = os.path.join("uploads", new_filename)
-                abs_upload_path = os.path.abspath(add_uploaded_photo_path)
-                with open(abs_upload_path, "wb") as f:
-                    with open(file.path, "rb") as source_file:
-                        f.write(source_file.read())
-                add_photo_upload_status.value = f"Uploaded: {file.name}"
-                add_photo_upload_status.color = ft.Colors.GREY
-                add_photo_upload_status.visible = True
-                add_photo_preview.content = ft.Image(
-                    src=abs_upload_path,
-                    width=100,
-                    height=100,
-                    fit=ft.ImageFit.COVER,
-                    border_radius=8,
-                    repeat=ft.ImageRepeat.NO_REPEAT,
-                    gapless_playback=True
-                )
-                add_photo_preview.visible = True
-                page.update()
-            except Exception as e:
-                add_photo_preview.content = None
-                add_photo_upload_status.value = "Error uploading image"
-                add_photo_upload_status.color = ft.Colors.RED
-                add_photo_upload_status.visible = True
-                page.update()
+            run_photo_upload("add", file, add_photo_preview, add_photo_upload_status, add_photo_progress, set_path)
         else:
             add_photo_preview.content = None
             add_photo_upload_status.value = ""
@@ -430,38 +466,13 @@ def products_view(page_obj: ft.Page):
 
     # Edit modal upload handler
     def handle_edit_photo_upload(file):
-        nonlocal edit_uploaded_photo_path
+        def set_path(path, renditions):
+            nonlocal edit_uploaded_photo_path, edit_uploaded_renditions
+            edit_uploaded_photo_path = path
+            edit_uploaded_renditions = rendition_columns(renditions)
+
         if file:
-            try:
-                os.makedirs("uploads", exist_ok=True)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                file_extension = os.path.splitext(file.name)[1]
-                new_filename = f"{timestamp}{file_extension}"
-                edit_uploaded_photo_path = os.path.join("uploads", new_filename)
-                abs_upload_path = os.path.abspath(edit_uploaded_photo_path)
-                with open(abs_upload_path, "wb") as f:
-                    with open(file.path, "rb") as source_file:
-                        f.write(source_file.read())
-                edit_photo_upload_status.value = f"Uploaded: {file.name}"
-                edit_photo_upload_status.color = ft.Colors.GREY
-                edit_photo_upload_status.visible = True
-                edit_photo_preview.content = ft.Image(
-                    src=abs_upload_path,
-                    width=100,
-                    height=100,
-                    fit=ft.ImageFit.COVER,
-                    border_radius=8,
-                    repeat=ft.ImageRepeat.NO_REPEAT,
-                    gapless_playback=True
-                )
-                edit_photo_preview.visible = True
-                page.update()
-            except Exception as e:
-                edit_photo_preview.content = None
-                edit_photo_upload_status.value = "Error uploading image"
-                edit_photo_upload_status.color = ft.Colors.RED
-                edit_photo_upload_status.visible = True
-                page.update()
+            run_photo_upload("edit", file, edit_photo_preview, edit_photo_upload_status, edit_photo_progress, set_path)
         else:
             edit_photo_preview.content = None
             edit_photo_upload_status.value = ""
@@ -521,6 +532,7 @@ def products_view(page_obj: ft.Page):
                     padding=ft.padding.symmetric(horizontal=20, vertical=10)
                 )
             ),
+            add_photo_progress,
             ft.Container(
                 content=add_photo_upload_status,
                 padding=ft.padding.symmetric(vertical=5),
@@ -556,6 +568,7 @@ def products_view(page_obj: ft.Page):
                     padding=ft.padding.symmetric(horizontal=20, vertical=10)
                 )
             ),
+            edit_photo_progress,
             ft.Container(
                 content=edit_photo_upload_status,
                 padding=ft.padding.symmetric(vertical=5),
@@ -753,26 +766,17 @@ def products_view(page_obj: ft.Page):
     # Fetch products from the database
     def fetch_products():
         try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
+            with db_cursor() as cursor:
                 cursor.execute("SELECT product_id, name, type, price, availability FROM products ORDER BY product_id")
-                products = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return products
-            else:
-                print("Error: Unable to connect to the database.")  # Debugging: Connection failure
-                show_message_dialog("Error", "Unable to connect to the database.")
-                return []
+                return cursor.fetchall()
         except Exception as e:
             print(f"Error fetching products: {str(e)}")  # Debugging: Exception details
             show_message_dialog("Error", f"Unable to fetch products: {str(e)}")
             return []
 
-    # Initialize products list and filtered products
-    products = fetch_products()
-    filtered_products = products.copy()  # Start with all products
+    # Initialize products list and filtered products; filled in by show_products
+    products = []
+    filtered_products = []
     current_filter = "All"  # Track current filter type
     search_query = ""  # Track current search query
 
@@ -907,43 +911,10 @@ def products_view(page_obj: ft.Page):
                                 ft.DataColumn(ft.Text("Status", weight="bold")),
                                 ft.DataColumn(ft.Text("Actions", weight="bold")),
                             ],
+                            # Skeleton rows until the products arrive (see show_products)
                             rows=[
-                                ft.DataRow(
-                                    cells=[
-                                        ft.DataCell(ft.Text(product[0])),
-                                        ft.DataCell(ft.Text(product[1])),
-                                        ft.DataCell(ft.Text(product[2])),
-                                        ft.DataCell(ft.Text(f"₱{product[3]:.2f}")),
-                                        ft.DataCell(
-                                            ft.Container(
-                                                content=ft.Text(product[4], weight="bold"),
-                                                bgcolor=(
-                                                    "#DFF2BF" if product[4] == "Available" else
-                                                    "#FFE6CC" if product[4] == "Limited" else
-                                                    "#E0E0E0"
-                                                ),
-                                                padding=ft.padding.symmetric(horizontal=10, vertical=5),
-                                                border_radius=5
-                                            )
-                                        ),
-                                        ft.DataCell(
-                                            ft.Row([
-                                                ft.IconButton(
-                                                    icon=ft.Icons.EDIT,
-                                                    icon_color=ft.Colors.BLUE,
-                                                    tooltip="Edit",
-                                                    on_click=lambda e, pid=product[0]: show_edit_product_form(pid)
-                                                ),
-                                                ft.IconButton(
-                                                    icon=ft.Icons.DELETE,
-                                                    icon_color=ft.Colors.RED,
-                                                    tooltip="Delete",
-                                                    on_click=lambda e, pid=product[0], pname=product[1]: delete_product(pid, pname)
-                                                )
-                                            ])
-                                        )
-                                    ]
-                                ) for product in filtered_products
+                                ft.DataRow(cells=[ft.DataCell(skeleton(width=width)) for width in (60, 140, 90, 60, 80, 70)])
+                                for _ in range(8)
                             ]
                         )
                     ],
@@ -961,19 +932,15 @@ def products_view(page_obj: ft.Page):
 
     def refresh_table():
         try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
+            with db_cursor() as cursor:
                 cursor.execute("SELECT product_id, name, type, price, availability FROM products ORDER BY product_id")
                 fetched_products = cursor.fetchall()
-                cursor.close()
-                conn.close()
 
-                # Update both products and filtered_products
-                nonlocal products, filtered_products
-                products = fetched_products
-                # Reapply current filter and search
-                filter_and_search()
+            # Update both products and filtered_products
+            nonlocal products, filtered_products
+            products = fetched_products
+            # Reapply current filter and search
+            filter_and_search()
         except Exception as e:
             print(f"Error refreshing table: {str(e)}")
             show_message_dialog("Error", f"Unable to refresh table: {str(e)}")
@@ -985,10 +952,18 @@ def products_view(page_obj: ft.Page):
                 conn = get_db_connection()
                 if conn and conn.is_connected():
                     cursor = conn.cursor()
+                    cursor.execute("SELECT image_path FROM products WHERE product_id = %s", (product_id,))
+                    row = cursor.fetchone()
+                    image_path = row[0] if row else None
                     cursor.execute("DELETE FROM products WHERE product_id = %s", (product_id,))
+                    release(cursor, image_path)
                     conn.commit()
                     cursor.close()
                     conn.close()
+                    # Only removes the image if no other product uses the same file
+                    remove_if_orphaned(image_path)
+                    invalidate("products")
+                    catalog.remove(product_id)
                     refresh_table()  # Refresh the table after deletion
                     show_message_dialog("Success", f"Product '{product_name}' deleted successfully!")
             except Exception as ex:
@@ -1072,7 +1047,7 @@ def products_view(page_obj: ft.Page):
         conn = get_db_connection()
         if conn and conn.is_connected():
             cursor = conn.cursor()
-            cursor.execute("SELECT name, type, price, availability, image_path FROM products WHERE product_id = %s", (product_id,))
+            cursor.execute("SELECT name, type, price, availability, image_path, image_preview_path, image_card_path FROM products WHERE product_id = %s", (product_id,))
             product = cursor.fetchone()
             cursor.close()
             conn.close()
@@ -1085,16 +1060,18 @@ def products_view(page_obj: ft.Page):
                 edit_availability_dropdown.value = product[3]  # Availability
                 
                 # Handle the photo
-                nonlocal edit_uploaded_photo_path
+                nonlocal edit_uploaded_photo_path, edit_uploaded_renditions
                 edit_uploaded_photo_path = product[4]  # Set the uploaded photo path
+                edit_uploaded_renditions = (product[6], product[5])  # Kept unless a new image is uploaded
                 if edit_uploaded_photo_path:
                     try:
                         # Get absolute path for the image
                         abs_image_path = os.path.abspath(edit_uploaded_photo_path)
                         if os.path.exists(abs_image_path):
-                            # Display the uploaded photo in the preview
+                            # Display the uploaded photo in the preview, small rendition when there is one
+                            preview_path = product[5] if product[5] and os.path.exists(product[5]) else edit_uploaded_photo_path
                             edit_photo_preview.content = ft.Image(
-                                src=abs_image_path,
+                                src=os.path.abspath(preview_path),
                                 width=100,
                                 height=100,
                                 fit=ft.ImageFit.COVER,
@@ -1145,9 +1122,11 @@ def products_view(page_obj: ft.Page):
             if conn and conn.is_connected():
                 cursor = conn.cursor()
 
+                old_product_id = product_id_to_edit
+
                 # Check if the type has changed
-                cursor.execute("SELECT type FROM products WHERE product_id = %s", (product_id_to_edit,))
-                current_type = cursor.fetchone()[0]
+                cursor.execute("SELECT type, image_path FROM products WHERE product_id = %s", (product_id_to_edit,))
+                current_type, old_image_path = cursor.fetchone()
                 new_type = edit_type_dropdown.value
 
                 # Update product ID if the type has changed
@@ -1177,11 +1156,15 @@ def products_view(page_obj: ft.Page):
                     )
                     product_id_to_edit = new_product_id  # Update the variable
 
+                # From the upload worker, or the product's own; python -m utils.media renditions fills in older images
+                card_path, preview_path = edit_uploaded_renditions if edit_uploaded_photo_path else (None, None)
+
                 # Update the product details
                 cursor.execute(
                     """
                     UPDATE products
-                    SET name = %s, type = %s, price = %s, availability = %s, image_path = %s
+                    SET name = %s, type = %s, price = %s, availability = %s, image_path = %s,
+                        image_card_path = %s, image_preview_path = %s
                     WHERE product_id = %s
                     """,
                     (
@@ -1190,12 +1173,31 @@ def products_view(page_obj: ft.Page):
                         float(edit_price_field.value),
                         edit_availability_dropdown.value,
                         edit_uploaded_photo_path,
+                        card_path,
+                        preview_path,
                         product_id_to_edit
                     )
                 )
+                image_changed = old_image_path != edit_uploaded_photo_path
+                if image_changed:
+                    release(cursor, old_image_path)
+                    acquire(cursor, edit_uploaded_photo_path)
                 conn.commit()
                 cursor.close()
                 conn.close()
+                if image_changed:
+                    remove_if_orphaned(old_image_path)
+                invalidate("products")
+                catalog.upsert(
+                    product_id_to_edit,
+                    edit_name_field.value,
+                    new_type,
+                    float(edit_price_field.value),
+                    edit_availability_dropdown.value,
+                    edit_uploaded_photo_path,
+                    image_card_path=card_path,
+                    old_product_id=old_product_id
+                )
 
                 # Create success message container
                 success_container = ft.Container(
@@ -1474,13 +1476,19 @@ def products_view(page_obj: ft.Page):
                         ]
                     ) for product in filtered_products
                 ]
-                data_table.update()
+                if data_table.page:  # Not yet on screen when the first load lands
+                    data_table.update()
 
     # Get current date and time
     today = datetime.now()
     day_str = today.strftime('%A')
     date_str = today.strftime('%d %B %Y')
 
+    profile_name = ft.Container(skeleton(width=120, height=18))
+
+    def show_profile_name(full_name):
+        profile_name.content = ft.Text(full_name, weight="bold", size=16, font_family="Poppins")
+
     # User profile card
     def user_profile_card():
         def handle_logout(page):
@@ -1561,7 +1569,7 @@ def products_view(page_obj: ft.Page):
                     radius=18
                 ),
                 ft.Column([
-                    ft.Text(admin_full_name, weight="bold", size=16, font_family="Poppins"),
+                    profile_name,
                     ft.Text("Barista", size=12, color=ft.Colors.GREY, font_family="Poppins")
                 ], spacing=0),
                 ft.IconButton(
@@ -1577,6 +1585,19 @@ def products_view(page_obj: ft.Page):
             shadow=ft.BoxShadow(blur_radius=4, color=ft.Colors.with_opacity(0.1, ft.Colors.BLACK)),
         )
 
+    def show_products(fetched_products):
+        nonlocal products
+        products = fetched_products
+        filter_and_search()
+
+    # The table shows skeleton rows until this returns
+    load_in_background(page, fetch_products, show_products)
+    load_in_background(page, get_admin_full_name, show_profile_name)
+
+    def refresh_view():
+        # Keeps the selected category and search text
+        load_in_background(page, fetch_products, show_products)
+
     # Main layout
     return ft.Container(
         content=ft.Column(
@@ -1607,5 +1628,6 @@ def products_view(page_obj: ft.Page):
             spacing=20
         ),
         padding=20,
-        expand=True
+        expand=True,
+        data={"refresh": refresh_view},  # Used by Navigation when the view's data goes stale
     )
\ No newline at end of file
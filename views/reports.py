@@ -1,99 +1,18 @@
 import flet as ft
 from config.database import get_db_connection, get_employee_full_name
+from config.rollup import fetch_sales_totals, fetch_type_quantities, get_products_ordered_series, PROFIT_MARGIN
+from views.components.loading import skeleton, load_in_background
 import os
 import datetime
 
-# Cache for storing generated charts
-chart_cache = {}
-
 class ReportState:
     def __init__(self):
         self.filter = "today"  # Default timeline set to "today"
 
 state = ReportState()
 
-def get_admin_full_name():
-    try:
-        conn = get_db_connection()
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
-            cursor.execute("SELECT full_name FROM admin LIMIT 1")
-            admin = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            return admin[0] if admin else "Admin"
-    except Exception as e:
-        print(f"Error fetching admin name: {e}")
-        return "Admin"
-
-admin_full_name = get_admin_full_name()
-
-def get_products_ordered_by_hour(date):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    results = []
-    for hour in range(13, 20):  # 1PM (13) to 7PM (19)
-        start = datetime.datetime.combine(date, datetime.time(hour, 0, 0))
-        end = start + datetime.timedelta(hours=1)
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(quantity), 0)
-            FROM orders
-            WHERE created_at >= %s AND created_at < %s
-            """,
-            (start, end)
-        )
-        count = cursor.fetchone()[0]
-        results.append(count)
-    cursor.close()
-    conn.close()
-    return results
-
-def get_products_ordered_by_day(start_date, days):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    results = []
-    for i in range(days):
-        day = start_date + datetime.timedelta(days=i)
-        start = datetime.datetime.combine(day, datetime.time(0, 0, 0))
-        end = start + datetime.timedelta(days=1)
-        cursor.execute(
-            """
-            SELECT COALESCE(SUM(quantity), 0)
-            FROM orders
-            WHERE created_at >= %s AND created_at < %s
-            """,
-            (start, end)
-        )
-        count = cursor.fetchone()[0]
-        results.append(count)
-    cursor.close()
-    conn.close()
-    return results
-
-def get_product_type_statistics():
-    conn = get_db_connection()
-    if conn and conn.is_connected():
-        cursor = conn.cursor()
-        try:
-            # Get the sum of quantities for each product type from orders
-            cursor.execute("""
-                SELECT p.type, COALESCE(SUM(o.quantity), 0) as total_quantity
-                FROM products p
-                LEFT JOIN orders o ON p.name = o.product_name
-                WHERE o.status != 'Pending'
-                GROUP BY p.type
-                ORDER BY total_quantity DESC
-            """)
-            results = cursor.fetchall()
-            return results
-        except Exception as e:
-            print(f"Error getting product statistics: {e}")
-            return []
-        finally:
-            cursor.close()
-            conn.close()
-    return []
+def _day_start(day):
+    return datetime.datetime.combine(day, datetime.time(0, 0, 0))
 
 def build_line_and_bar_charts(page, filter_type):
     max_x_val = 6  # Default fallback
@@ -101,8 +20,11 @@ def build_line_and_bar_charts(page, filter_type):
         today_date = datetime.date.today()
         yesterday_date = today_date - datetime.timedelta(days=1)
         hours = ["1PM", "2PM", "3PM", "4PM", "5PM", "6PM", "7PM"]
-        today = get_products_ordered_by_hour(today_date)
-        yesterday = get_products_ordered_by_hour(yesterday_date)
+        # 1PM (13) to 7PM (19)
+        today_open = datetime.datetime.combine(today_date, datetime.time(13, 0, 0))
+        yesterday_open = datetime.datetime.combine(yesterday_date, datetime.time(13, 0, 0))
+        today = get_products_ordered_series(today_open, today_open + datetime.timedelta(hours=7), "hour")
+        yesterday = get_products_ordered_series(yesterday_open, yesterday_open + datetime.timedelta(hours=7), "hour")
         x_labels = hours
         x_label_objs = [
             ft.ChartAxisLabel(value=i, label=ft.Text(hours[i], size=14, weight=ft.FontWeight.BOLD)) for i in range(len(hours))
@@ -114,9 +36,9 @@ def build_line_and_bar_charts(page, filter_type):
         today_date = datetime.date.today()
         start_date = today_date - datetime.timedelta(days=6)
         days = [(start_date + datetime.timedelta(days=i)).strftime("%a") for i in range(7)]
-        this_week = get_products_ordered_by_day(start_date, 7)
+        this_week = get_products_ordered_series(_day_start(start_date), _day_start(start_date + datetime.timedelta(days=7)), "day")
         last_week_start = start_date - datetime.timedelta(days=7)
-        last_week = get_products_ordered_by_day(last_week_start, 7)
+        last_week = get_products_ordered_series(_day_start(last_week_start), _day_start(start_date), "day")
         today = this_week
         yesterday = last_week
         x_labels = days
@@ -129,26 +51,12 @@ def build_line_and_bar_charts(page, filter_type):
     elif filter_type == "month":
         today_date = datetime.date.today()
         start_date = today_date.replace(day=1)
-        days_in_month = (today_date.replace(month=today_date.month % 12 + 1, day=1) - datetime.timedelta(days=1)).day
-        # Get per-day data for this and last month
-        this_month = get_products_ordered_by_day(start_date, days_in_month)
-        prev_month_last_day = start_date - datetime.timedelta(days=1)
-        prev_month_start = prev_month_last_day.replace(day=1)
-        prev_month_days = prev_month_last_day.day
-        last_month = get_products_ordered_by_day(prev_month_start, prev_month_days)
-        # Group into 4 buckets: 1-7, 8-14, 15-21, 22-28 (always 4 buckets)
-        def group_weekly(data):
-            buckets = []
-            for i in range(0, 28, 7):  # Always 4 buckets for 28 days
-                if i < len(data):
-                    buckets.append(sum(data[i:i+7]))
-                else:
-                    buckets.append(0)
-            while len(buckets) < 4:
-                buckets.append(0)
-            return buckets[:4]
-        today = group_weekly(this_month)
-        yesterday = group_weekly(last_month)
+        prev_month_start = (start_date - datetime.timedelta(days=1)).replace(day=1)
+        # 4 weekly buckets: days 1-7, 8-14, 15-21, 22-28
+        this_month_start = _day_start(start_date)
+        last_month_start = _day_start(prev_month_start)
+        today = get_products_ordered_series(this_month_start, this_month_start + datetime.timedelta(days=28), "week")
+        yesterday = get_products_ordered_series(last_month_start, last_month_start + datetime.timedelta(days=28), "week")
         x_labels = ["WK1", "WK2", "WK3", "WK4"]
         x_label_objs = [
             ft.ChartAxisLabel(value=i, label=ft.Text(x_labels[i], size=14, weight=ft.FontWeight.BOLD)) for i in range(4)
@@ -301,68 +209,6 @@ def filter_button(label, filter_type, selected, on_click):
     )
 
 def reports_view(page: ft.Page):
-    # Fetch logged-in user's name
-    def get_logged_in_user():
-        try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-                cursor.execute("SELECT first_name, last_name FROM employees WHERE id = %s", (page.session.get("user_id"),))
-                user = cursor.fetchone()
-                cursor.close()
-                conn.close()
-                return f"{user[0]} {user[1]}" if user else "User"
-        except Exception as e:
-            print(f"Error fetching user: {e}")
-            return "User"
-
-    user_name = get_logged_in_user()
-
-    # Header Section
-    header = ft.Row(
-        controls=[
-            ft.Column(
-                controls=[
-                    ft.Text("Sales Report", size=24, weight="bold", color="#BB6F19"),
-                    ft.Text("Monday, 25 March 2025", size=14, color="black"),  # Example date
-                ],
-                expand=True
-            ),
-            ft.Container(
-                content=ft.Row(
-                    controls=[
-                        ft.CircleAvatar(
-                            content=ft.Icon(ft.Icons.PERSON, color="black"),
-                            bgcolor="#BB6F19",
-                            radius=18
-                        ),
-                        ft.Column(
-                            controls=[
-                                ft.Text(user_name, weight="bold", size=16, font_family="Poppins"),
-                                ft.Text("Barista", size=12, color="grey", font_family="Poppins")
-                            ],
-                            spacing=0
-                        ),
-                        ft.IconButton(
-                            icon=ft.Icons.LOGOUT,
-                            icon_color="black",
-                            tooltip="Logout",
-                            on_click=lambda e: handle_logout(page)
-                        )
-                    ],
-                    spacing=10,
-                    alignment="center"
-                ),
-                padding=10,
-                border_radius=25,
-                bgcolor="white",
-                shadow=ft.BoxShadow(blur_radius=4, color=ft.Colors.with_opacity(0.1, "black")),
-            )
-        ],
-        alignment="spaceBetween",
-        vertical_alignment="center"
-    )
-
     def handle_logout(page):
         # Create a custom modal dialog for logout confirmation (standardized)
         logout_modal = ft.Container(
@@ -434,15 +280,35 @@ def reports_view(page: ft.Page):
         page.update()
 
     # --- CHARTS ---
-    # Get real data from database
-    product_stats = get_product_type_statistics()
-    categories = [stat[0] for stat in product_stats]  # Product types
-    values = [stat[1] for stat in product_stats]      # Quantities
     colors = ['#BB6F19', '#F5E9DA', '#D4A76A', '#8B4513', '#D2691E', '#CD853F']  # Added more colors for variety
 
-    # Initialize charts with the default timeline
-    bar_chart, sales_trend_chart = build_line_and_bar_charts(page, state.filter)
-    
+    # Charts show skeletons until load_charts has built them for the selected timeline
+    bar_chart = skeleton(width=1000, height=350, radius=16)
+    sales_trend_chart = skeleton(width=350, height=250, radius=16)
+
+    def show_donut_chart(results):
+        categories = [stat[0] for stat in results]
+        values = [stat[1] for stat in results]
+
+        # Handle case where there are no orders
+        if not values or sum(values) == 0:
+            categories = ["No Orders"]
+            values = [0]
+
+        total = sum(values) if values else 1  # Prevent division by zero
+        chart.sections = [
+            ft.PieChartSection(
+                values[i],
+                title=f"{int(values[i] / total * 100)}%" if total > 0 else "0%",
+                title_style=normal_title_style,
+                color=colors[i % len(colors)],
+                radius=normal_radius,
+            ) for i in range(len(categories))
+        ]
+        legends.controls = [
+            create_legend_item(colors[i % len(colors)], categories[i], values[i]) for i in range(len(categories))
+        ]
+
     def update_donut_chart(filter_type):
         # Fetch data dynamically based on the filter type
         if filter_type == "today":
@@ -453,54 +319,16 @@ def reports_view(page: ft.Page):
             end_date = datetime.date.today() + datetime.timedelta(days=1)
         elif filter_type == "month":
             start_date = datetime.date.today().replace(day=1)
-            end_date = (start_date.replace(month=start_date.month % 12 + 1, day=1) - datetime.timedelta(days=1)).replace(day=start_date.day)
+            end_date = (start_date + datetime.timedelta(days=31)).replace(day=1)
         else:
             start_date = datetime.date.today()
             end_date = start_date + datetime.timedelta(days=1)
 
-        conn = get_db_connection()
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
-            try:
-                cursor.execute("""
-                    SELECT p.type, COALESCE(SUM(o.quantity), 0) as total_quantity
-                    FROM products p
-                    LEFT JOIN orders o ON p.name = o.product_name
-                    WHERE o.created_at >= %s AND o.created_at < %s AND o.status != 'Pending'
-                    GROUP BY p.type
-                    ORDER BY total_quantity DESC
-                """, (start_date, end_date))
-                results = cursor.fetchall()
-                categories = [stat[0] for stat in results]
-                values = [stat[1] for stat in results]
-
-                # Handle case where there are no orders
-                if not values or sum(values) == 0:
-                    categories = ["No Orders"]
-                    values = [0]
-
-                total = sum(values) if values else 1  # Prevent division by zero
-                pie_sections = [
-                    ft.PieChartSection(
-                        values[i],
-                        title=f"{int(values[i] / total * 100)}%" if total > 0 else "0%",
-                        title_style=normal_title_style,
-                        color=colors[i % len(colors)],
-                        radius=normal_radius,
-                    ) for i in range(len(categories))
-                ]
-                legends.controls = [
-                    create_legend_item(colors[i % len(colors)], categories[i], values[i]) for i in range(len(categories))
-                ]
-                chart.sections = pie_sections
-                chart.update()
-            except Exception as e:
-                print(f"Error updating donut chart: {e}")
-            finally:
-                cursor.close()
-                conn.close()
-                
-    update_donut_chart(state.filter)  # Ensure the donut chart is initialized with "today"
+        def apply(results):
+            if state.filter == filter_type:  # Skip a timeline the user has already left
+                show_donut_chart(results)
+
+        load_in_background(page, lambda: fetch_type_quantities(start_date, end_date), apply)
 
     # --- LEGENDS ---
     def create_legend_item(color, label, value):
@@ -515,9 +343,7 @@ def reports_view(page: ft.Page):
         )
 
     legends = ft.Column(
-        controls=[
-            create_legend_item(colors[i % len(colors)], categories[i], values[i]) for i in range(len(categories))
-        ],
+        controls=[skeleton(width=90, height=10) for _ in range(4)],
         spacing=6,
         alignment="start",
     )
@@ -534,17 +360,6 @@ def reports_view(page: ft.Page):
         weight=ft.FontWeight.BOLD,
         shadow=ft.BoxShadow(blur_radius=2, color=ft.Colors.BLACK54),
     )
-    # Calculate percentages for the pie chart
-    total = sum(values) if values else 1  # Prevent division by zero
-    pie_sections = [
-        ft.PieChartSection(
-            values[i],
-            title=f"{int(values[i] / total * 100)}%" if total > 0 else "0%",
-            title_style=normal_title_style,
-            color=colors[i % len(colors)],  # Cycle through colors if more categories than colors
-            radius=normal_radius,
-        ) for i in range(len(categories))
-    ]
     def on_chart_event(e: ft.PieChartEvent):
         for idx, section in enumerate(chart.sections):
             if idx == e.section_index:
@@ -555,7 +370,7 @@ def reports_view(page: ft.Page):
                 section.title_style = normal_title_style
         chart.update()
     chart = ft.PieChart(
-        sections=pie_sections,
+        sections=[],  # Filled by show_donut_chart
         sections_space=0,
         center_space_radius=40,
         on_chart_event=on_chart_event,
@@ -581,18 +396,25 @@ def reports_view(page: ft.Page):
     )
     
     # --- FILTER CONTROLS ---
+    def load_charts(filter_type):
+        def show_charts(charts):
+            if state.filter != filter_type:
+                return  # The user picked another timeline while this one loaded
+            bar_chart, sales_trend_chart = charts
+            right_charts_column.controls[0] = bar_chart
+            charts_row.controls[0] = sales_trend_chart
+
+        load_in_background(page, lambda: build_line_and_bar_charts(page, filter_type), show_charts)
+
     def update_charts(filter_type):
         state.filter = filter_type  # Update the filter state
-        bar_chart, sales_trend_chart = build_line_and_bar_charts(page, filter_type)
+        load_charts(filter_type)
         update_donut_chart(filter_type)  # Update the donut chart dynamically
         filter_toggle_row.controls = [
             filter_button("Today", "today", state.filter == "today", update_charts),
             filter_button("Week", "week", state.filter == "week", update_charts),
             filter_button("Month", "month", state.filter == "month", update_charts),
         ]  # Re-render buttons with updated state
-        right_charts_column.controls[0] = bar_chart
-        right_charts_column.controls[1] = charts_row
-        charts_row.controls[0] = sales_trend_chart
         page.update()
 
     filter_toggle_row = ft.Row(
@@ -659,54 +481,26 @@ def reports_view(page: ft.Page):
 
     def fetch_report_metrics():
         try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-
-                # Fetch revenue, profit, and total orders for today
-                cursor.execute("""
-                    SELECT 
-                        SUM(price * quantity) AS revenue, 
-                        SUM(price * quantity * 0.4) AS profit, 
-                        COUNT(*) AS total_orders 
-                    FROM orders 
-                    WHERE DATE(created_at) = CURDATE() AND status = 'Confirmed'
-                """)
-                today_data = cursor.fetchone()
-                revenue_today = today_data[0] or 0
-                profit_today = today_data[1] or 0
-                total_orders_today = today_data[2] or 0
-
-                # Fetch revenue, profit, and total orders for yesterday
-                cursor.execute("""
-                    SELECT 
-                        SUM(price * quantity) AS revenue, 
-                        SUM(price * quantity * 0.4) AS profit, 
-                        COUNT(*) AS total_orders 
-                    FROM orders 
-                    WHERE DATE(created_at) = CURDATE() - INTERVAL 1 DAY AND status = 'Confirmed'
-                """)
-                yesterday_data = cursor.fetchone()
-                revenue_yesterday = yesterday_data[0] or 0
-                profit_yesterday = yesterday_data[1] or 0
-                total_orders_yesterday = yesterday_data[2] or 0
-
-                # Calculate percentage changes
-                revenue_change = ((revenue_today - revenue_yesterday) / revenue_yesterday * 100) if revenue_yesterday else 0
-                profit_change = ((profit_today - profit_yesterday) / profit_yesterday * 100) if profit_yesterday else 0
-                total_orders_change = ((total_orders_today - total_orders_yesterday) / total_orders_yesterday * 100) if total_orders_yesterday else 0
-
-                cursor.close()
-                conn.close()
-
-                return {
-                    "revenue_today": revenue_today,
-                    "profit_today": profit_today,
-                    "total_orders_today": total_orders_today,
-                    "revenue_change": revenue_change,
-                    "profit_change": profit_change,
-                    "total_orders_change": total_orders_change,
-                }
+            # Revenue, profit, and total orders for today and yesterday from the rollup
+            today_date = datetime.date.today()
+            revenue_today, total_orders_today = fetch_sales_totals(today_date, today_date + datetime.timedelta(days=1))
+            revenue_yesterday, total_orders_yesterday = fetch_sales_totals(today_date - datetime.timedelta(days=1), today_date)
+            profit_today = revenue_today * PROFIT_MARGIN
+            profit_yesterday = revenue_yesterday * PROFIT_MARGIN
+
+            # Calculate percentage changes
+            revenue_change = ((revenue_today - revenue_yesterday) / revenue_yesterday * 100) if revenue_yesterday else 0
+            profit_change = ((profit_today - profit_yesterday) / profit_yesterday * 100) if profit_yesterday else 0
+            total_orders_change = ((total_orders_today - total_orders_yesterday) / total_orders_yesterday * 100) if total_orders_yesterday else 0
+
+            return {
+                "revenue_today": revenue_today,
+                "profit_today": profit_today,
+                "total_orders_today": total_orders_today,
+                "revenue_change": revenue_change,
+                "profit_change": profit_change,
+                "total_orders_change": total_orders_change,
+            }
         except Exception as e:
             print(f"Error fetching report metrics: {e}")
             return {
@@ -718,10 +512,8 @@ def reports_view(page: ft.Page):
                 "total_orders_change": 0,
             }
 
-    report_metrics = fetch_report_metrics()
-
-    metrics_column = ft.Column(
-        controls=[
+    def metric_cards(report_metrics):
+        return [
             metric_card(
                 "Total Revenue",
                 f"₱{report_metrics['revenue_today']:.2f}",
@@ -749,11 +541,17 @@ def reports_view(page: ft.Page):
                 ft.Icons.SHOPPING_BAG,
                 ft.Colors.ORANGE_700
             ),
-        ],
+        ]
+
+    metrics_column = ft.Column(
+        controls=[skeleton(width=380, height=150, radius=16, expand=True) for _ in range(3)],
         spacing=20,
         alignment="center"
     )
 
+    def show_metrics(report_metrics):
+        metrics_column.controls = metric_cards(report_metrics)
+
     # --- CHARTS ---
     charts_row = ft.Row([
         sales_trend_chart,
@@ -774,7 +572,7 @@ def reports_view(page: ft.Page):
     ], spacing=24, expand=True)
 
     # User Profile Card
-    def user_profile_card():
+    def get_profile_name():
         user_id = page.session.get("user_id")
         full_name = get_employee_full_name(user_id)
         if not full_name or full_name.lower() == 'none':
@@ -792,6 +590,14 @@ def reports_view(page: ft.Page):
                         full_name = "Admin"
             except Exception:
                 full_name = "Admin"
+        return full_name
+
+    profile_name = ft.Column([skeleton(width=120, height=18)], spacing=0)
+
+    def show_profile_name(full_name):
+        profile_name.controls = [ft.Text(full_name, weight="bold", size=16, font_family="Poppins")]
+
+    def user_profile_card():
         return ft.Container(
             content=ft.Row([
                 ft.CircleAvatar(
@@ -799,9 +605,7 @@ def reports_view(page: ft.Page):
                     bgcolor="#BB6F19",
                     radius=18
                 ),
-                ft.Column([
-                    ft.Text(full_name, weight="bold", size=16, font_family="Poppins"),
-                ], spacing=0),
+                profile_name,
                 ft.IconButton(
                     icon=ft.Icons.LOGOUT,
                     icon_color="black",
@@ -815,6 +619,17 @@ def reports_view(page: ft.Page):
             shadow=ft.BoxShadow(blur_radius=4, color=ft.Colors.with_opacity(0.1, ft.Colors.BLACK)),
         )
 
+    # Every section fills in as its own query returns
+    load_charts(state.filter)
+    update_donut_chart(state.filter)
+    load_in_background(page, fetch_report_metrics, show_metrics)
+    load_in_background(page, get_profile_name, show_profile_name, on_error=lambda e: show_profile_name("Admin"))
+
+    def refresh_view():
+        load_charts(state.filter)
+        update_donut_chart(state.filter)
+        load_in_background(page, fetch_report_metrics, show_metrics)
+
     # --- PAGE RETURN ---
     return ft.Container(
         content=ft.Column([
@@ -829,5 +644,6 @@ def reports_view(page: ft.Page):
             ft.Container(main_content, padding=20, expand=True)
         ], spacing=20),
         padding=20,
-        expand=True
+        expand=True,
+        data={"refresh": refresh_view},  # Used by Navigation when the view's data goes stale
     )
\ No newline at end of file
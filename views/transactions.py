@@ -1,115 +1,74 @@
 import flet as ft
 from config.database import get_db_connection, get_employee_full_name
-from views.order_window import fetch_transaction_and_orders, page as order_page
+from config.settings import RECEIPT_BACKEND, RECEIPT_DIR
+from config.transactions import VOIDED, fetch_transactions_page, fetch_transaction_lines, void_transaction
+from utils.receipt_archive import load_receipt
+from utils.receipts import BACKENDS, render_text
+from views.components.loading import skeleton, load_in_background
 import os
+import re
 import glob
+import base64
+import datetime
+import threading
+from decimal import Decimal
 
-def get_admin_full_name():
+SEARCH_DEBOUNCE = 0.3  # Seconds of no typing before the search runs
+
+def text_receipt_view(receipt_text):
+    return ft.Container(
+        content=ft.Text(receipt_text, font_family="monospace", size=12, color="black"),
+        bgcolor="white",
+        padding=ft.padding.all(20),
+        width=400,
+    )
+
+def build_receipt_view(order_code):
+    """The receipt for order_code, drawn from the archive, or None if there isn't one."""
     try:
-        conn = get_db_connection()
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
-            cursor.execute("SELECT full_name FROM admin LIMIT 1")
-            admin = cursor.fetchone()
-            cursor.close()
-            conn.close()
-            return admin[0] if admin else "Admin"
+        receipt = load_receipt(order_code)
     except Exception as e:
-        print(f"Error fetching admin name: {e}")
-        return "Admin"
+        print(f"Error loading receipt {order_code}: {e}")
+        receipt = None
+    if receipt is not None:
+        if RECEIPT_BACKEND in ("text", "escpos"):
+            return text_receipt_view(render_text(receipt))
+        png = BACKENDS.get(RECEIPT_BACKEND, BACKENDS["png"])[1](receipt)
+        return ft.Image(src_base64=base64.b64encode(png).decode("ascii"), width=400, fit=ft.ImageFit.CONTAIN)
 
-admin_full_name = get_admin_full_name()
+    # Receipts saved before the archive existed are only on disk
+    pattern = os.path.join(RECEIPT_DIR, f"receipt_{order_code}_*.*")
+    receipt_files = sorted((f for f in glob.glob(pattern) if f.endswith((".png", ".txt"))), reverse=True)
+    if not receipt_files:
+        return None
+    receipt_img_path = receipt_files[0]
+    if receipt_img_path.endswith(".txt"):
+        with open(receipt_img_path, encoding="utf-8") as f:
+            return text_receipt_view(f.read())
+    receipt_img_src = receipt_img_path.replace(os.getcwd() + os.sep, "").replace("\\", "/")
+    return ft.Image(src=receipt_img_src, width=400, fit=ft.ImageFit.CONTAIN)
 
-def delete_transaction_and_orders(transaction_id, page, refresh_callback):
+def void_transaction_and_orders(transaction_id, page, on_voided):
+    """Void a transaction (kept, marked Voided and taken out of sales), then update its card."""
     try:
-        conn = get_db_connection()
-        if conn and conn.is_connected():
-            cursor = conn.cursor()
-            # Delete orders first
-            cursor.execute("DELETE FROM orders WHERE transaction_id = %s", (transaction_id,))
-            # Delete transaction
-            cursor.execute("DELETE FROM transactions WHERE transaction_id = %s", (transaction_id,))
-            conn.commit()
-            cursor.close()
-            conn.close()
+        voided = void_transaction(transaction_id, voided_by=page.session.get("user_id"))
         page.snack_bar = ft.SnackBar(
-            content=ft.Text("Transaction deleted successfully!"),
+            content=ft.Text("Transaction voided successfully!" if voided else "Transaction was already voided."),
             bgcolor="#4CAF50"
         )
         page.snack_bar.open = True
+        on_voided()
         page.update()
-        refresh_callback()
     except Exception as e:
-        print(f"Error deleting transaction: {e}")
+        print(f"Error voiding transaction: {e}")
         page.snack_bar = ft.SnackBar(
-            content=ft.Text("Error deleting transaction!"),
+            content=ft.Text("Error voiding transaction!"),
             bgcolor="#F44336"
         )
         page.snack_bar.open = True
         page.update()
 
 def transactions_view(page: ft.Page):
-    # Fetch logged-in user's name
-    def get_logged_in_user():
-        try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-                cursor.execute("SELECT first_name, last_name FROM employees WHERE id = %s", (page.session.get("user_id"),))
-                user = cursor.fetchone()
-                cursor.close()
-                conn.close()
-                return f"{user[0]} {user[1]}" if user else "User"
-        except Exception as e:
-            print(f"Error fetching user: {e}")
-            return "User"
-
-    user_name = get_logged_in_user()
-
-    # Header Section
-    header = ft.Row(
-        controls=[
-            ft.Column(
-                controls=[
-                    ft.Text("Transactions", size=24, weight="bold", color="#BB6F19"),
-                    ft.Text("Monday, 25 March 2025", size=14, color="black"),  # Example date
-                ],
-                expand=True
-            ),
-            ft.Container(
-                content=ft.Row(
-                    controls=[
-                        ft.CircleAvatar(
-                            content=ft.Icon(ft.Icons.PERSON, color="black"),
-                            bgcolor="#BB6F19",
-                            radius=18
-                        ),
-                        ft.Column(
-                            controls=[
-                                ft.Text(user_name, weight="bold", size=16, font_family="Poppins"),
-                            ],
-                            spacing=0
-                        ),
-                        ft.IconButton(
-                            icon=ft.Icons.LOGOUT,
-                            icon_color="black",
-                            tooltip="Logout",
-                            on_click=lambda e: handle_logout(page)
-                        )
-                    ],
-                    spacing=10,
-                    alignment="center"
-                ),
-                padding=10,
-                border_radius=25,
-                bgcolor="white",
-                shadow=ft.BoxShadow(blur_radius=4, color=ft.Colors.with_opacity(0.1, "black")),
-            )
-        ],
-        alignment="spaceBetween",
-        vertical_alignment="center"
-    )
-
     def handle_logout(page):
         # Create a custom modal dialog for logout confirmation (standardized)
         logout_modal = ft.Container(
@@ -177,17 +136,74 @@ def transactions_view(page: ft.Page):
         logout_modal.visible = True
         page.update()
 
-    # Search and Filter Section
+    # Search and Filter Section. The box takes an order code ("BBT0012", "12") or
+    # product words ("milk tea"); the filter panel narrows by date, payment and amount.
+    def filter_field(label, width=150):
+        return ft.TextField(
+            label=label,
+            width=width,
+            border=ft.InputBorder.OUTLINE,
+            filled=True,
+            bgcolor="white",
+            on_change=lambda e: schedule_search(),
+        )
+
+    search_field = ft.TextField(
+        hint_text="Search order code or product",
+        width=300,
+        prefix_icon=ft.Icons.SEARCH,
+        border=ft.InputBorder.OUTLINE,
+        filled=True,
+        bgcolor="white",
+        on_change=lambda e: schedule_search(),
+    )
+    start_date_field = filter_field("From (YYYY-MM-DD)", 170)
+    end_date_field = filter_field("To (YYYY-MM-DD)", 170)
+    min_amount_field = filter_field("Min ₱")
+    max_amount_field = filter_field("Max ₱")
+    payment_dropdown = ft.Dropdown(
+        label="Payment",
+        value="All",
+        options=[
+            ft.dropdown.Option("All"),
+            ft.dropdown.Option("Cash"),
+            ft.dropdown.Option("GCash"),
+        ],
+        width=150,
+        border=ft.InputBorder.OUTLINE,
+        filled=True,
+        bgcolor="white",
+        on_change=lambda e: schedule_search(),
+    )
+
+    def clear_filters():
+        for field in (search_field, start_date_field, end_date_field, min_amount_field, max_amount_field):
+            field.value = ""
+            field.error_text = None
+        payment_dropdown.value = "All"
+        page.update()
+        schedule_search()
+
+    filter_panel = ft.Row(
+        controls=[
+            start_date_field,
+            end_date_field,
+            payment_dropdown,
+            min_amount_field,
+            max_amount_field,
+            ft.TextButton("Clear", on_click=lambda e: clear_filters()),
+        ],
+        spacing=10,
+        visible=False,
+    )
+
+    def toggle_filter_panel():
+        filter_panel.visible = not filter_panel.visible
+        page.update()
+
     search_filter_row = ft.Row(
         controls=[
-            ft.TextField(
-                hint_text="Search",
-                width=300,
-                prefix_icon=ft.Icons.SEARCH,
-                border=ft.InputBorder.OUTLINE,
-                filled=True,
-                bgcolor="white"
-            ),
+            search_field,
             ft.ElevatedButton(
                 "Filter",
                 icon=ft.Icons.FILTER_LIST,
@@ -196,7 +212,8 @@ def transactions_view(page: ft.Page):
                     color="white",
                     padding=ft.padding.symmetric(horizontal=20, vertical=10),
                     shape=ft.RoundedRectangleBorder(radius=8)
-                )
+                ),
+                on_click=lambda e: toggle_filter_panel(),
             ),
             ft.Row(
                 controls=[
@@ -212,60 +229,112 @@ def transactions_view(page: ft.Page):
         spacing=20
     )
 
-    # Fetch transactions from the database
-    def fetch_transactions():
+    def parse_field(field, parse, error):
+        """field's value through parse(), or None if blank; flags the field if it doesn't parse."""
+        text = (field.value or "").strip()
+        field.error_text = None
+        if not text:
+            return None
         try:
-            conn = get_db_connection()
-            if conn and conn.is_connected():
-                cursor = conn.cursor()
-                cursor.execute("""
-                    SELECT t.transaction_id, t.order_code, t.total_amount,
-                           GROUP_CONCAT(CONCAT(o.product_name, ' x', o.quantity, ' (₱', o.price, ')', 
-                           IF(o.add_ons IS NOT NULL AND o.add_ons != '', CONCAT(' - Add-Ons: ', o.add_ons), '')) SEPARATOR '\n') AS orders
-                    FROM transactions t
-                    LEFT JOIN orders o ON o.transaction_id = t.transaction_id
-                    GROUP BY t.transaction_id
-                    ORDER BY t.transaction_id DESC
-                """)
-                transactions = cursor.fetchall()
-                cursor.close()
-                conn.close()
-                return transactions
-            else:
-                print("Error: Unable to connect to the database.")
-                return []
+            return parse(text)
+        except (ValueError, ArithmeticError):
+            field.error_text = error
+            return None
+
+    def current_filters():
+        filters = {}
+        text = (search_field.value or "").strip()
+        if re.fullmatch(r"(?i)bbt\d*", text):
+            filters["code_prefix"] = text.upper()
+        elif text.isdigit():
+            filters["code_prefix"] = f"BBT{int(text):04d}"
+        elif text:
+            filters["product"] = text
+        filters["start"] = parse_field(start_date_field, datetime.date.fromisoformat, "Use YYYY-MM-DD")
+        end = parse_field(end_date_field, datetime.date.fromisoformat, "Use YYYY-MM-DD")
+        filters["end"] = end + datetime.timedelta(days=1) if end else None  # Include the whole end day
+        if payment_dropdown.value and payment_dropdown.value != "All":
+            filters["payment_method"] = payment_dropdown.value
+        filters["min_amount"] = parse_field(min_amount_field, Decimal, "Enter an amount")
+        filters["max_amount"] = parse_field(max_amount_field, Decimal, "Enter an amount")
+        return filters
+
+    # Searches wait for a pause in typing, and only the newest one updates the grid
+    search_state = {"timer": None, "generation": 0}
+
+    def schedule_search():
+        if search_state["timer"] is not None:
+            search_state["timer"].cancel()
+        search_state["timer"] = threading.Timer(SEARCH_DEBOUNCE, run_search)
+        search_state["timer"].daemon = True
+        search_state["timer"].start()
+
+    def run_search():
+        search_state["generation"] += 1
+        generation = search_state["generation"]
+        filters = current_filters()
+        try:
+            rows, next_cursor = fetch_transactions_page(filters=filters)
         except Exception as e:
-            print(f"Error fetching transactions: {str(e)}")
-            return []
+            print(f"Error searching transactions: {e}")
+            return
+        if generation != search_state["generation"]:
+            return  # A newer search has started
+        show_results(filters, rows, next_cursor)
+        page.update()
+
+    def show_results(filters, rows, next_cursor):
+        paging["filters"] = filters
+        paging["next_cursor"] = next_cursor
+        transactions_grid.controls = [build_transaction_card(row) for row in rows]
+        load_more_button.visible = next_cursor is not None
+        no_results_text.visible = not rows
+
+    def load_first_page():
+        generation = search_state["generation"]
+
+        def apply(result):
+            if generation == search_state["generation"]:  # Unless a search got there first
+                show_results({}, *result)
+
+        def clear_placeholders(error):
+            if generation == search_state["generation"]:
+                transactions_grid.controls = []
+
+        load_in_background(page, fetch_transactions_page, apply, on_error=clear_placeholders)
+
+    # Keyset-paged list: the first page loads in the background, later pages as the grid scrolls
+    paging = {"next_cursor": None, "loading": False, "filters": {}}
 
     # Helper to build a transaction card
     def build_transaction_card(transaction):
-        transaction_id = transaction[0]
-        order_code = transaction[1]
-        total_amount = float(transaction[2])
-        orders_str = transaction[3] or ''
-        order_lines = [line for line in orders_str.split('\n') if line.strip()]
-        order_items = []
-        for line in order_lines:
-            parts = line.split(' x')
-            if len(parts) >= 2:
-                name = parts[0]
-                qty_and_rest = parts[1]
-                qty = qty_and_rest.split(' ')[0]
-                order_items.append((name, qty))
-            else:
-                order_items.append((line, ''))
-        col1 = order_items[::2]
-        col2 = order_items[1::2]
+        transaction_id, order_code, total_amount, payment_method, _, item_count, status = transaction
+        total_amount = float(total_amount)
+        voided = status == VOIDED
+
+        # Order lines are read the first time the card is expanded
+        orders_row = ft.Row([], alignment="spaceBetween", visible=False)
+        orders_toggle = ft.TextButton(f"Show orders ({int(item_count)} items)", on_click=lambda e: toggle_orders())
+
+        def toggle_orders():
+            if not orders_row.controls:
+                try:
+                    lines = fetch_transaction_lines(transaction_id)
+                except Exception as e:
+                    print(f"Error fetching transaction orders: {e}")
+                    return
+                order_items = [(name, quantity) for name, _, _, quantity, _ in lines]
+                orders_row.controls = [
+                    ft.Column([ft.Text(f"{name} x{qty}", size=12) for name, qty in order_items[::2]], spacing=2),
+                    ft.Column([ft.Text(f"{name} x{qty}", size=12) for name, qty in order_items[1::2]], spacing=2),
+                ]
+            orders_row.visible = not orders_row.visible
+            orders_toggle.text = ("Hide orders" if orders_row.visible else f"Show orders ({int(item_count)} items)")
+            card.update()
 
         def on_card_click(e, order_code=order_code, page=page):
-            receipts_dir = os.path.join(os.getcwd(), "receipts")
-            pattern = os.path.join(receipts_dir, f"receipt_{order_code}_*.png")
-            receipt_files = sorted(glob.glob(pattern), reverse=True)
-            if receipt_files:
-                receipt_img_path = receipt_files[0]
-                receipt_img_src = receipt_img_path.replace(os.getcwd() + os.sep, "").replace("\\", "/")
-                receipt_image = ft.Image(src=receipt_img_src, width=400, fit=ft.ImageFit.CONTAIN)
+            receipt_image = build_receipt_view(order_code)
+            if receipt_image is not None:
                 receipt_modal = ft.Container(
                     visible=True,
                     alignment=ft.alignment.center,
@@ -313,10 +382,18 @@ def transactions_view(page: ft.Page):
                 e.control.bgcolor = "#F0E6D2"
                 e.control.cursor = "pointer"
             else:
-                e.control.bgcolor = "#F5F5F5"
+                e.control.bgcolor = "#E0E0E0" if voided else "#F5F5F5"
                 e.control.cursor = "default"
             e.control.update()
 
+        def mark_voided():
+            # Only this card changes; the rest of the grid stays as it is
+            nonlocal voided
+            voided = True
+            voided_text.visible = True
+            void_button.visible = False
+            card.bgcolor = "#E0E0E0"
+
         def show_delete_transaction_confirmation(transaction_id=transaction_id):
             confirm_modal = ft.Container(
                 visible=True,
@@ -330,8 +407,8 @@ def transactions_view(page: ft.Page):
                     border_radius=15,
                     padding=ft.padding.all(20),
                     content=ft.Column([
-                        ft.Text("Delete Transaction", size=18, weight="bold", color="#E53935"),
-                        ft.Text("Are you sure you want to delete this transaction and all its orders?", size=14, color="#333", text_align="center"),
+                        ft.Text("Void Transaction", size=18, weight="bold", color="#E53935"),
+                        ft.Text("Void this transaction? It stays on record but no longer counts toward sales.", size=14, color="#333", text_align="center"),
                         ft.Row([
                             ft.ElevatedButton(
                                 "Cancel",
@@ -339,9 +416,9 @@ def transactions_view(page: ft.Page):
                                 on_click=lambda e: (page.overlay.remove(confirm_modal), page.update()),
                             ),
                             ft.ElevatedButton(
-                                "Delete",
+                                "Void",
                                 style=ft.ButtonStyle(bgcolor="#E53935", color="white"),
-                                on_click=lambda e: (page.overlay.remove(confirm_modal), delete_transaction_and_orders(transaction_id, page, refresh_transactions)),
+                                on_click=lambda e: (page.overlay.remove(confirm_modal), void_transaction_and_orders(transaction_id, page, mark_voided)),
                             ),
                         ], alignment="center", spacing=20),
                     ], spacing=16, horizontal_alignment=ft.CrossAxisAlignment.CENTER),
@@ -350,81 +427,99 @@ def transactions_view(page: ft.Page):
             page.overlay.append(confirm_modal)
             page.update()
 
-        orders_row = ft.Row([
-            ft.Column([
-                ft.Text(f"{name} x{qty}", size=12) for name, qty in col1
-            ], spacing=2),
-            ft.Column([
-                ft.Text(f"{name} x{qty}", size=12) for name, qty in col2
-            ], spacing=2),
-        ], alignment="spaceBetween")
-
-        return ft.Container(
+        voided_text = ft.Text("VOIDED", size=14, weight="bold", color="#E53935", visible=voided)
+        void_button = ft.Container(
+            content=ft.IconButton(
+                icon=ft.Icons.DELETE,
+                icon_color="#E53935",
+                tooltip="Void Transaction",
+                on_click=lambda e, transaction_id=transaction_id: show_delete_transaction_confirmation(transaction_id),
+            ),
+            alignment=ft.alignment.top_right,
+            padding=ft.padding.only(top=0, right=0),
+            visible=not voided,
+        )
+        card = ft.Container(
             content=ft.Stack([
                 ft.Column(
                     controls=[
                         ft.Text(f"Transaction ID: {transaction_id}", weight="bold", size=16),
                         ft.Text(f"Order Code: {order_code}", size=14),
-                        ft.Text(f"Total: ₱{total_amount:.2f}", size=14),
+                        ft.Text(f"Total: ₱{total_amount:.2f} ({payment_method})", size=14),
+                        voided_text,
                         ft.Divider(height=1, thickness=1, color="#BB6F19"),
-                        ft.Text("Orders:", weight="bold", size=14),
+                        orders_toggle,
                         orders_row,
                     ],
-                    spacing=5
-                ),
-                ft.Container(
-                    content=ft.IconButton(
-                        icon=ft.Icons.DELETE,
-                        icon_color="#E53935",
-                        tooltip="Delete Transaction",
-                        on_click=lambda e, transaction_id=transaction_id: show_delete_transaction_confirmation(transaction_id),
-                    ),
-                    alignment=ft.alignment.top_right,
-                    padding=ft.padding.only(top=0, right=0),
+                    spacing=5,
+                    scroll=ft.ScrollMode.AUTO,
                 ),
+                void_button,
             ]),
             width=300,
             height=200,
-            bgcolor="#F5F5F5",
+            bgcolor="#E0E0E0" if voided else "#F5F5F5",
             border_radius=10,
             padding=10,
             shadow=ft.BoxShadow(blur_radius=4, color=ft.Colors.with_opacity(0.1, "black")),
             on_hover=on_card_hover,
             on_click=lambda e, order_code=order_code: on_card_click(e, order_code, page),
         )
+        return card
 
-    # Function to refresh the transaction cards and update the UI
-    def refresh_transactions():
-        new_transactions = fetch_transactions()
-        transaction_cards.clear()
-        for transaction in new_transactions:
-            transaction_cards.append(build_transaction_card(transaction))
-        transactions_container.content.controls = transaction_cards
-        page.update()
-
-    transactions = fetch_transactions()
+    def load_next_page():
+        if paging["loading"] or (paging["next_cursor"] is None and transactions_grid.controls):
+            return  # Already loading, or every page is on screen
+        paging["loading"] = True
+        filters = paging["filters"]
+        try:
+            rows, next_cursor = fetch_transactions_page(paging["next_cursor"], filters=filters)
+        except Exception as e:
+            print(f"Error fetching transactions: {str(e)}")
+            return
+        finally:
+            paging["loading"] = False
+        if filters is not paging["filters"]:
+            return  # A search replaced the list while this page was loading
+        paging["next_cursor"] = next_cursor
+        transactions_grid.controls.extend(build_transaction_card(row) for row in rows)
+        load_more_button.visible = paging["next_cursor"] is not None
+        no_results_text.visible = not transactions_grid.controls
 
-    # Create transaction cards using the helper
-    transaction_cards = []
-    for transaction in transactions:
-        transaction_cards.append(build_transaction_card(transaction))
+    def on_grid_scroll(e):
+        # Fetch the next page as the user nears the bottom
+        if paging["next_cursor"] is None or e.pixels is None or e.max_scroll_extent is None:
+            return
+        if e.pixels >= e.max_scroll_extent - 400:
+            load_next_page()
+            page.update()
 
     # GridView to display transaction cards
+    transactions_grid = ft.GridView(
+        controls=[skeleton(height=180, radius=10) for _ in range(6)],  # Until the first page arrives
+        max_extent=320,  # Width of each grid item
+        spacing=20,  # Space between grid items
+        run_spacing=20,  # Space between rows
+        expand=True,
+        on_scroll_interval=200,
+        on_scroll=on_grid_scroll,
+    )
+    # For when the first page doesn't fill the grid, so it can't scroll
+    load_more_button = ft.TextButton(
+        "Load more transactions",
+        visible=False,
+        on_click=lambda e: (load_next_page(), page.update()),
+    )
+    no_results_text = ft.Text("No transactions found.", size=14, color="#7B6B63", visible=False)
     transactions_container = ft.Container(
-        content=ft.GridView(
-            controls=transaction_cards,
-            max_extent=320,  # Width of each grid item
-            spacing=20,  # Space between grid items
-            run_spacing=20,  # Space between rows
-            expand=True
-        ),
+        content=ft.Column([no_results_text, transactions_grid, load_more_button], horizontal_alignment=ft.CrossAxisAlignment.CENTER, expand=True),
         height=600,  # Increased height for better visibility
         bgcolor="white",
         border_radius=10,
         padding=10
     )
 
-    def user_profile_card():
+    def get_profile_name():
         user_id = page.session.get("user_id")
         full_name = get_employee_full_name(user_id)
         # If full_name is None or empty, fallback to 'Admin'
@@ -444,6 +539,14 @@ def transactions_view(page: ft.Page):
                         full_name = "Admin"
             except Exception:
                 full_name = "Admin"
+        return full_name
+
+    profile_name = ft.Column([skeleton(width=120, height=18)], spacing=0)
+
+    def show_profile_name(full_name):
+        profile_name.controls = [ft.Text(full_name, weight="bold", size=16, font_family="Poppins")]
+
+    def user_profile_card():
         return ft.Container(
             content=ft.Row([
                 ft.CircleAvatar(
@@ -451,9 +554,7 @@ def transactions_view(page: ft.Page):
                     bgcolor="#BB6F19",
                     radius=18
                 ),
-                ft.Column([
-                    ft.Text(full_name, weight="bold", size=16, font_family="Poppins"),
-                ], spacing=0),
+                profile_name,
                 ft.IconButton(
                     icon=ft.Icons.LOGOUT,
                     icon_color="black",
@@ -467,6 +568,13 @@ def transactions_view(page: ft.Page):
             shadow=ft.BoxShadow(blur_radius=4, color=ft.Colors.with_opacity(0.1, ft.Colors.BLACK)),
         )
 
+    load_first_page()
+    load_in_background(page, get_profile_name, show_profile_name, on_error=lambda e: show_profile_name("Admin"))
+
+    def refresh_view():
+        # Re-run the current search from its first page
+        load_in_background(page, run_search)
+
     # Main layout
     return ft.Container(
         content=ft.Column(
@@ -487,10 +595,12 @@ def transactions_view(page: ft.Page):
                 ),
                 ft.Divider(height=2, thickness=1, color="#BB6F19"),
                 search_filter_row,
+                filter_panel,
                 transactions_container
             ],
             spacing=20
         ),
         padding=20,
-        expand=True
+        expand=True,
+        data={"refresh": refresh_view},  # Used by Navigation when the view's data goes stale
     )
\ No newline at end of file